@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import pandas as pd
+
+from agent.dataset.cache import FrameMemo
+
+
+def normalize_name(s: str) -> str:
+    return re.sub(r"\s+", " ", str(s).strip().lower().replace("_", " "))
+
+
+def tokenize(s: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", normalize_name(s)))
+
+
+class ColumnIndex:
+    """
+    Per-dataset lookup structures for matching question text to columns.
+
+    Built once per frame: normalized names, token sets, an inverted
+    token -> columns map, a normalized-name -> columns map and dtype buckets.
+    Scoring a question only touches columns that share a token with it or
+    whose name occurs in it, so lookups don't scan every column.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.columns: List[str] = df.columns.tolist()
+        self.normalized: List[str] = [normalize_name(c) for c in self.columns]
+
+        self.by_token: Dict[str, List[int]] = defaultdict(list)
+        for pos, name in enumerate(self.normalized):
+            for tok in tokenize(name):
+                self.by_token[tok].append(pos)
+
+        self.by_name: Dict[str, List[int]] = defaultdict(list)
+        for pos, name in enumerate(self.normalized):
+            if name:
+                self.by_name[name].append(pos)
+        self.name_lengths = sorted({len(name) for name in self.by_name})
+
+        self.numeric_columns = df.select_dtypes(include="number").columns.tolist()
+        self.categorical_columns = df.select_dtypes(
+            include=["object", "category", "bool"]
+        ).columns.tolist()
+        self.datetime_columns = [
+            c for c in self.columns if "datetime" in str(df[c].dtype).lower()
+        ]
+
+        positions = {c: i for i, c in enumerate(self.columns)}
+        self._buckets = {
+            "numeric": {positions[c] for c in self.numeric_columns},
+            "categorical": {positions[c] for c in self.categorical_columns},
+        }
+        self._patterns: Dict[int, Tuple[Pattern[str], Pattern[str]]] = {}
+
+    def _phrase_patterns(self, pos: int) -> Tuple[Pattern[str], Pattern[str]]:
+        pats = self._patterns.get(pos)
+        if pats is None:
+            cn = re.escape(self.normalized[pos])
+            pats = (re.compile(rf"\bby\s+{cn}\b"), re.compile(rf"\bof\s+{cn}\b"))
+            self._patterns[pos] = pats
+        return pats
+
+    def _names_in(self, qn: str) -> set[int]:
+        # every substring of the question with the length of some column name
+        hits: set[int] = set()
+        for length in self.name_lengths:
+            if length > len(qn):
+                break
+            for start in range(len(qn) - length + 1):
+                found = self.by_name.get(qn[start:start + length])
+                if found:
+                    hits.update(found)
+        return hits
+
+    def scores(self, question: str) -> Dict[int, int]:
+        """
+        Non-zero match scores by column position.
+        Higher is better: exact phrase +100, each shared token +10,
+        "by <col>" +40, "of <col>" +20.
+        """
+        qn = normalize_name(question)
+
+        scores: Dict[int, int] = defaultdict(int)
+        for tok in tokenize(qn):
+            for pos in self.by_token.get(tok, ()):
+                scores[pos] += 10
+
+        for pos in self._names_in(qn):
+            scores[pos] += 100
+            by_pat, of_pat = self._phrase_patterns(pos)
+            if by_pat.search(qn):
+                scores[pos] += 40
+            if of_pat.search(qn):
+                scores[pos] += 20
+
+        return scores
+
+    def mentioned(self, question: str, prefer_numeric: bool = False) -> List[str]:
+        """
+        Columns whose full name occurs in the question, in order of appearance.
+        """
+        qn = normalize_name(question)
+        positions = self._names_in(qn)
+        if prefer_numeric:
+            positions &= self._buckets["numeric"]
+        ordered = sorted(positions, key=lambda pos: (qn.find(self.normalized[pos]), pos))
+        return [self.columns[pos] for pos in ordered]
+
+    def best_match(
+        self,
+        question: str,
+        prefer_numeric: bool = False,
+        prefer_categorical: bool = False,
+        min_score: int = 20,
+    ) -> Optional[str]:
+        if prefer_numeric:
+            bucket = self._buckets["numeric"]
+        elif prefer_categorical:
+            bucket = self._buckets["categorical"]
+        else:
+            bucket = None
+
+        best_pos, best_score = None, 0
+        for pos, score in self.scores(question).items():
+            if bucket is not None and pos not in bucket:
+                continue
+            # ties go to the earlier column
+            if score > best_score or (score == best_score and best_pos is not None and pos < best_pos):
+                best_pos, best_score = pos, score
+
+        if best_pos is None:
+            if min_score > 0:
+                return None
+            # every candidate scored 0: fall back to the first one
+            candidates = sorted(bucket) if bucket is not None else range(len(self.columns))
+            return self.columns[next(iter(candidates))] if len(candidates) else None
+
+        return self.columns[best_pos] if best_score >= min_score else None
+
+
+_column_indexes = FrameMemo()
+
+
+def column_index_for(df: pd.DataFrame) -> ColumnIndex:
+    return _column_indexes.get_or_build(df, ColumnIndex)
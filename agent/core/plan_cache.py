@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from agent.dataset.cache import FrameMemo
+from agent.schema.models import AnalysisPlan
+
+
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "1024"))
+
+# planner outputs worth replaying on a hit
+_PLAN_KEYS = ("plan", "confidence", "error")
+
+_schema_signatures = FrameMemo()
+
+
+def _schema_signature(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for col, dtype in df.dtypes.astype(str).items():
+        h.update(f"{col}\x1e{dtype}\x1f".encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+def _canonical_plan(plan: Any) -> str:
+    if plan is None:
+        return ""
+    if hasattr(plan, "model_dump"):
+        plan = plan.model_dump()
+    return json.dumps(plan, sort_keys=True, default=str)
+
+
+class PlanCache:
+    """
+    LRU memo of planner results keyed by
+    (normalized question, column names + dtypes, relevant previous_plan).
+    """
+
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        self.maxsize = int(maxsize)
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, question: str, df: pd.DataFrame, previous_plan: Any = None) -> Tuple[str, str, str]:
+        signature = _schema_signatures.get_or_build(df, _schema_signature)
+        return question.strip().lower(), signature, _canonical_plan(previous_plan)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        out = dict(entry)
+        if out.get("plan") is not None:
+            # hand out a fresh model; callers are free to mutate it
+            out["plan"] = AnalysisPlan(**out["plan"])
+        return out
+
+    def put(self, key: Tuple[str, str, str], state: Dict[str, Any]) -> None:
+        entry = {k: state[k] for k in _PLAN_KEYS if k in state}
+        if hasattr(entry.get("plan"), "model_dump"):
+            entry["plan"] = entry["plan"].model_dump()
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.maxsize,
+            }
+
+
+plan_cache = PlanCache()
@@ -1,48 +1,36 @@
 from __future__ import annotations
 
 import re
-from typing import Optional, Tuple
+from typing import List, Optional
 
 import pandas as pd
-from agent.schema.models import AnalysisPlan
+from agent.core.column_index import column_index_for
+from agent.core.plan_cache import plan_cache
+from agent.schema.models import AnalysisPlan, MetricAgg
 
 
+_META_KEYWORDS = ["how confident", "confidence", "are you confident"]
 
-def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", str(s).strip().lower().replace("_", " "))
+_VIZ_KEYWORDS = [
+    "plot", "chart", "graph", "visualize", "visualization",
+    "bar", "line", "scatter", "hist", "histogram",
+    "growth", "trend", "over time", "time series", "timeseries", "timeline", "increase"
+]
 
+_VOLATILITY_KEYWORDS = ["volatility", "how volatile", "standard deviation", "std"]
 
-def _tokenize(s: str) -> set[str]:
-    return set(re.findall(r"[a-z0-9]+", _norm(s)))
+_TOP_KEYWORDS = ["top", "highest", "largest", "biggest", "best", "rank"]
 
-
-def _score_col_match(question: str, col: str) -> int:
-    """
-    Score how well `col` matches `question`.
-    Higher is better.
-    """
-    qn = _norm(question)
-    cn = _norm(col)
-
-    score = 0
-
-    # Exact phrase present is strongest
-    if cn and cn in qn:
-        score += 100
-
-    # Token overlap (robust to small formatting differences)
-    qt = _tokenize(qn)
-    ct = _tokenize(cn)
-    overlap = len(qt & ct)
-    score += overlap * 10
-
-    # Bonus: common patterns like "by <col>", "of <col>", etc.
-    if re.search(rf"\bby\s+{re.escape(cn)}\b", qn):
-        score += 40
-    if re.search(rf"\bof\s+{re.escape(cn)}\b", qn):
-        score += 20
-
-    return score
+# aggregation words, for questions that ask for several at once
+_AGG_WORDS = [
+    (r"total(?!\s+count)", "sum"), (r"sum", "sum"),
+    (r"average", "mean"), (r"avg", "mean"), (r"mean", "mean"),
+    (r"min", "min"), (r"minimum", "min"),
+    (r"max", "max"), (r"maximum", "max"),
+    (r"std", "std"), (r"standard deviation", "std"), (r"volatility", "std"),
+    (r"count", "count"),
+]
+_AGG_PATTERN = re.compile("|".join(rf"\b(?P<a{i}>{w})\b" for i, (w, _) in enumerate(_AGG_WORDS)))
 
 
 def _best_col_match(
@@ -57,24 +45,12 @@ def _best_col_match(
     - prefer_numeric: only numeric candidates
     - prefer_categorical: only categorical candidates (object/category/bool)
     """
-    candidates = df.columns.tolist()
-
-    if prefer_numeric:
-        candidates = df.select_dtypes(include="number").columns.tolist()
-    elif prefer_categorical:
-        candidates = df.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
-
-    if not candidates:
-        return None
-
-    scored: list[Tuple[int, str]] = []
-    for c in candidates:
-        scored.append((_score_col_match(question, c), c))
-
-    scored.sort(reverse=True, key=lambda x: x[0])
-    best_score, best_col = scored[0]
-
-    return best_col if best_score >= min_score else None
+    return column_index_for(df).best_match(
+        question,
+        prefer_numeric=prefer_numeric,
+        prefer_categorical=prefer_categorical,
+        min_score=min_score,
+    )
 
 
 def _has_word(q: str, word: str) -> bool:
@@ -82,12 +58,12 @@ def _has_word(q: str, word: str) -> bool:
 
 
 def _first_numeric(df: pd.DataFrame) -> Optional[str]:
-    nums = df.select_dtypes(include="number").columns.tolist()
+    nums = column_index_for(df).numeric_columns
     return nums[0] if nums else None
 
 
 def _first_categorical(df: pd.DataFrame) -> Optional[str]:
-    cats = df.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
+    cats = column_index_for(df).categorical_columns
     return cats[0] if cats else None
 
 
@@ -130,6 +106,24 @@ def _guess_metric(question: str, df: pd.DataFrame) -> Optional[str]:
     return _first_numeric(df)
 
 
+def _guess_aggs(q: str) -> List[str]:
+    # distinct aggregations in order of first mention
+    aggs = [_AGG_WORDS[int(m.lastgroup[1:])][1] for m in _AGG_PATTERN.finditer(q)]
+    return list(dict.fromkeys(aggs))
+
+
+def _guess_metrics(question: str, df: pd.DataFrame, exclude: List[str]) -> List[str]:
+    # every numeric column named in the question, else the single best guess
+    metrics = [
+        c for c in column_index_for(df).mentioned(question, prefer_numeric=True)
+        if c not in exclude
+    ]
+    if metrics:
+        return metrics
+    metric = _guess_metric(question, df)
+    return [metric] if metric else []
+
+
 def _guess_date_col(df: pd.DataFrame) -> Optional[str]:
     # name-based first
     for key in ["date", "timestamp", "time", "datetime"]:
@@ -138,16 +132,32 @@ def _guess_date_col(df: pd.DataFrame) -> Optional[str]:
             return c
 
     # dtype-based fallback (if parsed upstream)
-    for col in df.columns:
-        if "datetime" in str(df[col].dtype).lower():
-            return col
+    dates = column_index_for(df).datetime_columns
+    return dates[0] if dates else None
 
-    return None
+
+def _is_data_quality(q: str) -> bool:
+    return (
+        any(k in q for k in ["missing", "null", "empty", "duplicate", "duplicates", "cleaning", "audit", "outlier"])
+        or "dtype" in q
+        or "data type" in q
+        or (_has_word(q, "na") or _has_word(q, "n/a"))
+        or ("column" in q and _has_word(q, "type"))
+    )
+
+
+def _uses_previous_plan(q: str) -> bool:
+    # only the volatility branch reads previous_plan
+    return (
+        not any(k in q for k in _META_KEYWORDS)
+        and not any(k in q for k in _VIZ_KEYWORDS)
+        and any(k in q for k in _VOLATILITY_KEYWORDS)
+    )
 
 
 def planner_node(state: dict) -> dict:
-    question = (state.get("question") or "").strip()
-    q = question.lower()
+    # collapse whitespace so equivalent questions share a plan cache entry
+    question = " ".join((state.get("question") or "").split())
     df: pd.DataFrame | None = state.get("df")
     previous_plan = state.get("previous_plan")
 
@@ -155,18 +165,32 @@ def planner_node(state: dict) -> dict:
         state["error"] = "No dataframe found in state."
         return state
 
+    key = plan_cache.key(
+        question,
+        df,
+        previous_plan if _uses_previous_plan(question.lower()) else None,
+    )
+    cached = plan_cache.get(key)
+    if cached is not None:
+        state.update(cached)
+        return state
+
+    state = _plan_question(state, question, df, previous_plan)
+    plan_cache.put(key, state)
+    return state
+
+
+def _plan_question(state: dict, question: str, df: pd.DataFrame, previous_plan) -> dict:
+    q = question.lower()
+
     # META / CONFIDENCE
-    if any(k in q for k in ["how confident", "confidence", "are you confident"]):
+    if any(k in q for k in _META_KEYWORDS):
         state["plan"] = AnalysisPlan(task_type="data_quality")
         state["confidence"] = 1.0
         return state
 
     # VISUALIZATION / GROWTH / TREND
-    viz_hits = any(k in q for k in [
-        "plot", "chart", "graph", "visualize", "visualization",
-        "bar", "line", "scatter", "hist", "histogram",
-        "growth", "trend", "over time", "time series", "timeseries", "timeline", "increase"
-    ])
+    viz_hits = any(k in q for k in _VIZ_KEYWORDS)
 
     if viz_hits:
         metric = _guess_metric(question, df)
@@ -212,8 +236,26 @@ def planner_node(state: dict) -> dict:
         state["confidence"] = 0.88 if ("growth" in q or "trend" in q) else 0.90
         return state
 
+    # MULTI AGGREGATION: "sum, mean and std of revenue and units by region"
+    # (data quality and top-k questions keep their own routes below)
+    aggs = _guess_aggs(q)
+    if len(aggs) > 1 and not _is_data_quality(q) and not any(k in q for k in _TOP_KEYWORDS):
+        group_by = _guess_group_by(question, df)
+        metrics = _guess_metrics(question, df, exclude=[group_by] if group_by else [])
+
+        state["plan"] = AnalysisPlan(
+            task_type="aggregation",
+            metrics=metrics,
+            group_by=[group_by] if group_by else [],
+            agg=aggs[0],
+            aggregations=[MetricAgg(metric=m, agg=a) for m in metrics for a in aggs],
+            sort_desc=True,
+        )
+        state["confidence"] = 0.86
+        return state
+
     # VOLATILITY / STD
-    if any(k in q for k in ["volatility", "how volatile", "standard deviation", "std"]):
+    if any(k in q for k in _VOLATILITY_KEYWORDS):
         metric = _guess_metric(question, df)
         group_by = _guess_group_by(question, df)
 
@@ -229,6 +271,7 @@ def planner_node(state: dict) -> dict:
 
         plan.task_type = "aggregation"
         plan.agg = "std"
+        plan.aggregations = []
         if metric:
             plan.metrics = [metric]
         if group_by:
@@ -239,20 +282,13 @@ def planner_node(state: dict) -> dict:
         return state
 
     # DATA QUALITY
-    data_quality_hits = (
-        any(k in q for k in ["missing", "null", "empty", "duplicate", "duplicates", "cleaning", "audit", "outlier"])
-        or "dtype" in q
-        or "data type" in q
-        or (_has_word(q, "na") or _has_word(q, "n/a"))
-        or ("column" in q and _has_word(q, "type"))
-    )
-    if data_quality_hits:
+    if _is_data_quality(q):
         state["plan"] = AnalysisPlan(task_type="data_quality")
         state["confidence"] = 1.0
         return state
 
     # TOP-K
-    if any(k in q for k in ["top", "highest", "largest", "biggest", "best", "rank"]):
+    if any(k in q for k in _TOP_KEYWORDS):
         metric = _guess_metric(question, df)
         group_by = _guess_group_by(question, df)
 
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow ships with requirements.txt
+    pa = None
+    pa_csv = None
+
+from agent.dataset.parsing import CSV_NA_VALUES
+
+
+# parser threads for whole-file CSV reads (0 = one per core, 1 = single-threaded)
+CSV_READ_THREADS = int(os.getenv("CSV_READ_THREADS", "0"))
+# bytes each parser thread takes at a time; type inference starts on the first block
+CSV_READ_BLOCK_BYTES = int(os.getenv("CSV_READ_BLOCK_BYTES", str(4 * 1024 ** 2)))
+
+# pandas' booleans; Arrow's defaults would also take 1/0 as booleans
+_TRUE_VALUES = ["True", "TRUE", "true"]
+_FALSE_VALUES = ["False", "FALSE", "false"]
+
+# bytes a numeric field can start after: delimiter, line break, quote, padding
+_FIELD_START = np.frombuffer(b',\r\n" \t', dtype=np.uint8)
+_SIGNED_START = np.frombuffer(b',\r\n" \t+-', dtype=np.uint8)
+_PLUS, _ZERO, _X = ord("+"), ord("0"), ord("x")
+
+# enough rows to see which columns hold dates
+_PROBE_BYTES = 1024 ** 2
+
+# integers past int64 are uint64 or text in pandas, rounded floats in Arrow
+_INT64_LIMIT = 2.0 ** 63
+
+
+def _workers(threads: int) -> int:
+    return threads if threads > 0 else (os.cpu_count() or 1)
+
+
+def _set_threads(threads: int) -> bool:
+    """
+    Size Arrow's (process-wide) CPU pool; returns whether to parse in parallel.
+    """
+    threads = _workers(threads)
+    if threads > 1 and pa.cpu_count() != threads:
+        pa.set_cpu_count(threads)
+    return threads > 1
+
+
+def _block_has_ambiguous_numbers(path: str, start: int, size: int) -> bool:
+    # two bytes of overlap so prefixes split across blocks are still seen
+    lead = min(start, 2)
+    with open(path, "rb") as f:
+        f.seek(start - lead)
+        block = f.read(size + lead)
+    # memchr first: most blocks have neither byte
+    plus = block.find(b"+") >= 0
+    hexish = block.find(b"x") >= 0 or block.find(b"X") >= 0
+    if not (plus or hexish):
+        return False
+    buf = np.frombuffer(block, dtype=np.uint8)
+
+    # "+5": Arrow reads it as a float, pandas as an int
+    if plus:
+        at = np.flatnonzero(buf[1:] == _PLUS) + 1
+        if np.isin(buf[at - 1], _FIELD_START).any():
+            return True
+
+    # "0x1f": Arrow reads it as hex, pandas keeps the text
+    if hexish:
+        at = np.flatnonzero((buf[2:] | 0x20) == _X) + 2
+        at = at[buf[at - 1] == _ZERO]
+        return bool(np.isin(buf[at - 2], _SIGNED_START).any())
+    return False
+
+
+def _has_ambiguous_numbers(path: str, threads: int, block_bytes: int) -> bool:
+    """
+    Whether any field starts with number syntax only one of the two parsers
+    accepts. Scanned in blocks on `threads` threads (numpy releases the GIL).
+    """
+    size = os.path.getsize(path)
+    starts = range(0, size, block_bytes)
+    with ThreadPoolExecutor(max_workers=max(1, min(_workers(threads), len(starts)))) as pool:
+        found = pool.map(lambda s: _block_has_ambiguous_numbers(path, s, block_bytes), starts)
+        return any(found)
+
+
+def _header(path: str) -> List[str]:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _convert_options(columns: Optional[List[str]], text: Iterable[str]) -> "pa_csv.ConvertOptions":
+    return pa_csv.ConvertOptions(
+        include_columns=columns,
+        column_types={col: pa.string() for col in text},
+        null_values=CSV_NA_VALUES,
+        true_values=_TRUE_VALUES,
+        false_values=_FALSE_VALUES,
+        strings_can_be_null=True,
+    )
+
+
+def _read_table(
+    path: str,
+    columns: Optional[List[str]],
+    parallel: bool,
+    block_bytes: int,
+    text: Iterable[str] = (),
+) -> "pa.Table":
+    return pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=parallel, block_size=block_bytes),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=_convert_options(columns, text),
+    )
+
+
+def _temporal_columns(schema: "pa.Schema") -> List[str]:
+    return [field.name for field in schema if pa.types.is_temporal(field.type)]
+
+
+def _head_temporal(path: str, columns: Optional[List[str]], block_bytes: int) -> List[str]:
+    """
+    Columns Arrow infers as dates/times from the head of the file: read as
+    text from the start, so the full read doesn't parse them twice.
+    """
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=False, block_size=min(block_bytes, _PROBE_BYTES)),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=_convert_options(columns, ()),
+    )
+    try:
+        return _temporal_columns(reader.schema)
+    finally:
+        reader.close()
+
+
+def read_csv_arrow(
+    path: str,
+    columns: Optional[List[str]] = None,
+    threads: int = CSV_READ_THREADS,
+    block_bytes: int = CSV_READ_BLOCK_BYTES,
+) -> Optional[pd.DataFrame]:
+    """
+    pd.read_csv(path, usecols=columns) on Arrow's multi-threaded CSV reader:
+    same columns, dtypes and missing values. Floats are correctly rounded
+    (as float_precision="round_trip"), so they can differ from pandas'
+    default parser in the last bit.
+
+    None when the file needs pandas to decide: unreadable by Arrow, no data
+    rows, header names pandas would rename, number syntax the parsers read
+    differently, integers beyond int64. Callers then fall back to pandas.
+    """
+    if pa_csv is None:
+        return None
+    try:
+        parallel = _set_threads(threads)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # the guard scan overlaps with the parse
+            ambiguous = pool.submit(_has_ambiguous_numbers, path, threads, block_bytes)
+            text = _head_temporal(path, columns, block_bytes)
+            table = _read_table(path, columns, parallel, block_bytes, text=text)
+            if ambiguous.result():
+                return None
+
+        names = table.column_names
+        if table.num_rows == 0 or "" in names or len(set(names)) != len(names):
+            return None
+        if any(pa.types.is_binary(t) for t in table.schema.types):
+            return None
+
+        # pandas never parses dates: re-read any the head didn't show as text
+        temporal = _temporal_columns(table.schema)
+        if temporal:
+            late = _read_table(path, temporal, parallel, block_bytes, text=temporal)
+            for col in temporal:
+                table = table.set_column(names.index(col), col, late.column(col))
+        for i, t in enumerate(table.schema.types):
+            if pa.types.is_null(t):
+                # an all-missing column is float64 in pandas
+                table = table.set_column(i, names[i], table.column(i).cast(pa.float64()))
+    except Exception:
+        return None
+
+    df = table.to_pandas(split_blocks=True, use_threads=parallel)
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object:
+            if table.column(col).null_count:
+                # Arrow nulls arrive as None; pandas reads missing values as NaN
+                df[col] = series.where(series.notna(), np.nan)
+        elif series.dtype.kind == "f":
+            values = series.to_numpy()
+            if (np.isfinite(values) & (np.abs(values) >= _INT64_LIMIT)).any():
+                return None
+
+    if columns is not None:
+        # usecols keeps file order
+        wanted = set(columns)
+        df = df[[c for c in _header(path) if c in wanted]]
+    return df
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from agent.dataset.partitions import dataset_files, dataset_root, is_multi_file
+
+
+DATASET_CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+_HASH_BLOCK = 1024 * 1024
+
+
+def _stat_key(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _hash_file(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _frame_nbytes(df: pd.DataFrame) -> int:
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        return 0
+
+
+class FrameMemo:
+    """
+    Side table of derived objects (profiles, indexes, ...) for live DataFrames.
+    Keyed by id(); entries are dropped when the frame is garbage collected.
+    """
+
+    def __init__(self):
+        self._values: Dict[int, Any] = {}
+
+    def get(self, df: pd.DataFrame) -> Optional[Any]:
+        return self._values.get(id(df))
+
+    def set(self, df: pd.DataFrame, value: Any) -> None:
+        key = id(df)
+        if key not in self._values:
+            weakref.finalize(df, self._values.pop, key, None)
+        self._values[key] = value
+
+    def get_or_build(self, df: pd.DataFrame, build: Callable[[pd.DataFrame], Any]) -> Any:
+        value = self.get(df)
+        if value is None:
+            value = build(df)
+            self.set(df, value)
+        return value
+
+
+class DatasetCache:
+    """
+    In-process LRU cache of loaded DataFrames keyed by file content hash.
+
+    - (mtime, size) is checked first so unchanged files are never re-hashed
+    - entries are evicted least-recently-used once `max_bytes` is exceeded
+    - cached frames are shared: callers must treat them as read-only
+    """
+
+    def __init__(self, max_bytes: int = DATASET_CACHE_MAX_BYTES):
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[str, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._fingerprints: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._frame_keys = FrameMemo()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def fingerprint(self, path: str) -> str:
+        """
+        Content hash of `path`, re-hashing only when mtime/size changed.
+        A directory or glob hashes its files' relative paths and hashes.
+        """
+        if is_multi_file(path):
+            return self._fingerprint_files(path)
+        path = os.path.abspath(path)
+        stat = _stat_key(path)
+
+        with self._lock:
+            known = self._fingerprints.get(path)
+        if known and known[0] == stat:
+            return known[1]
+
+        digest = _hash_file(path)
+        with self._lock:
+            self._fingerprints[path] = (stat, digest)
+        return digest
+
+    def _fingerprint_files(self, path: str) -> str:
+        root = dataset_root(path)
+        h = hashlib.blake2b(digest_size=16)
+        for file in dataset_files(path):
+            h.update(os.path.relpath(file, root).encode("utf-8") + b"\0")
+            h.update(self.fingerprint(file).encode("ascii"))
+        return h.hexdigest()
+
+    def get_or_load(
+        self,
+        path: str,
+        loader: Callable[[str], pd.DataFrame],
+        variant: str = "",
+    ) -> pd.DataFrame:
+        """
+        Return the cached frame for `path`, calling `loader(path)` on a miss.
+        `variant` separates frames produced by different loaders for the same file.
+        """
+        key = f"{self.fingerprint(path)}:{variant}"
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        df = loader(path)
+        self._frame_keys.set(df, key)
+        self.put(key, df)
+        return df
+
+    def peek(self, path: str, variant: str = "") -> Optional[pd.DataFrame]:
+        """
+        The cached frame for `path`, or None; never loads.
+        """
+        return self.peek_version(self.fingerprint(path), variant)
+
+    def peek_version(self, fingerprint: str, variant: str = "") -> Optional[pd.DataFrame]:
+        """
+        The cached frame of a given content hash (e.g. an earlier version
+        of a file that has since changed), or None.
+        """
+        key = f"{fingerprint}:{variant}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def key_for(self, df: pd.DataFrame) -> Optional[str]:
+        """
+        "<content hash>:<variant>" of a frame this cache loaded, else None.
+        Stays valid after eviction for as long as the frame is alive.
+        """
+        return self._frame_keys.get(df)
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        nbytes = _frame_nbytes(df)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            # a single frame larger than the budget is never cached
+            if nbytes > self.max_bytes:
+                return
+
+            self._entries[key] = (df, nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+dataset_cache = DatasetCache()
+
+
+def cache_stats() -> Dict[str, Any]:
+    return dataset_cache.stats()
+
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.parsing import parse_numeric
+
+
+# rows inspected per column before deciding its target type
+TYPE_INFERENCE_SAMPLE_ROWS = int(os.getenv("TYPE_INFERENCE_SAMPLE_ROWS", "2000"))
+
+# share of numeric-looking values needed to convert a column
+NUMERIC_RATIO_THRESHOLD = 0.7
+
+# sample ratios this close to the threshold are re-checked on the full column
+_SAMPLE_MARGIN = 0.1
+
+
+def _sample(series: pd.Series, n: int) -> pd.Series:
+    # evenly spaced rows, so sorted or blocky files are still represented
+    if len(series) <= n:
+        return series
+    positions = np.linspace(0, len(series) - 1, num=n).astype(np.int64)
+    return series.iloc[positions]
+
+
+def infer_column_types(df: pd.DataFrame, sample_rows: int = TYPE_INFERENCE_SAMPLE_ROWS) -> Dict[str, str]:
+    """
+    Decide a target type for each object column from a bounded sample:
+      - "numeric": mostly numeric-looking values (the full column confirms it)
+      - "string": everything else
+      - "unsure": sample too close to the threshold to call
+    """
+    decisions: Dict[str, str] = {}
+    for col in df.columns:
+        if df[col].dtype != "object":
+            continue
+
+        sample = _sample(df[col], sample_rows)
+        if len(sample) == 0:
+            decisions[col] = "string"
+            continue
+
+        ratio = float(parse_numeric(sample).notna().mean())
+        if len(sample) == len(df[col]):
+            decisions[col] = "numeric" if ratio >= NUMERIC_RATIO_THRESHOLD else "string"
+        elif ratio >= NUMERIC_RATIO_THRESHOLD + _SAMPLE_MARGIN:
+            decisions[col] = "numeric"
+        elif ratio < NUMERIC_RATIO_THRESHOLD - _SAMPLE_MARGIN:
+            decisions[col] = "string"
+        else:
+            decisions[col] = "unsure"
+    return decisions
+
+
+def auto_type_coerce(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Best-effort type cleanup so plots/aggregation don't explode on "18,000".
+    Only converts object columns that look mostly numeric.
+
+    Types are inferred from a sample first, so clearly textual columns skip
+    the numeric parse. Every other object column is parsed in a single pass
+    and kept as numbers only if the whole column clears
+    NUMERIC_RATIO_THRESHOLD: a column that is numeric at the head and text
+    further down stays text. Untouched columns are shared with `df`.
+    """
+    out = df.copy(deep=False)
+    for col, kind in infer_column_types(df).items():
+        if kind == "string":
+            out[col] = df[col].astype(str)
+            continue
+
+        converted = parse_numeric(df[col])
+        if converted.notna().mean() >= NUMERIC_RATIO_THRESHOLD:
+            out[col] = converted
+        else:
+            out[col] = df[col].astype(str)
+    return out
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.cache import FrameMemo
+from agent.dataset.parsing import infer_date_format, parse_date_values, parse_dates, parse_numeric
+
+
+# (dataset version, column) pairs whose parsed distinct dates are kept
+DATE_CACHE_MAX_COLUMNS = int(os.getenv("DATE_CACHE_MAX_COLUMNS", "256"))
+
+_converted = FrameMemo()
+
+
+def _cached(df: pd.DataFrame, kind: str, col: str, convert: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    columns: Dict[Tuple[str, str], pd.Series] = _converted.get_or_build(df, lambda _: {})
+    series = columns.get((kind, col))
+    if series is None:
+        series = convert(df[col])
+        columns[(kind, col)] = series
+    return series
+
+
+def _parse_datetime(series: pd.Series) -> pd.Series:
+    return parse_dates(series, errors="ignore")
+
+
+def _parse_metric(series: pd.Series) -> pd.Series:
+    parsed = parse_numeric(series)
+    if parsed.dtype.kind == "i" and parsed.dtype != np.int64:
+        # ints narrowed for storage (see dataset.memory) aggregate as int64,
+        # so results keep the dtypes of the unoptimized frame
+        return parsed.astype(np.int64)
+    return parsed
+
+
+class DateDictionary:
+    """
+    Distinct values of one text column of one dataset version and the
+    datetimes they parse to, under the format inferred from the first frame
+    seen. Other frames of that version (projections, filtered rows) map
+    their values through it; only values it has not seen yet are parsed.
+    When those don't fit the format, it is inferred again from all values.
+    """
+
+    def __init__(self):
+        self.format: Optional[str] = None
+        self.values: Optional[pd.Index] = None
+        self.parsed: Optional[pd.DatetimeIndex] = None
+        self.failed = np.zeros(0, dtype=bool)
+        self._lock = threading.Lock()
+
+    def _rebuild(self, values: pd.Index) -> Optional[Tuple[pd.DatetimeIndex, np.ndarray]]:
+        # values the locked format doesn't fit: infer again from every value
+        # known, falling back to per-value inference, and parse them all anew
+        result = None
+        for date_format in dict.fromkeys([infer_date_format(values), None]):
+            result = parse_date_values(values, date_format)
+            if result is None:
+                return None
+            if not result[1].any():
+                break
+        self.format = date_format
+        self.values, (self.parsed, self.failed) = values, result
+        return result
+
+    def _lookup(self, uniques: pd.Index) -> Optional[Tuple[pd.DatetimeIndex, np.ndarray]]:
+        if not len(uniques):
+            return pd.DatetimeIndex([]), self.failed[:0]
+        if self.values is None:
+            self.format = infer_date_format(uniques)
+            positions = np.full(len(uniques), -1)
+        else:
+            positions = self.values.get_indexer(uniques)
+
+        new = uniques[positions < 0]
+        if len(new):
+            result = parse_date_values(new, self.format)
+            if result is None:
+                return None
+            parsed, failed = result
+            if self.values is None:
+                self.values, self.parsed, self.failed = new, parsed, failed
+            elif (self.format is not None and failed.any()) or parsed.dtype != self.parsed.dtype:
+                if self._rebuild(self.values.append(new)) is None:
+                    return None
+            else:
+                self.values = self.values.append(new)
+                self.parsed = self.parsed.append(parsed)
+                self.failed = np.concatenate([self.failed, failed])
+            positions = self.values.get_indexer(uniques)
+        return self.parsed.take(positions), self.failed[positions]
+
+    def parse(self, series: pd.Series) -> pd.Series:
+        """
+        parse_dates(series, errors="ignore") from the dictionary.
+        """
+        if series.dtype.kind in "Mbiufc":
+            return series
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = pd.Index(np.asarray(uniques, dtype=object), dtype=object)
+        with self._lock:
+            result = self._lookup(uniques)
+        if result is None or result[1].any():
+            return series
+        return pd.Series(result[0].array.take(codes, allow_fill=True), index=series.index, name=series.name)
+
+
+_dictionaries: "OrderedDict[Tuple[str, str], DateDictionary]" = OrderedDict()
+_dictionaries_lock = threading.Lock()
+
+
+def _date_dictionary(version: str, col: str) -> DateDictionary:
+    key = (version, col)
+    with _dictionaries_lock:
+        dictionary = _dictionaries.get(key)
+        if dictionary is None:
+            dictionary = DateDictionary()
+            _dictionaries[key] = dictionary
+        _dictionaries.move_to_end(key)
+        while len(_dictionaries) > DATE_CACHE_MAX_COLUMNS:
+            _dictionaries.popitem(last=False)
+    return dictionary
+
+
+def numeric_column(df: pd.DataFrame, col: str) -> pd.Series:
+    """
+    `df[col]` parsed with parse_numeric, computed once per frame.
+    Cached frames are one per dataset version, so this is per version too.
+    Returned series are shared: treat them as read-only.
+    """
+    return _cached(df, "numeric", col, _parse_metric)
+
+
+def datetime_column(df: pd.DataFrame, col: str, version: Optional[str] = None) -> pd.Series:
+    """
+    `df[col]` parsed as datetimes (unchanged if it doesn't parse), computed once per frame.
+
+    With `version` (content hash of the dataset `df` was read from), each
+    distinct value is parsed once per dataset version: projections and
+    filtered rows of it only map their values through the cached dates.
+    """
+    if version is None:
+        return _cached(df, "datetime", col, _parse_datetime)
+    return _cached(df, "datetime", col, _date_dictionary(version, col).parse)
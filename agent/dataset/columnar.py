@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import glob
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pragma: no cover - pyarrow ships with requirements.txt
+    pa = None
+    pa_ipc = None
+
+
+# bump when parsing or coercion rules change so stale stores are ignored
+STORE_VERSION = 6
+
+
+def columnar_path(source_path: str, fingerprint: str, variant: str = "") -> str:
+    """
+    Arrow IPC file that sits next to `source_path` for a given content hash.
+    """
+    tag = f".{variant}" if variant else ""
+    return f"{source_path}{tag}.v{STORE_VERSION}.{fingerprint[:16]}.arrow"
+
+
+def read_columnar(store_path: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Memory-map an Arrow IPC file and convert it (or only `columns`) to pandas.
+    Numeric buffers are shared with the OS page cache across processes.
+    """
+    if pa is None or not os.path.exists(store_path):
+        return None
+    try:
+        with pa.memory_map(store_path, "r") as source:
+            table = pa_ipc.open_file(source).read_all()
+        if columns is not None:
+            # mapping is zero-copy: unselected columns are never paged in
+            table = table.select(columns)
+        return table.to_pandas(split_blocks=True)
+    except Exception:
+        return None
+
+
+def columnar_shape(store_path: str) -> Optional[Tuple[Dict[str, str], int]]:
+    """
+    (pandas dtypes, row count) of an Arrow IPC file, from its schema and
+    batch headers alone; no column is converted.
+    """
+    if pa is None or not os.path.exists(store_path):
+        return None
+    try:
+        with pa.memory_map(store_path, "r") as source:
+            reader = pa_ipc.open_file(source)
+            rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+            dtypes = reader.schema.empty_table().to_pandas().dtypes.astype(str).to_dict()
+        return dtypes, rows
+    except Exception:
+        return None
+
+
+def columnar_metadata(store_path: str) -> Dict[str, str]:
+    """
+    Schema metadata an Arrow IPC file was written with (see write_columnar),
+    without pyarrow's own pandas entry; empty if the file can't be read.
+    """
+    if pa is None or not os.path.exists(store_path):
+        return {}
+    try:
+        with pa.memory_map(store_path, "r") as source:
+            metadata = pa_ipc.open_file(source).schema.metadata or {}
+    except Exception:
+        return {}
+    return {k.decode(): v.decode() for k, v in metadata.items() if k != b"pandas"}
+
+
+def write_columnar(df: pd.DataFrame, store_path: str, metadata: Optional[Dict[str, str]] = None) -> bool:
+    """
+    Write `df` as an uncompressed Arrow IPC file (atomic rename), with
+    `metadata` added to its schema. Returns False if the store could not be
+    written; callers keep the frame.
+    """
+    if pa is None:
+        return False
+
+    directory = os.path.dirname(os.path.abspath(store_path))
+    tmp_path = None
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=None)
+        if metadata:
+            extra = {k.encode(): v.encode() for k, v in metadata.items()}
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), **extra})
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".arrow.tmp")
+        os.close(fd)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, store_path)
+        return True
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def _remove_stale_stores(source_path: str, variant: str, keep: str) -> None:
+    tag = f".{variant}" if variant else ""
+    for stale in glob.glob(f"{glob.escape(source_path)}{tag}.v*.arrow"):
+        if stale != keep:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def load_via_columnar_store(
+    source_path: str,
+    fingerprint: str,
+    loader: Callable[[str], pd.DataFrame],
+    variant: str = "",
+    metadata: Optional[Callable[[pd.DataFrame], Dict[str, str]]] = None,
+) -> pd.DataFrame:
+    """
+    Read the columnar copy of `source_path` if present, otherwise run `loader`
+    (CSV parse + coercion) once and persist its output for later loads, with
+    the schema metadata `metadata` derives from it.
+    """
+    store_path = columnar_path(source_path, fingerprint, variant)
+
+    df = read_columnar(store_path)
+    if df is not None:
+        return df
+
+    df = loader(source_path)
+    if write_columnar(df, store_path, metadata(df) if metadata else None):
+        _remove_stale_stores(source_path, variant, keep=store_path)
+    return df
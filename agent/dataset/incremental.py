@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+from pydantic import BaseModel
+
+from agent.dataset.coercion import NUMERIC_RATIO_THRESHOLD
+from agent.dataset.parsing import parse_numeric
+
+
+# bump when the persisted layout changes
+INGEST_MARK_VERSION = 1
+
+# bytes before the previous end of file that must be unchanged for a growth
+# to count as an append
+APPEND_TAIL_BYTES = int(os.getenv("APPEND_TAIL_BYTES", str(64 * 1024)))
+
+
+class IngestMark(BaseModel):
+    """
+    Where the last load of a CSV as one variant ("raw" or "coerced") ended:
+    the version (content hash) it read,
+    its byte size and row count, and a hash of the bytes just before the end.
+    `previous` / `previous_rows` name the version this one was appended to
+    ("" after a full read), so profiles and aggregates can be carried over.
+    """
+
+    version: str
+    size: int
+    rows: int
+    tail_hash: str
+    previous: str = ""
+    previous_rows: int = 0
+
+
+def ingest_mark_path(source_path: str, variant: str) -> str:
+    # one per file and variant: it links consecutive versions of that variant
+    return f"{source_path}.{variant}.ingest.v{INGEST_MARK_VERSION}.json"
+
+
+def _tail_hash(path: str, size: int) -> str:
+    start = max(0, size - APPEND_TAIL_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(size - start)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def read_ingest_mark(path: str, variant: str) -> Optional[IngestMark]:
+    store_path = ingest_mark_path(path, variant)
+    if not os.path.exists(store_path):
+        return None
+    try:
+        with open(store_path, "r", encoding="utf-8") as f:
+            return IngestMark.model_validate_json(f.read())
+    except Exception:
+        return None
+
+
+def write_ingest_mark(
+    path: str,
+    variant: str,
+    version: str,
+    size: int,
+    rows: int,
+    previous: Optional[IngestMark] = None,
+) -> None:
+    """
+    Record that `rows` rows of the `variant` frame were read from the first
+    `size` bytes of `path` (version `version`), appended to `previous` when
+    given.
+    """
+    tmp_path = None
+    try:
+        mark = IngestMark(
+            version=version,
+            size=size,
+            rows=rows,
+            tail_hash=_tail_hash(path, size),
+            previous=previous.version if previous else "",
+            previous_rows=previous.rows if previous else 0,
+        )
+        store_path = ingest_mark_path(path, variant)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(store_path)), suffix=".json.tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(mark.model_dump_json())
+        os.replace(tmp_path, store_path)
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def appended_offset(path: str, mark: IngestMark) -> Optional[int]:
+    """
+    Byte offset the new records start at when `path` only grew since `mark`
+    (the bytes before the old end are unchanged, and that end closed a
+    record); None for any other change.
+    """
+    try:
+        size = os.path.getsize(path)
+        if mark.size <= 0 or size <= mark.size:
+            return None
+        with open(path, "rb") as f:
+            f.seek(mark.size - 1)
+            if f.read(1) != b"\n":
+                return None
+        if _tail_hash(path, mark.size) != mark.tail_hash:
+            return None
+    except OSError:
+        return None
+    return mark.size
+
+
+def read_appended(
+    path: str, offset: int, read: Callable[[str], pd.DataFrame]
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Raw records from byte `offset` to the end of `path`, parsed by `read`
+    (the reader of the full load) under the file's header line, and the
+    offset the read ended at.
+    """
+    tmp_path = None
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(offset)
+        data = f.read()
+    try:
+        fd, tmp_path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(data)
+        raw = read(tmp_path)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return raw, offset + len(data)
+
+
+def _append(base: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    # appended rows continue the positional labels of the file
+    new.index = pd.RangeIndex(len(base), len(base) + len(new))
+    return pd.concat([base, new])
+
+
+def extend_raw(base: pd.DataFrame, raw: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    `base` (read_raw of the previous version) followed by the appended `raw`
+    rows, or None when reading the whole file could type a column differently.
+    """
+    if list(raw.columns) != list(base.columns):
+        return None
+    for col in base.columns:
+        old, new = base[col].dtype, raw[col].dtype
+        if old == new or (old.kind in "iuf" and new.kind in "iuf"):
+            continue
+        if old == object and raw[col].isna().all():
+            continue
+        return None
+    return _append(base, raw.copy())
+
+
+def extend_coerced(base: pd.DataFrame, raw: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    `base` (auto_type_coerce of the previous version) followed by the
+    appended `raw` rows typed the same way, or None when coercing the whole
+    file could decide a column differently: a number column gains text, or
+    a text column gains enough numbers to cross NUMERIC_RATIO_THRESHOLD.
+    Categoricals and narrowed ints of an optimized `base` come back as str
+    objects and wider numbers, for optimize_memory to decide again.
+    """
+    if list(raw.columns) != list(base.columns):
+        return None
+    typed = {}
+    for col in base.columns:
+        old, new = base[col], raw[col]
+        if old.dtype == object or isinstance(old.dtype, pd.CategoricalDtype):
+            if new.dtype.kind == "f" and new.notna().any():
+                # 3.0 here may be "3" in the file; only a full read can tell
+                return None
+            numeric = int(parse_numeric(new).notna().sum())
+            if numeric:
+                total = int(parse_numeric(old).notna().sum()) + numeric
+                if total / (len(old) + len(new)) >= NUMERIC_RATIO_THRESHOLD:
+                    return None
+            new = new.astype(str)
+        elif new.dtype == object:
+            parsed = parse_numeric(new)
+            if (parsed.isna() & new.notna()).any():
+                return None
+            new = parsed
+        elif (old.dtype.kind == "b") != (new.dtype.kind == "b") or new.dtype.kind not in "biuf":
+            return None
+        typed[col] = new
+    return _append(base, pd.DataFrame(typed, index=raw.index, columns=list(base.columns)))
@@ -0,0 +1,702 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.arrow_csv import read_csv_arrow
+from agent.dataset.cache import dataset_cache
+from agent.dataset.coercion import NUMERIC_RATIO_THRESHOLD, auto_type_coerce
+from agent.dataset.columnar import (
+    columnar_metadata,
+    columnar_path,
+    columnar_shape,
+    load_via_columnar_store,
+    read_columnar,
+)
+from agent.dataset.incremental import (
+    appended_offset,
+    extend_coerced,
+    extend_raw,
+    read_appended,
+    read_ingest_mark,
+    write_ingest_mark,
+)
+from agent.dataset.memory import footprint_metadata, optimize_memory, restore_footprint
+from agent.dataset.parsing import parse_numeric
+from agent.dataset.partitions import (
+    PartitionedDataset,
+    dataset_bytes,
+    dataset_files,
+    dataset_root,
+    is_multi_file,
+    partition_values,
+)
+
+
+# files at or above this size are planned on a sample and aggregated in chunks
+CHUNKED_EXECUTION_MIN_BYTES = int(os.getenv("CHUNKED_EXECUTION_MIN_BYTES", str(1024 ** 3)))
+CHUNK_ROWS = int(os.getenv("CHUNKED_EXECUTION_CHUNK_ROWS", "250000"))
+SAMPLE_ROWS = int(os.getenv("DATASET_SAMPLE_ROWS", "10000"))
+# threads loading the files of a directory/glob dataset (0 = one per core)
+DATASET_LOAD_WORKERS = int(os.getenv("DATASET_LOAD_WORKERS", "0"))
+
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+
+
+def is_parquet(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in PARQUET_SUFFIXES
+
+
+def _map_files(fn: Callable[[Any], Any], items: Sequence[Any]) -> List[Any]:
+    # file reads spend their time in Arrow/pandas parsers that release the GIL
+    workers = DATASET_LOAD_WORKERS if DATASET_LOAD_WORKERS > 0 else (os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as pool:
+        return list(pool.map(fn, items))
+
+
+def file_columns(path: str) -> List[str]:
+    """
+    Column names of one CSV/Parquet file, from its header or footer.
+    """
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        return list(pq.read_schema(path).empty_table().to_pandas().columns)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_raw(
+    path: str,
+    columns: Optional[List[str]] = None,
+    nrows: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Read CSV/Parquet without any type cleanup. A directory or glob reads
+    every file (see _read_raw_files).
+    """
+    if is_multi_file(path):
+        return _read_raw_files(path, columns=columns, nrows=nrows)
+    if is_parquet(path):
+        if nrows is None:
+            return pd.read_parquet(path, columns=columns)
+        return next(iter_raw_chunks(path, columns=columns, chunk_rows=nrows), pd.DataFrame())
+    if nrows is None:
+        # whole files parse on all cores; pandas covers what Arrow can't match
+        df = read_csv_arrow(path, columns=columns)
+        if df is not None:
+            return df
+    return pd.read_csv(path, usecols=columns, nrows=nrows)
+
+
+def _read_raw_files(
+    path: str,
+    columns: Optional[List[str]] = None,
+    nrows: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Raw rows of the files of a directory/glob dataset (the first `nrows`
+    when given), each with its partition values as text columns; columns a
+    file lacks are missing values.
+    """
+    files = dataset_files(path)
+    if not files:
+        raise FileNotFoundError(f"No CSV or Parquet files found at {path}")
+    root = dataset_root(path)
+    wanted = None if columns is None else set(columns)
+
+    def read(file: str, limit: Optional[int] = None) -> pd.DataFrame:
+        own = None if wanted is None else [c for c in file_columns(file) if c in wanted]
+        frame = read_raw(file, columns=own, nrows=limit)
+        for key, value in partition_values(root, file).items():
+            if key not in frame.columns and (wanted is None or key in wanted):
+                frame[key] = value
+        return frame
+
+    if nrows is None:
+        frames = _map_files(read, files)
+    else:
+        frames, rows = [], 0
+        for file in files:
+            frames.append(read(file, nrows - rows))
+            rows += len(frames[-1])
+            if rows >= nrows:
+                break
+    return pd.concat(frames, ignore_index=True)
+
+
+def iter_raw_chunks(
+    path: str,
+    columns: Optional[List[str]] = None,
+    chunk_rows: int = CHUNK_ROWS,
+    row_groups: Optional[List[int]] = None,
+    offsets: Optional[List[int]] = None,
+    files: Optional[List[int]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield bounded-size raw chunks of a CSV/Parquet file: of Parquet, only
+    `row_groups` when given; of a CSV, only the `chunk_rows`-record chunks
+    starting at byte `offsets` when given (see zone_maps). A directory/glob
+    dataset streams its files in order, only those numbered in `files` when
+    given, with partition values filled in.
+    """
+    if is_multi_file(path):
+        yield from _iter_partitioned_chunks(partitioned_dataset(path), columns, chunk_rows, files)
+        return
+
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(
+            batch_size=chunk_rows, row_groups=row_groups, columns=columns
+        )
+        for batch in batches:
+            yield batch.to_pandas()
+        return
+
+    if offsets is not None:
+        names = list(pd.read_csv(path, nrows=0).columns)
+        with open(path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield pd.read_csv(f, header=None, names=names, usecols=columns, nrows=chunk_rows)
+        return
+
+    with pd.read_csv(path, usecols=columns, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _iter_partitioned_chunks(
+    dataset: PartitionedDataset,
+    columns: Optional[List[str]],
+    chunk_rows: int,
+    files: Optional[List[int]],
+) -> Iterator[pd.DataFrame]:
+    columns = dataset.columns if columns is None else columns
+    for i in range(len(dataset.files)) if files is None else files:
+        own = [c for c in columns if c in dataset.file_dtypes[i]]
+        # a file with none of the columns still contributes its rows
+        read = own or list(dataset.file_dtypes[i])[:1]
+        for chunk in iter_raw_chunks(dataset.files[i], columns=read, chunk_rows=chunk_rows):
+            for col in columns:
+                if col in dataset.partitions.columns:
+                    chunk[col] = dataset.partition_value(i, col)
+                elif col not in chunk.columns:
+                    chunk[col] = np.nan
+            yield chunk[columns]
+
+
+def align_chunk_types(
+    chunk: pd.DataFrame,
+    sample_dtypes: Dict[str, str],
+    numeric: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Give raw chunk columns the types the sample has, so every chunk groups,
+    aggregates and profiles the same way the in-memory frame would. The
+    sample is typed as the whole file (see load_schema_sample), so a chunk
+    whose values differ from the head still converts as in a full load.
+    Columns in `numeric` are always parsed as numbers.
+
+    Raises ValueError when a chunk holds values its column's type can't,
+    rather than turning them into missing values.
+    """
+    numeric = set(numeric)
+    for col in chunk.columns:
+        dtype = sample_dtypes.get(col)
+        if col in numeric:
+            chunk[col] = parse_numeric(chunk[col])
+            continue
+        if dtype in ("object", "category"):
+            chunk[col] = chunk[col].astype(str)
+            continue
+        series = chunk[col]
+        if series.dtype == object:
+            series = parse_numeric(series)
+        if dtype is not None and str(series.dtype) != dtype:
+            try:
+                series = series.astype(dtype)
+            except (ValueError, TypeError) as e:
+                raise ValueError(
+                    f"Column '{col}' holds values its whole-file type {dtype} can't represent."
+                ) from e
+        chunk[col] = series
+    return chunk
+
+
+# content hash -> dtypes auto_type_coerce gives the columns of a whole CSV
+_streamed_dtypes: Dict[str, Dict[str, str]] = {}
+
+
+class _ColumnTally:
+    """
+    What one streaming pass needs to know about a raw column to type it as
+    auto_type_coerce types the whole column.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.missing = 0
+        self.numeric = 0
+        self.kinds: set = set()
+        self.all_int = True
+
+    def add(self, series: pd.Series) -> None:
+        missing = int(series.isna().sum())
+        self.rows += len(series)
+        self.missing += missing
+        if missing == len(series):
+            # all-missing chunks read as float64 and fit any column type
+            return
+        kind = series.dtype.kind
+        self.kinds.add(kind if kind in "biuf" else "O")
+        if kind == "b":
+            # "True" in a text column doesn't parse as a number
+            return
+        parsed = parse_numeric(series)
+        self.numeric += int(parsed.notna().sum())
+        self.all_int = self.all_int and parsed.dtype.kind == "i"
+
+    def dtype(self) -> str:
+        if not self.kinds:
+            return "float64"
+        if "O" in self.kinds or ("b" in self.kinds and len(self.kinds) > 1):
+            # one text column in a full read: converted if mostly numbers
+            if self.numeric / self.rows >= NUMERIC_RATIO_THRESHOLD:
+                return "int64" if self.all_int and self.numeric == self.rows else "float64"
+            return "object"
+        if self.kinds == {"b"}:
+            # booleans with missing values read as text
+            return "bool" if self.missing == 0 else "object"
+        return "int64" if self.kinds == {"i"} and self.missing == 0 else "float64"
+
+
+def streamed_coerced_dtypes(path: str, chunk_rows: int = CHUNK_ROWS) -> Dict[str, str]:
+    """
+    dtypes auto_type_coerce(read_raw(path)) gives each column of a CSV too
+    large to load, from one streaming pass (once per file version): a
+    column is text if any chunk holds text and fewer than
+    NUMERIC_RATIO_THRESHOLD of all its values parse as numbers.
+    """
+    fingerprint = dataset_cache.fingerprint(path)
+    dtypes = _streamed_dtypes.get(fingerprint)
+    if dtypes is None:
+        tallies: Dict[str, _ColumnTally] = {}
+        for chunk in iter_raw_chunks(path, chunk_rows=chunk_rows):
+            for col in chunk.columns:
+                tallies.setdefault(col, _ColumnTally()).add(chunk[col])
+        dtypes = {col: tally.dtype() for col, tally in tallies.items()}
+        _streamed_dtypes[fingerprint] = dtypes
+    return dtypes
+
+
+# content hash of a directory/glob dataset -> its files and reconciled schema
+_partitioned: Dict[str, PartitionedDataset] = {}
+
+
+def _file_shape(path: str) -> Tuple[Dict[str, str], int]:
+    """
+    dtypes and row count of load_dataset_frame(path), from the Parquet footer
+    or the CSV's Arrow store when they tell; otherwise the file is loaded
+    (which writes the store for later reads).
+    """
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        dtypes = parquet_column_dtypes(path, file_columns(path))
+        if dtypes is not None:
+            return dtypes, pf.metadata.num_rows
+    else:
+        store = columnar_path(path, dataset_cache.fingerprint(path), variant="coerced")
+        shape = columnar_shape(store)
+        if shape is not None:
+            return shape
+    df = load_dataset_frame(path)
+    return df.dtypes.astype(str).to_dict(), len(df)
+
+
+def partitioned_dataset(path: str) -> PartitionedDataset:
+    """
+    Files, partition values and reconciled schema of a directory/glob
+    dataset. Built once per dataset version, inspecting files in parallel;
+    schema drift between files is settled here, not per query.
+    """
+    fingerprint = dataset_cache.fingerprint(path)
+    dataset = _partitioned.get(fingerprint)
+    if dataset is None:
+        files = dataset_files(path)
+        if not files:
+            raise FileNotFoundError(f"No CSV or Parquet files found at {path}")
+        shapes = _map_files(_file_shape, files)
+        dataset = PartitionedDataset(
+            dataset_root(path),
+            files,
+            rows=[rows for _, rows in shapes],
+            file_dtypes=[dtypes for dtypes, _ in shapes],
+        )
+        _partitioned[fingerprint] = dataset
+    return dataset
+
+
+def _load_partitioned(
+    path: str,
+    columns: Optional[List[str]] = None,
+    files: Optional[List[int]] = None,
+) -> pd.DataFrame:
+    """
+    `columns` (default: all) of a directory/glob dataset, reading the files
+    numbered in `files` (default: all) concurrently. Each file is loaded
+    and cached on its own, so files shared by overlapping globs, or reloaded
+    after another file changed, are not parsed again.
+    """
+    dataset = partitioned_dataset(path)
+    columns = dataset.columns if columns is None else columns
+    picked = list(range(len(dataset.files))) if files is None else files
+
+    def load(i: int) -> pd.DataFrame:
+        own = [c for c in columns if c in dataset.file_dtypes[i]]
+        if not own:
+            frame = None
+        elif len(own) == len(dataset.file_dtypes[i]):
+            frame = load_dataset_frame(dataset.files[i])
+        else:
+            frame = load_dataset_columns(dataset.files[i], own)
+        return dataset.conform(frame, i, columns)
+
+    return pd.concat(_map_files(load, picked))
+
+
+def _sample_partitioned(path: str, nrows: int) -> pd.DataFrame:
+    # the first `nrows` rows across files, typed by the reconciled schema
+    dataset = partitioned_dataset(path)
+    frames, rows = [], 0
+    for i, file in enumerate(dataset.files):
+        frame = load_schema_sample(file, nrows).head(nrows - rows)
+        frames.append(dataset.conform(frame, i, dataset.columns))
+        rows += len(frame)
+        if rows >= nrows:
+            break
+    return pd.concat(frames)
+
+
+def load_coerced(path: str) -> pd.DataFrame:
+    return auto_type_coerce(read_raw(path))
+
+
+def _load_appendable(
+    path: str,
+    variant: str,
+    load_full: Callable[[str], pd.DataFrame],
+    extend: Callable[[pd.DataFrame, pd.DataFrame], Optional[pd.DataFrame]],
+) -> pd.DataFrame:
+    """
+    `load_full(path)` of a CSV, unless it only grew since its last load:
+    then the previous version's `variant` frame (cached, or its Arrow store)
+    is extended with the appended rows alone, parsed by read_raw as a full
+    load parses them (see dataset.incremental). Either way the load is
+    recorded in the `variant`'s ingest mark for the next one.
+    """
+    fingerprint = dataset_cache.fingerprint(path)
+    mark = read_ingest_mark(path, variant)
+    offset = appended_offset(path, mark) if mark is not None else None
+    if offset is not None:
+        base = dataset_cache.peek_version(mark.version, variant)
+        if base is None and variant == "coerced":
+            base = read_columnar(columnar_path(path, mark.version, variant=variant))
+        if base is not None and len(base) == mark.rows:
+            try:
+                raw, end = read_appended(path, offset, read_raw)
+                df = extend(base, raw)
+            except (OSError, ValueError, pd.errors.ParserError):
+                df = None
+            if df is not None:
+                write_ingest_mark(path, variant, fingerprint, end, len(df), previous=mark)
+                return df
+
+    size = os.path.getsize(path)
+    df = load_full(path)
+    # keep the lineage of a version that was itself an append; a file
+    # that grew during the read has no known end
+    if (mark is None or mark.version != fingerprint) and os.path.getsize(path) == size:
+        write_ingest_mark(path, variant, fingerprint, size, len(df))
+    return df
+
+
+def _load_via_store(path: str) -> pd.DataFrame:
+    if is_multi_file(path):
+        # every file keeps its own Arrow store
+        return optimize_memory(_load_partitioned(path))
+    if is_parquet(path):
+        return optimize_memory(load_coerced(path))
+    # parse + coerce + optimize once; later loads memory-map the Arrow copy
+    # next to the CSV (categoricals are stored dictionary-encoded)
+    fingerprint = dataset_cache.fingerprint(path)
+    df = load_via_columnar_store(
+        path,
+        fingerprint,
+        lambda p: optimize_memory(_load_appendable(p, "coerced", load_coerced, extend_coerced)),
+        variant="coerced",
+        metadata=footprint_metadata,
+    )
+    restore_footprint(df, columnar_metadata(columnar_path(path, fingerprint, variant="coerced")))
+    return df
+
+
+def _load_raw(path: str) -> pd.DataFrame:
+    if is_multi_file(path) or is_parquet(path):
+        return read_raw(path)
+    return _load_appendable(path, "raw", read_raw, extend_raw)
+
+
+def load_raw_frame(path: str) -> pd.DataFrame:
+    """
+    read_raw(path), cached in-process; a CSV that only grew since its last
+    load is extended with the new rows instead of read again.
+    """
+    return dataset_cache.get_or_load(path, _load_raw, variant="raw")
+
+
+def load_dataset_frame(path: str) -> pd.DataFrame:
+    """
+    Full, type-coerced dataset (cached in-process and on disk), with
+    low-cardinality text as categoricals and ints narrowed (see
+    dataset.memory).
+    """
+    return dataset_cache.get_or_load(path, _load_via_store, variant="coerced")
+
+
+# (content hash, column) -> dtype the column has in load_dataset_frame
+_parquet_dtypes: Dict[Tuple[str, str], str] = {}
+
+
+def parquet_column_dtypes(path: str, columns: List[str]) -> Optional[Dict[str, str]]:
+    """
+    The dtypes `columns` of a Parquet file have in load_dataset_frame(path),
+    without loading it. Numeric and timestamp dtypes come from the footer
+    (integers with nulls anywhere become float64); text columns are read
+    whole once, since coercion decides their type from every value.
+    None when a column's dtype depends on which rows are read (categoricals,
+    missing null counts).
+    """
+    import pyarrow.parquet as pq
+
+    fingerprint = dataset_cache.fingerprint(path)
+    out: Dict[str, str] = {}
+    undecided: List[str] = []
+    pf = None
+    for col in columns:
+        known = _parquet_dtypes.get((fingerprint, col))
+        if known is not None:
+            out[col] = known
+            continue
+        if pf is None:
+            pf = pq.ParquetFile(path)
+            meta = pf.metadata
+            leaves = {meta.schema.column(j).path: j for j in range(meta.num_columns)}
+            empty = pf.schema_arrow.empty_table().to_pandas()
+        if col not in leaves or col not in empty.columns:
+            return None
+        dtype = empty[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            return None
+        if isinstance(dtype, np.dtype) and dtype.kind in "iub":
+            j = leaves[col]
+            stats = [meta.row_group(g).column(j).statistics for g in range(meta.num_row_groups)]
+            if any(st is None or not st.has_null_count for st in stats):
+                return None
+            if sum(st.null_count for st in stats):
+                # numpy ints and bools can't hold nulls
+                dtype = np.dtype("float64") if dtype.kind in "iu" else np.dtype("object")
+        if dtype == object:
+            undecided.append(col)
+        else:
+            out[col] = str(dtype)
+
+    if undecided:
+        coerced = auto_type_coerce(pd.read_parquet(path, columns=undecided))
+        out.update({col: str(coerced[col].dtype) for col in undecided})
+    for col in columns:
+        _parquet_dtypes[(fingerprint, col)] = out[col]
+    return {col: out[col] for col in columns}
+
+
+def _read_row_groups(path: str, columns: List[str], row_groups: List[int]) -> pd.DataFrame:
+    """
+    `columns` of the given row groups, typed and labelled as the same rows
+    of load_dataset_frame(path).
+    """
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    dtypes = parquet_column_dtypes(path, columns)
+    raw = pf.read_row_groups(row_groups, columns=columns, use_pandas_metadata=True).to_pandas()
+
+    index_columns = (pf.schema_arrow.pandas_metadata or {}).get("index_columns", [])
+    if not any(isinstance(c, str) for c in index_columns):
+        # range index (or none): label rows by their position in the file
+        meta = pf.metadata
+        sizes = [meta.row_group(g).num_rows for g in range(meta.num_row_groups)]
+        starts = np.concatenate(([0], np.cumsum(sizes)))
+        positions = np.concatenate([np.arange(starts[g], starts[g + 1]) for g in row_groups])
+        rng = index_columns[0] if index_columns else {"start": 0, "step": 1}
+        raw.index = pd.Index(rng["start"] + rng["step"] * positions)
+
+    return _typed_as(raw[columns], dtypes)
+
+
+def _typed_as(raw: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Raw rows converted value by value to the dtypes coercion (and
+    optimize_memory) chose for their whole columns.
+    """
+    out = raw.copy(deep=False)
+    for col in raw.columns:
+        series, dtype = raw[col], dtypes[col]
+        # same per-value conversion auto_type_coerce chose for the whole column
+        if dtype in ("object", "category"):
+            series = series.astype(str)
+        elif series.dtype == object:
+            series = parse_numeric(series)
+        if str(series.dtype) != dtype:
+            series = series.astype(dtype)
+        out[col] = series
+    return out
+
+
+def load_dataset_columns(
+    path: str,
+    columns: List[str],
+    row_groups: Optional[List[int]] = None,
+    files: Optional[List[int]] = None,
+) -> pd.DataFrame:
+    """
+    Type-coerced frame of only `columns`, equal to load_dataset_frame(path)[columns]
+    (coercion decides each column on its own values).
+
+    A cached full frame or its Arrow store is sliced; otherwise only these
+    columns are read (usecols / Parquet column selection) and coerced.
+    With Parquet `row_groups` (see parquet_column_dtypes) only the rows of
+    those groups are read, keeping their full-frame labels; likewise with
+    the `files` of a directory/glob dataset (see partitioned_dataset).
+    """
+    if files is not None:
+        return dataset_cache.get_or_load(
+            path,
+            lambda p: _load_partitioned(p, columns, files),
+            variant="coerced:" + "\x1f".join(columns) + ":files:" + ",".join(map(str, files)),
+        )
+    if row_groups is not None:
+        return dataset_cache.get_or_load(
+            path,
+            lambda p: _read_row_groups(p, columns, row_groups),
+            variant="coerced:" + "\x1f".join(columns) + ":groups:" + ",".join(map(str, row_groups)),
+        )
+
+    full = dataset_cache.peek(path, variant="coerced")
+    if full is not None:
+        return full[columns]
+
+    def load(p: str) -> pd.DataFrame:
+        if is_multi_file(p):
+            return optimize_memory(_load_partitioned(p, columns))
+        if not is_parquet(p):
+            store = columnar_path(p, dataset_cache.fingerprint(p), variant="coerced")
+            df = read_columnar(store, columns=columns)
+            if df is not None:
+                restore_footprint(df, columnar_metadata(store))
+                return df
+        # usecols keeps file order; callers index by name
+        return optimize_memory(auto_type_coerce(read_raw(p, columns=columns))[columns])
+
+    return dataset_cache.get_or_load(path, load, variant="coerced:" + "\x1f".join(columns))
+
+
+def coerced_dtypes(path: str) -> Optional[Dict[str, str]]:
+    """
+    dtypes of load_dataset_frame(path) without loading it: from a CSV's
+    Arrow store, the Parquet footer (see parquet_column_dtypes) or the
+    reconciled schema of a directory/glob dataset. None when only a full
+    load can tell.
+    """
+    if is_multi_file(path):
+        return dict(partitioned_dataset(path).dtypes)
+    if is_parquet(path):
+        return parquet_column_dtypes(path, file_columns(path))
+    shape = columnar_shape(columnar_path(path, dataset_cache.fingerprint(path), variant="coerced"))
+    return shape[0] if shape is not None else None
+
+
+def load_planning_sample(path: str, nrows: int = SAMPLE_ROWS) -> Optional[pd.DataFrame]:
+    """
+    Head of the dataset typed as load_dataset_frame(path) types its columns,
+    so plans made against it hold for the whole file; None when those types
+    aren't known without loading the file (see coerced_dtypes).
+    """
+    if is_multi_file(path):
+        # conformed to the schema reconciled from every file
+        return load_schema_sample(path, nrows)
+
+    variant = f"planning:{nrows}"
+    df = dataset_cache.peek(path, variant=variant)
+    if df is not None:
+        return df
+    dtypes = coerced_dtypes(path)
+    if dtypes is None:
+        return None
+
+    def load(p: str) -> pd.DataFrame:
+        raw = read_raw(p, nrows=nrows)
+        if set(raw.columns) != set(dtypes):
+            raise ValueError("header differs from the stored schema")
+        return _typed_as(raw, dtypes)
+
+    try:
+        return dataset_cache.get_or_load(path, load, variant=variant)
+    except (ValueError, TypeError):
+        # a value the head can't hold in the whole file's dtype
+        return None
+
+
+def load_schema_sample(path: str, nrows: int = SAMPLE_ROWS) -> pd.DataFrame:
+    """
+    Type-coerced head of the dataset, used to plan against files too large
+    to load, typed as the whole file: from its stored schema when there is
+    one (load_planning_sample), else from a streaming pass over a CSV
+    (streamed_coerced_dtypes). A Parquet head is coerced on its own.
+    """
+    if is_multi_file(path):
+        return dataset_cache.get_or_load(
+            path, lambda p: _sample_partitioned(p, nrows), variant=f"sample:{nrows}"
+        )
+    planning = load_planning_sample(path, nrows)
+    if planning is not None:
+        return planning
+    if is_parquet(path):
+        return dataset_cache.get_or_load(
+            path,
+            lambda p: auto_type_coerce(read_raw(p, nrows=nrows)),
+            variant=f"sample:{nrows}",
+        )
+    # a head coerced on its own can type a column differently from the
+    # file; chunks are typed like this sample, so it takes whole-file types
+    return dataset_cache.get_or_load(
+        path,
+        lambda p: _typed_as(read_raw(p, nrows=nrows), streamed_coerced_dtypes(p)),
+        variant=f"sample:{nrows}",
+    )
+
+
+def choose_execution_mode(path: str) -> str:
+    """
+    "chunked" for datasets above CHUNKED_EXECUTION_MIN_BYTES, else "in_memory".
+    """
+    try:
+        size = dataset_bytes(path)
+    except OSError:
+        return "in_memory"
+    return "chunked" if size >= CHUNKED_EXECUTION_MIN_BYTES else "in_memory"
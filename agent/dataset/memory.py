@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from agent.dataset.cache import FrameMemo
+
+
+# text columns with at most this share of distinct values become categoricals
+# (0 keeps every text column as str objects)
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("CATEGORY_MAX_UNIQUE_RATIO", "0.5"))
+
+
+class MemoryFootprint(BaseModel):
+    """
+    Bytes a loaded frame takes as coercion typed it and after optimize_memory,
+    with the dtype each optimized column was given and the one it had before
+    (what users are shown; the narrowed dtypes are a storage detail).
+    """
+
+    before_bytes: int
+    after_bytes: int
+    columns: Dict[str, str] = Field(default_factory=dict)
+    logical: Dict[str, str] = Field(default_factory=dict)
+
+    def to_schema(self) -> Dict[str, object]:
+        saved = self.before_bytes - self.after_bytes
+        return {
+            "before_bytes": self.before_bytes,
+            "after_bytes": self.after_bytes,
+            "saved_pct": round(100.0 * saved / self.before_bytes, 2) if self.before_bytes else 0.0,
+            "optimized_columns": self.columns,
+        }
+
+
+_footprints = FrameMemo()
+
+# Arrow schema metadata key holding the logical dtypes of an optimized store
+LOGICAL_DTYPES_KEY = "logical_dtypes"
+
+
+def _nbytes(series: pd.Series) -> int:
+    return int(series.memory_usage(index=False, deep=True))
+
+
+def _as_category(series: pd.Series) -> Optional[pd.Series]:
+    if len(series) == 0:
+        return None
+    try:
+        category = series.astype("category")
+    except TypeError:
+        return None
+    if len(category.cat.categories) > CATEGORY_MAX_UNIQUE_RATIO * len(series):
+        return None
+    return category
+
+
+def _downcast(series: pd.Series) -> Optional[pd.Series]:
+    kind = series.dtype.kind
+    if kind == "f":
+        # float32 would be exact to store but not to sum (reductions
+        # accumulate in the storage dtype); whole numbers become ints
+        values = series.to_numpy()
+        if not len(values) or not np.isfinite(values).all() or (values != np.round(values)).any():
+            return None
+        if np.abs(values).max() >= 2 ** 53:
+            return None
+    elif kind != "i":
+        return None
+    narrow = pd.to_numeric(series, downcast="integer")
+    return narrow if narrow.dtype != series.dtype else None
+
+
+def optimize_memory(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Losslessly smaller copy of a type-coerced frame: text columns with few
+    distinct values become categoricals (dictionary-encoded in its Arrow
+    store), integers and whole-number floats the narrowest integer dtype
+    holding every value. Untouched columns are shared with `df`; the
+    before/after footprint is kept for memory_footprint().
+    """
+    out = df.copy(deep=False)
+    before = after = 0
+    changed: Dict[str, str] = {}
+    logical: Dict[str, str] = {}
+    for col in df.columns:
+        series = df[col]
+        size = _nbytes(series)
+        before += size
+        if series.dtype == object:
+            optimized = _as_category(series)
+        else:
+            optimized = _downcast(series)
+        if optimized is None:
+            after += size
+            continue
+        out[col] = optimized
+        after += _nbytes(optimized)
+        changed[col] = str(optimized.dtype)
+        logical[col] = str(series.dtype)
+    _footprints.set(
+        out, MemoryFootprint(before_bytes=before, after_bytes=after, columns=changed, logical=logical)
+    )
+    return out
+
+
+def _coerced_nbytes(series: pd.Series) -> int:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # one str object per cell, as astype(str) left them
+        counts = np.bincount(series.cat.codes.to_numpy() + 1, minlength=len(series.cat.categories) + 1)
+        sizes = [sys.getsizeof(c) for c in series.cat.categories]
+        return 8 * len(series) + int(np.dot(counts[1:], sizes))
+    if series.dtype.kind in "iu":
+        return 8 * len(series)
+    return _nbytes(series)
+
+
+def _storage_logical(dtype: str) -> Optional[str]:
+    # the coerced dtype an optimized dtype stands for when nothing recorded
+    # it: categoricals held str objects, narrow ints were int64
+    if dtype == "category":
+        return "object"
+    if dtype in ("int8", "int16", "int32"):
+        return "int64"
+    return None
+
+
+def logical_dtype(col: str, dtype: str, footprint: Optional[MemoryFootprint] = None) -> str:
+    """
+    The dtype coercion gave `col` before optimize_memory narrowed it to
+    `dtype`; `dtype` itself for columns that were never narrowed.
+    """
+    if footprint is not None and col in footprint.logical:
+        return footprint.logical[col]
+    return _storage_logical(dtype) or dtype
+
+
+def logical_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Column dtypes of `df` as reported to users: int8 and category columns of
+    an optimized frame (or a sample typed like one) show as int64/object,
+    whole-number floats as the float64 they were loaded as.
+    """
+    footprint = memory_footprint(df)
+    return {col: logical_dtype(col, str(dtype), footprint) for col, dtype in df.dtypes.items()}
+
+
+def footprint_metadata(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Arrow schema metadata for the store of an optimized frame, so a later
+    process reading it back knows the dtypes its columns were narrowed from.
+    """
+    footprint = memory_footprint(df)
+    if footprint is None:
+        return {}
+    return {LOGICAL_DTYPES_KEY: json.dumps(footprint.logical, sort_keys=True)}
+
+
+def restore_footprint(df: pd.DataFrame, metadata: Optional[Dict[str, str]] = None) -> None:
+    """
+    Record the footprint of a frame read back from an optimized CSV store,
+    written by an earlier process. Coercion types a CSV's columns as 64-bit
+    numbers, bools and str objects, so the unoptimized size follows from
+    the optimized dtypes; the logical dtypes come from the store's
+    `metadata` (footprint_metadata) where it has them.
+    """
+    if _footprints.get(df) is not None:
+        return
+    try:
+        recorded = json.loads((metadata or {}).get(LOGICAL_DTYPES_KEY, "{}"))
+    except ValueError:
+        recorded = {}
+    before = after = 0
+    changed: Dict[str, str] = {}
+    logical: Dict[str, str] = {}
+    for col in df.columns:
+        series = df[col]
+        size = _nbytes(series)
+        after += size
+        before += _coerced_nbytes(series)
+        dtype = str(series.dtype)
+        if col in recorded:
+            changed[col] = dtype
+            logical[col] = recorded[col]
+        elif _storage_logical(dtype) is not None:
+            changed[col] = dtype
+            logical[col] = _storage_logical(dtype)
+    _footprints.set(
+        df, MemoryFootprint(before_bytes=before, after_bytes=after, columns=changed, logical=logical)
+    )
+
+
+def memory_footprint(df: pd.DataFrame) -> Optional[MemoryFootprint]:
+    """
+    The footprint recorded when `df` was optimized, or None for frames that
+    never went through optimize_memory (samples, raw frames).
+    """
+    return _footprints.get(df)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+
+# values treated as missing by every numeric parse in the agent
+NULL_TOKENS = frozenset({"", "nan", "NaN", "None", "null", "NULL"})
+
+# pandas.read_csv's default missing-value tokens, for other CSV readers
+CSV_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+CURRENCY_SYMBOLS = frozenset("$₹€£")
+
+# distinct values a date format inferred from the first one is checked on
+DATE_FORMAT_SAMPLE = 64
+
+_DROP_SEPARATORS = str.maketrans("", "", ",")
+
+
+def _strip_currency(s: str) -> str:
+    if s[:1] in CURRENCY_SYMBOLS:
+        return s[1:].lstrip()
+    return s
+
+
+def clean_numeric_token(value) -> Optional[str]:
+    """
+    Normalize one numeric-looking value to something to_numeric accepts:
+    "$1,200" -> "1200", "(300)" -> "-300", "12.5%" -> "12.5", "null" -> None.
+    """
+    s = str(value).strip()
+    if s in NULL_TOKENS:
+        return None
+
+    s = _strip_currency(s.translate(_DROP_SEPARATORS))
+
+    # parentheses negative: (123) -> -123
+    negative = len(s) >= 2 and s[0] == "(" and s[-1] == ")"
+    if negative:
+        s = _strip_currency(s[1:-1].strip())
+
+    if s[-1:] == "%":
+        s = s[:-1].rstrip()
+
+    return "-" + s if negative else s
+
+
+def parse_numeric(series: pd.Series, errors: str = "coerce") -> pd.Series:
+    """
+    Vectorized numeric parse shared by loading, preprocessing and execution.
+
+    Each distinct value is cleaned once (single pass, translate table instead
+    of chained regexes) and parsed with to_numeric; results are mapped back
+    through the factorized codes.
+
+    errors:
+      - "coerce": unparseable values become NaN
+      - "ignore": return `series` unchanged unless every non-null value parses
+    """
+    if series.dtype.kind in "biufc":
+        return series
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    cleaned = pd.Series([clean_numeric_token(v) for v in uniques], dtype=object)
+    parsed = pd.to_numeric(cleaned, errors="coerce")
+
+    if errors == "ignore" and parsed.isna().sum() > cleaned.isna().sum():
+        return series
+
+    values = parsed.to_numpy()
+    missing = codes < 0
+    if missing.any() or len(values) == 0:
+        values = values.astype("float64", copy=False)
+        out = np.full(len(codes), np.nan)
+        out[~missing] = values[codes[~missing]]
+    else:
+        out = values[codes]
+
+    return pd.Series(out, index=series.index, name=series.name)
+
+
+def infer_date_format(values: pd.Index, sample_size: int = DATE_FORMAT_SAMPLE) -> Optional[str]:
+    """
+    strftime format of the first value (as pd.to_datetime guesses it), kept
+    only when an evenly spaced sample of the other distinct `values` parses
+    with it too; None when there is no single format.
+    """
+    if len(values) == 0:
+        return None
+    positions = np.linspace(0, len(values) - 1, num=min(len(values), sample_size)).astype(np.int64)
+    sample = [
+        v for v in values.take(np.unique(positions))
+        if isinstance(v, str) and v.strip() not in NULL_TOKENS
+    ]
+    if not sample:
+        return None
+    date_format = guess_datetime_format(sample[0])
+    if date_format is None:
+        return None
+    parsed = pd.to_datetime(pd.Index(sample, dtype=object), format=date_format, errors="coerce")
+    return date_format if parsed.notna().all() else None
+
+
+def parse_date_values(
+    values: pd.Index, date_format: Optional[str]
+) -> Optional[Tuple[pd.DatetimeIndex, np.ndarray]]:
+    """
+    Distinct `values` parsed with `date_format` (per-value inference when
+    None) and which of them failed to parse; missing-value tokens become
+    NaT without failing. None when they don't share one datetime dtype
+    (e.g. mixed time zones).
+    """
+    missing = np.asarray(values.isna() | values.astype(str).str.strip().isin(NULL_TOKENS))
+    try:
+        parsed = pd.to_datetime(
+            values.where(~missing), format=date_format or "mixed", errors="coerce"
+        )
+    except (ValueError, TypeError, OverflowError):
+        return None
+    if not isinstance(parsed, pd.DatetimeIndex):
+        return None
+    return parsed, np.asarray(parsed.isna()) & ~missing
+
+
+def parse_dates(series: pd.Series, errors: str = "coerce", date_format: Optional[str] = None) -> pd.Series:
+    """
+    Vectorized datetime parse shared by preprocessing and execution.
+
+    Dates repeat, so only each distinct value is parsed, with the format
+    inferred from a sample of them (see infer_date_format), and results
+    are mapped back through the factorized codes. Numbers, and values that
+    don't share one datetime dtype (mixed time zones), are returned
+    unchanged; numbers are not read as epoch offsets.
+
+    errors:
+      - "coerce": unparseable values become NaT
+      - "ignore": return `series` unchanged unless every non-null value parses
+    """
+    if series.dtype.kind in "Mbiufc":
+        return series
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    values = pd.Index(np.asarray(uniques, dtype=object), dtype=object)
+    result = parse_date_values(values, date_format or infer_date_format(values))
+    if result is None:
+        return series
+
+    parsed, failed = result
+    if errors == "ignore" and failed.any():
+        return series
+    return pd.Series(parsed.array.take(codes, allow_fill=True), index=series.index, name=series.name)
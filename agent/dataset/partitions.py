@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.coercion import auto_type_coerce
+from agent.dataset.parsing import parse_numeric
+
+
+DATA_SUFFIXES = {".csv", ".parquet", ".pq"}
+
+# what Hive/Spark write for a missing partition value
+_HIVE_NULL = "__HIVE_DEFAULT_PARTITION__"
+
+
+def is_multi_file(path: Optional[str]) -> bool:
+    """
+    A directory of data files or a glob pattern, rather than one file.
+    """
+    return bool(path) and (os.path.isdir(path) or glob.has_magic(path))
+
+
+def dataset_root(path: str) -> str:
+    """
+    Directory partition folders are read relative to: the directory itself,
+    or the longest leading part of a glob pattern without wildcards.
+    """
+    head = path
+    while glob.has_magic(head):
+        head = os.path.dirname(head)
+    return os.path.abspath(head or ".")
+
+
+def _hidden(name: str) -> bool:
+    # .crc, _SUCCESS, _temporary/ and friends
+    return name.startswith((".", "_"))
+
+
+def dataset_files(path: str) -> List[str]:
+    """
+    CSV/Parquet files of a directory (recursively) or glob pattern, sorted by
+    path so partition folders keep their natural order.
+    """
+    if os.path.isdir(path):
+        found = []
+        for directory, subdirs, names in os.walk(path):
+            subdirs[:] = [d for d in subdirs if not _hidden(d)]
+            found.extend(os.path.join(directory, name) for name in names)
+    else:
+        found = glob.glob(path, recursive=True)
+    files = [
+        os.path.abspath(f)
+        for f in found
+        if os.path.splitext(f)[1].lower() in DATA_SUFFIXES
+        and not _hidden(os.path.basename(f))
+        and os.path.isfile(f)
+    ]
+    return sorted(files)
+
+
+def dataset_bytes(path: str) -> int:
+    files = dataset_files(path) if is_multi_file(path) else [path]
+    return sum(os.path.getsize(f) for f in files)
+
+
+def sidecar_base(path: str) -> str:
+    """
+    Path that derived files (profiles) are named after: the dataset path
+    itself, or for a glob pattern a name in its root derived from the pattern.
+    """
+    if glob.has_magic(path):
+        tag = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=6).hexdigest()
+        return os.path.join(dataset_root(path), f"_glob_{tag}")
+    return path.rstrip(os.sep) or path
+
+
+def partition_values(root: str, path: str) -> Dict[str, Optional[str]]:
+    """
+    Hive-style `key=value` folders between `root` and the file at `path`.
+    """
+    values: Dict[str, Optional[str]] = {}
+    relative = os.path.relpath(os.path.dirname(os.path.abspath(path)), root)
+    for part in relative.split(os.sep):
+        key, sep, value = part.partition("=")
+        if sep and key:
+            value = unquote(value)
+            values[unquote(key)] = None if value == _HIVE_NULL else value
+    return values
+
+
+def _coerced_dtype(dtype: str) -> str:
+    # files load memory-optimized (see dataset.memory); the schema is
+    # reconciled over the dtypes coercion gave them
+    if dtype == "category":
+        return "object"
+    if dtype in ("int8", "int16", "int32"):
+        return "int64"
+    return dtype
+
+
+def reconcile_dtypes(file_dtypes: List[Dict[str, str]]) -> Dict[str, str]:
+    """
+    One dtype per column across files, in first-seen column order: a dtype
+    every file shares is kept, numbers widen (to float64 when they mix with
+    floats or some files lack the column), anything else becomes text.
+    """
+    columns = list(dict.fromkeys(col for dtypes in file_dtypes for col in dtypes))
+    out: Dict[str, str] = {}
+    for col in columns:
+        present = {_coerced_dtype(dtypes[col]) for dtypes in file_dtypes if col in dtypes}
+        missing = any(col not in dtypes for dtypes in file_dtypes)
+        kinds = {pd.api.types.pandas_dtype(dtype).kind for dtype in present}
+        if len(present) == 1 and (not missing or kinds <= set("fO")):
+            out[col] = present.pop()
+        elif kinds <= set("iuf"):
+            out[col] = "int64" if kinds == {"i"} and not missing else "float64"
+        else:
+            out[col] = "object"
+    return out
+
+
+def _cast(series: pd.Series, dtype: str) -> pd.Series:
+    if str(series.dtype) == dtype:
+        return series
+    if dtype == "object":
+        # as auto_type_coerce writes text, missing values included
+        return series.astype(str)
+    if series.dtype == object:
+        series = parse_numeric(series)
+    return series.astype(dtype)
+
+
+class PartitionedDataset:
+    """
+    A multi-file dataset: its files, their row counts, Hive partition values
+    and one schema reconciled across files. Partition keys become trailing
+    virtual columns (typed like any coerced column); a key that is also a
+    real column of some file is left to the file.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        files: List[str],
+        rows: List[int],
+        file_dtypes: List[Dict[str, str]],
+    ):
+        self.root = root
+        self.files = files
+        self.rows = rows
+        self.file_dtypes = file_dtypes
+        self.offsets = np.concatenate(([0], np.cumsum(rows))).astype(np.int64)
+
+        raw = [partition_values(root, f) for f in files]
+        keys = [
+            k for k in dict.fromkeys(k for values in raw for k in values)
+            if not any(k in dtypes for dtypes in file_dtypes)
+        ]
+        self.partitions = auto_type_coerce(
+            pd.DataFrame({k: [values.get(k) for values in raw] for k in keys}, dtype=object)
+        )
+
+        self.dtypes = reconcile_dtypes(file_dtypes)
+        self.dtypes.update(self.partitions.dtypes.astype(str).to_dict())
+        self.columns = list(self.dtypes)
+
+    @property
+    def partition_columns(self) -> List[str]:
+        return list(self.partitions.columns)
+
+    def partition_value(self, i: int, col: str) -> Any:
+        return self.partitions[col].iloc[i]
+
+    def conform(self, frame: Optional[pd.DataFrame], i: int, columns: List[str]) -> pd.DataFrame:
+        """
+        Rows of file `i` (`frame`: its coerced columns, or None for all
+        `rows[i]` rows of none) as `columns` of the reconciled schema,
+        labelled by their position in the whole dataset.
+        """
+        n = self.rows[i] if frame is None else len(frame)
+        data = {}
+        for col in columns:
+            if col in self.partitions.columns:
+                series = pd.Series([self.partition_value(i, col)] * n, dtype=self.dtypes[col])
+            elif frame is not None and col in frame.columns:
+                series = frame[col].reset_index(drop=True)
+            else:
+                series = pd.Series(np.nan, index=pd.RangeIndex(n))
+            data[col] = _cast(series, self.dtypes[col])
+        out = pd.DataFrame(data, index=pd.RangeIndex(n), columns=columns)
+        start = int(self.offsets[i])
+        out.index = pd.RangeIndex(start, start + n)
+        return out
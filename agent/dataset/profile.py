@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field, PrivateAttr
+
+from agent.dataset.cache import FrameMemo, dataset_cache
+from agent.dataset.incremental import read_ingest_mark
+from agent.dataset.loader import CHUNK_ROWS, align_chunk_types, is_parquet, iter_raw_chunks
+from agent.dataset.memory import MemoryFootprint, logical_dtype, memory_footprint
+from agent.dataset.partitions import is_multi_file, sidecar_base
+from agent.dataset.sketches import HyperLogLog
+from agent.dataset.zone_maps import (
+    ZoneMapBuilder,
+    read_zone_map,
+    write_zone_map,
+    zone_columns,
+    zone_map_path,
+)
+
+
+# bump when the persisted layout or stat definitions change
+PROFILE_VERSION = 1
+
+SAMPLE_ROW_COUNT = 5
+
+# "exact", "approx", or "auto" (approximate distinct counts on large frames)
+PROFILE_MODE = os.getenv("PROFILE_MODE", "auto")
+APPROX_PROFILE_MIN_ROWS = int(os.getenv("APPROX_PROFILE_MIN_ROWS", "1000000"))
+
+
+class ColumnProfile(BaseModel):
+    dtype: str
+    null_count: int
+    unique_count: int
+    unique_approx: bool = False
+
+
+class DatasetProfile(BaseModel):
+    """
+    Per-dataset-version column statistics shared by every schema preview.
+
+    Expensive stats (null and distinct counts) are computed once and persisted
+    next to the dataset; columns whose dtype changes, or that are explicitly
+    invalidated, are recomputed lazily on the next refresh().
+    """
+
+    version: str = ""
+    row_count: int = 0
+    columns: Dict[str, ColumnProfile] = Field(default_factory=dict)
+    # what load-time memory optimization saved (see dataset.memory)
+    memory: Optional[MemoryFootprint] = None
+
+    # cheap to rebuild from the frame, so never persisted
+    sample_rows: List[Dict[str, Any]] = Field(default_factory=list, exclude=True)
+
+    _store_path: Optional[str] = PrivateAttr(default=None)
+
+    def invalidate(self, *columns: str) -> None:
+        for col in columns:
+            self.columns.pop(col, None)
+
+    def stale_columns(self, df: pd.DataFrame, approximate: bool = False) -> List[str]:
+        if len(df) != self.row_count:
+            return list(df.columns)
+        return [
+            col
+            for col in df.columns
+            if col not in self.columns
+            or self.columns[col].dtype != str(df[col].dtype)
+            # an approximate count never satisfies an exact request
+            or (self.columns[col].unique_approx and not approximate)
+        ]
+
+    def refresh(
+        self,
+        df: pd.DataFrame,
+        columns: Optional[Iterable[str]] = None,
+        approximate: bool = False,
+    ) -> List[str]:
+        """
+        Recompute stats for stale columns (plus any in `columns`) and return them.
+        """
+        stale = self.stale_columns(df, approximate=approximate)
+        if columns is not None:
+            stale = list(dict.fromkeys(stale + [c for c in columns if c in df.columns]))
+
+        previous = self.columns
+        self.row_count = int(len(df))
+        self.columns = {}
+        for col in df.columns:
+            if col in stale or col not in previous:
+                self.columns[col] = _profile_column(df[col], approximate=approximate)
+            else:
+                self.columns[col] = previous[col]
+
+        self.sample_rows = df.head(SAMPLE_ROW_COUNT).to_dict(orient="records")
+        return stale
+
+    def extend(self, df: pd.DataFrame, base_rows: int) -> None:
+        """
+        Carry this profile of df's first `base_rows` rows over to all of
+        `df`: null counts add up and distinct counts grow by the appended
+        values not seen before, found by probing the earlier rows with
+        just those values. Columns whose dtype changed are dropped, for
+        refresh() to recompute.
+        """
+        old, new = df.iloc[:base_rows], df.iloc[base_rows:]
+        columns = {}
+        for col in df.columns:
+            previous = self.columns.get(col)
+            if previous is None or previous.dtype != str(df[col].dtype):
+                continue
+            fresh = pd.unique(new[col].dropna())
+            seen = pd.unique(old[col][old[col].isin(fresh)]) if len(fresh) else []
+            columns[col] = ColumnProfile(
+                dtype=previous.dtype,
+                null_count=previous.null_count + int(new[col].isna().sum()),
+                unique_count=previous.unique_count + len(fresh) - len(seen),
+                unique_approx=previous.unique_approx,
+            )
+        self.row_count = int(len(df))
+        self.columns = columns
+
+    def missing_ratio(self, col: str) -> float:
+        if not self.row_count:
+            return float("nan")
+        return self.columns[col].null_count / self.row_count
+
+    def unique_counts(self) -> Dict[str, int]:
+        return {col: c.unique_count for col, c in self.columns.items()}
+
+    def approximate_columns(self) -> List[str]:
+        return [col for col, c in self.columns.items() if c.unique_approx]
+
+    def to_schema(self) -> Dict[str, Any]:
+        """
+        Schema preview payload used by the graph, service and CLI.
+        """
+        schema: Dict[str, Any] = {
+            "columns": list(self.columns),
+            # the optimized frame's int8/category dtypes are storage details
+            "dtypes": {col: logical_dtype(col, c.dtype, self.memory) for col, c in self.columns.items()},
+            "row_count": self.row_count,
+            "missing_pct": {
+                col: float(np.round(self.missing_ratio(col) * 100, 2)) for col in self.columns
+            },
+            "unique_counts": self.unique_counts(),
+            "sample_rows": self.sample_rows,
+        }
+        if self.memory is not None:
+            schema["memory"] = self.memory.to_schema()
+
+        approx = self.approximate_columns()
+        if approx:
+            schema["approximate"] = {
+                "unique_counts": approx,
+                "relative_error": round(HyperLogLog().relative_error, 4),
+            }
+        return schema
+
+
+def _profile_column(series: pd.Series, approximate: bool = False) -> ColumnProfile:
+    if approximate:
+        unique_count = HyperLogLog().update(series).estimate()
+    else:
+        unique_count = int(series.nunique(dropna=True))
+    return ColumnProfile(
+        dtype=str(series.dtype),
+        null_count=int(series.isna().sum()),
+        unique_count=unique_count,
+        unique_approx=approximate,
+    )
+
+
+def _use_approximate(mode: Optional[str], row_count: int) -> bool:
+    mode = mode or PROFILE_MODE
+    if mode == "approx":
+        return True
+    if mode == "exact":
+        return False
+    return row_count >= APPROX_PROFILE_MIN_ROWS
+
+
+def profile_file(
+    path: str,
+    sample_dtypes: Dict[str, str],
+    chunk_rows: int = CHUNK_ROWS,
+    zones: Optional[ZoneMapBuilder] = None,
+) -> DatasetProfile:
+    """
+    Whole-file profile in one streaming pass: exact row and null counts,
+    HyperLogLog distinct counts merged across chunks. `zones`, if given,
+    sees every chunk too, so zone maps come from the same pass.
+    """
+    rows = 0
+    nulls: Dict[str, int] = {col: 0 for col in sample_dtypes}
+    sketches: Dict[str, HyperLogLog] = {col: HyperLogLog() for col in sample_dtypes}
+
+    for chunk in iter_raw_chunks(path, columns=list(sample_dtypes), chunk_rows=chunk_rows):
+        chunk = align_chunk_types(chunk, sample_dtypes)
+        if zones is not None:
+            zones.add(chunk)
+        rows += len(chunk)
+        for col in sample_dtypes:
+            nulls[col] += int(chunk[col].isna().sum())
+            sketches[col].update(chunk[col])
+
+    return DatasetProfile(
+        row_count=rows,
+        columns={
+            col: ColumnProfile(
+                dtype=dtype,
+                null_count=nulls[col],
+                unique_count=sketches[col].estimate(),
+                unique_approx=True,
+            )
+            for col, dtype in sample_dtypes.items()
+        },
+    )
+
+
+def profile_path(source_path: str, fingerprint: str, variant: str = "") -> str:
+    tag = f".{variant}" if variant else ""
+    return f"{sidecar_base(source_path)}{tag}.profile.v{PROFILE_VERSION}.{fingerprint[:16]}.json"
+
+
+def _read_profile(store_path: str) -> Optional[DatasetProfile]:
+    if not os.path.exists(store_path):
+        return None
+    try:
+        with open(store_path, "r", encoding="utf-8") as f:
+            return DatasetProfile.model_validate_json(f.read())
+    except Exception:
+        return None
+
+
+def _write_profile(profile: DatasetProfile, store_path: str) -> None:
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(store_path)), suffix=".json.tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(profile.model_dump_json())
+        os.replace(tmp_path, store_path)
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+_frame_profiles = FrameMemo()
+
+
+def _appended_profile(
+    df: pd.DataFrame, dataset_path: str, fingerprint: str, variant: str
+) -> Optional[DatasetProfile]:
+    """
+    Profile of a CSV version that is a pure append to an earlier one,
+    carried over from the earlier version's persisted profile.
+    """
+    mark = read_ingest_mark(dataset_path, variant)
+    if mark is None or mark.version != fingerprint or not mark.previous or len(df) != mark.rows:
+        return None
+    profile = _read_profile(profile_path(dataset_path, mark.previous, variant))
+    if profile is None or profile.row_count != mark.previous_rows:
+        return None
+    profile.extend(df, mark.previous_rows)
+    profile.version = fingerprint
+    return profile
+
+
+def get_profile(
+    df: pd.DataFrame,
+    dataset_path: Optional[str] = None,
+    variant: str = "",
+    mode: Optional[str] = None,
+) -> DatasetProfile:
+    """
+    Return the profile for `df`, reusing (in order) the in-process profile of
+    the same frame, the persisted profile of the same dataset version, or
+    computing it once. Only stale columns are ever recomputed; a CSV that
+    only grew starts from its previous version's profile. The frame's
+    memory footprint, when it was optimized at load, is kept with the stats.
+
+    mode: "exact", "approx" or "auto" (default: PROFILE_MODE)
+    """
+    profile = _frame_profiles.get(df)
+    extended = False
+
+    if profile is None and dataset_path:
+        try:
+            fingerprint = dataset_cache.fingerprint(dataset_path)
+        except OSError:
+            fingerprint = None
+        if fingerprint:
+            store_path = profile_path(dataset_path, fingerprint, variant)
+            profile = _read_profile(store_path)
+            if profile is None:
+                profile = _appended_profile(df, dataset_path, fingerprint, variant)
+                extended = profile is not None
+            profile = profile or DatasetProfile(version=fingerprint)
+            profile._store_path = store_path
+
+    if profile is None:
+        profile = DatasetProfile()
+
+    recomputed = profile.refresh(df, approximate=_use_approximate(mode, len(df)))
+    _frame_profiles.set(df, profile)
+
+    footprint = memory_footprint(df)
+    noted = footprint is not None and footprint != profile.memory
+    if noted:
+        profile.memory = footprint
+
+    if (recomputed or extended or noted) and profile._store_path:
+        _write_profile(profile, profile._store_path)
+    return profile
+
+
+def get_streamed_profile(dataset_path: str, sample: pd.DataFrame) -> DatasetProfile:
+    """
+    Whole-file profile of a dataset too large to load, typed like `sample`.
+    Computed once per dataset version and persisted next to the file,
+    together with the CSV's zone maps when it has none yet.
+    """
+    sample_dtypes = sample.dtypes.astype(str).to_dict()
+    fingerprint = dataset_cache.fingerprint(dataset_path)
+    store_path = profile_path(dataset_path, fingerprint, "streamed")
+
+    profile = _read_profile(store_path)
+    if profile is None or {c: p.dtype for c, p in profile.columns.items()} != sample_dtypes:
+        zones = None
+        zones_path = zone_map_path(dataset_path, fingerprint)
+        csv = not is_parquet(dataset_path) and not is_multi_file(dataset_path)
+        if csv and read_zone_map(zones_path) is None:
+            zones = ZoneMapBuilder(zone_columns(sample))
+        profile = profile_file(dataset_path, sample_dtypes, zones=zones)
+        profile.version = fingerprint
+        _write_profile(profile, store_path)
+        if zones is not None:
+            write_zone_map(zones.finish(dataset_path), zones_path)
+
+    profile.sample_rows = sample.head(SAMPLE_ROW_COUNT).to_dict(orient="records")
+    return profile
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+_U64 = np.uint64
+
+
+def _hash_values(series: pd.Series) -> np.ndarray:
+    """
+    64-bit hashes of the non-null values of `series`.
+    Numbers are hashed as float64 so int and float chunks of one column agree.
+    """
+    s = series.dropna()
+    if s.dtype.kind in "biuf":
+        s = s.astype("float64")
+    return pd.util.hash_pandas_object(s, index=False, categorize=False).to_numpy(dtype=np.uint64)
+
+
+def _leading_zeros(x: np.ndarray) -> np.ndarray:
+    # branch-free count of leading zero bits of uint64 values (64 for x == 0)
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (x >> _U64(64 - shift)) == 0
+        n[empty] += shift
+        x[empty] <<= _U64(shift)
+    n[x == 0] = 64
+    return n
+
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count sketch (Flajolet et al., 64-bit hashes).
+
+    Relative standard error is about 1.04 / sqrt(2 ** precision), i.e. ~0.8%
+    at the default precision of 14 (16 KiB of registers per column).
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def update(self, series: pd.Series) -> "HyperLogLog":
+        hashes = _hash_values(series)
+        if len(hashes) == 0:
+            return self
+
+        p = _U64(self.precision)
+        index = (hashes >> (_U64(64) - p)).astype(np.int64)
+        rest = hashes << p
+        rank = np.minimum(_leading_zeros(rest), 64 - self.precision) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = float(self.m)
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # small-range correction (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
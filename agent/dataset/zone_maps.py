@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ConfigDict, Field
+
+from agent.dataset.cache import dataset_cache
+from agent.dataset.coercion import NUMERIC_RATIO_THRESHOLD
+from agent.dataset.loader import CHUNK_ROWS, align_chunk_types, is_parquet, iter_raw_chunks
+from agent.dataset.partitions import is_multi_file
+
+
+# bump when the persisted layout or zone definitions change
+ZONE_MAP_VERSION = 1
+
+_SCAN_BLOCK = 16 * 1024 ** 2
+_NEWLINE, _QUOTE = ord("\n"), ord('"')
+
+
+class ColumnZones(BaseModel):
+    """
+    Per-chunk min, max and null count of one column, as the chunked executor
+    sees it after align_chunk_types. "number" zones ignore missing values;
+    "text" zones are over the coerced text, so "nan" is a value like any other.
+    """
+
+    model_config = ConfigDict(ser_json_inf_nan="constants")
+
+    kind: str
+    mins: List[Any] = Field(default_factory=list)
+    maxs: List[Any] = Field(default_factory=list)
+    nulls: List[int] = Field(default_factory=list)
+
+
+class ZoneMap(BaseModel):
+    """
+    Zone maps of a CSV read in chunks of `chunk_rows` rows, persisted next
+    to the file per dataset version. `offsets` are the byte offsets the
+    chunks start at (empty when records can't be found by newlines), so
+    chunks the filters rule out are never parsed.
+    """
+
+    version: str = ""
+    chunk_rows: int = CHUNK_ROWS
+    rows: List[int] = Field(default_factory=list)
+    offsets: List[int] = Field(default_factory=list)
+    columns: Dict[str, ColumnZones] = Field(default_factory=dict)
+
+    def kinds(self) -> Dict[str, str]:
+        return {col: zones.kind for col, zones in self.columns.items()}
+
+
+def _looks_like_dates(series: pd.Series) -> bool:
+    values = series[series.notna() & (series != "nan")]
+    if values.empty:
+        return False
+    parsed = pd.to_datetime(values, errors="coerce", format="mixed")
+    return float(parsed.notna().mean()) >= NUMERIC_RATIO_THRESHOLD
+
+
+def zone_columns(sample: pd.DataFrame) -> Dict[str, str]:
+    """
+    Columns worth zone maps: numeric ones, and text columns holding dates
+    (compared as text by the filters, which ISO dates order correctly).
+    """
+    kinds = {}
+    for col in sample.columns:
+        kind = sample[col].dtype.kind
+        if kind in "iuf":
+            kinds[col] = "number"
+        elif sample[col].dtype == object and _looks_like_dates(sample[col]):
+            kinds[col] = "text"
+    return kinds
+
+
+class ZoneMapBuilder:
+    """
+    Collects zones chunk by chunk; feed it every aligned chunk in file order.
+    """
+
+    def __init__(self, kinds: Dict[str, str], chunk_rows: int = CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self.rows: List[int] = []
+        self.columns = {col: ColumnZones(kind=kind) for col, kind in kinds.items()}
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        self.rows.append(len(chunk))
+        for col, zones in self.columns.items():
+            series = chunk[col]
+            present = series.dropna()
+            if zones.kind == "text":
+                # missing values arrive as the text "nan"
+                zones.nulls.append(int((series == "nan").sum()))
+            else:
+                zones.nulls.append(int(len(series) - len(present)))
+            if zones.kind == "number" and series.dtype.kind not in "iuf":
+                present = pd.Series(dtype="float64")
+            if present.empty:
+                zones.mins.append(None)
+                zones.maxs.append(None)
+            else:
+                zones.mins.append(present.min().item() if zones.kind == "number" else present.min())
+                zones.maxs.append(present.max().item() if zones.kind == "number" else present.max())
+
+    def finish(self, path: str) -> ZoneMap:
+        return ZoneMap(
+            version=dataset_cache.fingerprint(path),
+            chunk_rows=self.chunk_rows,
+            rows=self.rows,
+            offsets=_chunk_offsets(path, self.chunk_rows, sum(self.rows)),
+            columns=self.columns,
+        )
+
+
+def _chunk_offsets(path: str, chunk_rows: int, rows: int) -> List[int]:
+    """
+    Byte offset of the first record of each `chunk_rows`-record chunk,
+    counting newlines. [] when that's unsafe: a quoted field spans lines
+    (a line with an odd number of quotes) or the newline count doesn't
+    match the parser's row count (blank lines, for one).
+    """
+    offsets: List[int] = []
+    newlines = 0
+    quotes_open = 0
+    position = 0
+    last = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_SCAN_BLOCK)
+            if not block:
+                break
+            buf = np.frombuffer(block, dtype=np.uint8)
+            ends = np.flatnonzero(buf == _NEWLINE)
+            quotes = np.flatnonzero(buf == _QUOTE)
+            if len(quotes):
+                if ((quotes_open + np.searchsorted(quotes, ends)) % 2).any():
+                    return []
+                quotes_open = (quotes_open + len(quotes)) % 2
+            # record r (0-based) starts after newline r; newline 0 ends the header
+            first = -newlines % chunk_rows
+            picked = ends[first::chunk_rows]
+            offsets.extend((position + picked + 1).tolist())
+            newlines += len(ends)
+            position += len(block)
+            last = block[-1:]
+
+    records = newlines - 1 + (last != b"\n")
+    if quotes_open or records != rows:
+        return []
+    return offsets[: -(-rows // chunk_rows)]
+
+
+def build_zone_map(
+    path: str,
+    sample_dtypes: Dict[str, str],
+    kinds: Dict[str, str],
+    chunk_rows: int = CHUNK_ROWS,
+) -> ZoneMap:
+    """
+    Zone maps of `kinds` columns in one streaming pass over only those columns.
+    """
+    builder = ZoneMapBuilder(kinds, chunk_rows)
+    columns = list(kinds) or list(sample_dtypes)[:1]
+    for chunk in iter_raw_chunks(path, columns=columns, chunk_rows=chunk_rows):
+        builder.add(align_chunk_types(chunk, sample_dtypes))
+    return builder.finish(path)
+
+
+def zone_map_path(source_path: str, fingerprint: str) -> str:
+    return f"{source_path}.zones.v{ZONE_MAP_VERSION}.{fingerprint[:16]}.json"
+
+
+def read_zone_map(store_path: str) -> Optional[ZoneMap]:
+    if not os.path.exists(store_path):
+        return None
+    try:
+        with open(store_path, "r", encoding="utf-8") as f:
+            return ZoneMap.model_validate_json(f.read())
+    except Exception:
+        return None
+
+
+def write_zone_map(zones: ZoneMap, store_path: str) -> None:
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(store_path)), suffix=".json.tmp"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(zones.model_dump_json())
+        os.replace(tmp_path, store_path)
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def get_zone_map(path: str, sample: pd.DataFrame, chunk_rows: int = CHUNK_ROWS) -> Optional[ZoneMap]:
+    """
+    Zone maps of a CSV typed like `sample`: the persisted ones of this
+    dataset version, or built once now. None for Parquet (it has statistics)
+    and directory/glob datasets (pruned by partition values instead).
+    """
+    if is_parquet(path) or is_multi_file(path):
+        return None
+    kinds = zone_columns(sample)
+    store_path = zone_map_path(path, dataset_cache.fingerprint(path))
+    zones = read_zone_map(store_path)
+    if zones is None or zones.chunk_rows != chunk_rows or zones.kinds() != kinds:
+        zones = build_zone_map(path, sample.dtypes.astype(str).to_dict(), kinds, chunk_rows)
+        write_zone_map(zones, store_path)
+    return zones
@@ -9,7 +9,7 @@ def analyze_data(df: pd.DataFrame) -> Dict[str, Any]:
 
     if "region" in df.columns and "revenue_usd" in df.columns:
         results["revenue_by_region"] = (
-            df.groupby("region")["revenue_usd"]
+            df.groupby("region", observed=True)["revenue_usd"]
             .sum()
             .sort_values(ascending=False)
             .to_dict()
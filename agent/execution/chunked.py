@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.loader import CHUNK_ROWS, align_chunk_types, iter_raw_chunks
+from agent.execution.filters import filter_mask
+from agent.schema.models import AnalysisPlan, MetricAgg
+
+
+STREAMABLE_AGGS = {"sum", "mean", "min", "max", "count", "std"}
+
+_ALL = "__all__"
+
+
+def _partial(grouped, agg: str) -> Dict[str, pd.DataFrame]:
+    if agg == "count":
+        return {"count": grouped.size().to_frame("count")}
+    if agg in ("sum", "min", "max"):
+        return {agg: getattr(grouped, agg)()}
+    n = grouped.count()
+    if agg == "mean":
+        return {"n": n, "sum": grouped.sum()}
+    # std: per-group count, mean and sum of squared deviations (M2)
+    return {"n": n, "mean": grouped.mean(), "m2": grouped.var(ddof=0) * n}
+
+
+def _merge_moments(a: Dict[str, pd.DataFrame], b: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Chan et al. parallel merge of (n, mean, M2) per group.
+    """
+    idx = a["n"].index.union(b["n"].index)
+    na = a["n"].reindex(idx, fill_value=0).astype("float64")
+    nb = b["n"].reindex(idx, fill_value=0).astype("float64")
+    ma = a["mean"].reindex(idx).fillna(0.0)
+    mb = b["mean"].reindex(idx).fillna(0.0)
+    m2a = a["m2"].reindex(idx).fillna(0.0)
+    m2b = b["m2"].reindex(idx).fillna(0.0)
+
+    n = na + nb
+    safe_n = n.where(n > 0)
+    delta = mb - ma
+    mean = (ma + delta * nb / safe_n).fillna(0.0)
+    m2 = (m2a + m2b + delta ** 2 * na * nb / safe_n).fillna(0.0)
+    return {"n": n, "mean": mean, "m2": m2}
+
+
+def _merge(acc: Optional[Dict[str, pd.DataFrame]], part: Dict[str, pd.DataFrame], agg: str):
+    if acc is None:
+        return part
+    if agg == "std":
+        return _merge_moments(acc, part)
+
+    merged = {}
+    for key, frame in part.items():
+        combined = pd.concat([acc[key], frame])
+        levels = list(range(combined.index.nlevels))
+        reducer = agg if key == agg and agg in ("min", "max") else "sum"
+        merged[key] = getattr(combined.groupby(level=levels, observed=True), reducer)()
+    return merged
+
+
+def _finalize(acc: Dict[str, pd.DataFrame], agg: str) -> pd.DataFrame:
+    if agg in ("count", "sum", "min", "max"):
+        return acc[agg]
+    n = acc["n"]
+    if agg == "mean":
+        return acc["sum"] / n.where(n > 0)
+    return np.sqrt(acc["m2"] / (n - 1).where(n > 1))
+
+
+def _prepare_chunk(
+    chunk: pd.DataFrame,
+    sample_dtypes: Dict[str, str],
+    metrics: List[str],
+    filters: Dict[str, Any],
+) -> pd.DataFrame:
+    """
+    align_chunk_types + filters, with the filter applied as early as
+    possible: only the compared columns are typed before it, everything
+    else is typed on the surviving rows.
+    """
+    if not filters:
+        return align_chunk_types(chunk, sample_dtypes, numeric=metrics)
+    compared = [c for c in chunk.columns if c in filters]
+    head = align_chunk_types(chunk[compared].copy(), sample_dtypes, numeric=metrics)
+    keep = filter_mask(head, filters)
+    rest = [c for c in chunk.columns if c not in filters]
+    out = align_chunk_types(chunk.loc[keep, rest], sample_dtypes, numeric=metrics)
+    for col in compared:
+        out[col] = head.loc[keep, col]
+    return out[list(chunk.columns)]
+
+
+def chunk_filter_dtypes(
+    sample_dtypes: Dict[str, str],
+    metrics: List[str],
+    filters: Dict[str, Any],
+) -> Dict[str, str]:
+    """
+    Dtypes the filter columns have when _prepare_chunk evaluates the filters.
+    """
+    return {col: "float64" if col in metrics else sample_dtypes.get(col, "object") for col in filters}
+
+
+def _whole_table(result: pd.DataFrame, zero_cols: List[str]) -> pd.DataFrame:
+    # no group_by: always one row, even when every chunk was filtered empty
+    # (sum/count of nothing is 0, like the in-memory path)
+    if len(result):
+        return result.reset_index(drop=True)
+    result = result.reindex([0])
+    result[zero_cols] = result[zero_cols].fillna(0)
+    return result.reset_index(drop=True)
+
+
+def metrics_by_agg(pairs: List[MetricAgg]) -> Dict[str, List[str]]:
+    by_agg: Dict[str, List[str]] = {}
+    for pair in pairs:
+        if pair.agg not in STREAMABLE_AGGS:
+            raise ValueError(f"Aggregation '{pair.agg}' is not supported in chunked mode.")
+        metrics_for = by_agg.setdefault(pair.agg, [])
+        if pair.metric not in metrics_for:
+            metrics_for.append(pair.metric)
+    return by_agg
+
+
+def aggregation_partials(
+    frame: pd.DataFrame,
+    groups: List[str],
+    by_agg: Dict[str, List[str]],
+    count_rows: bool = False,
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Mergeable partial aggregates of a typed, filtered frame, per agg.
+    "count" counts non-null metric values; `count_rows` counts group sizes.
+    """
+    if groups:
+        grouped = frame.groupby(groups, observed=True)
+    else:
+        grouped = frame.assign(**{_ALL: 0}).groupby(_ALL)
+    if count_rows:
+        return {"count": _partial(grouped, "count")}
+    return {
+        agg: {"count": grouped[cols].count()} if agg == "count" else _partial(grouped[cols], agg)
+        for agg, cols in by_agg.items()
+    }
+
+
+def merge_partials(
+    acc: Optional[Dict[str, Dict[str, pd.DataFrame]]],
+    part: Dict[str, Dict[str, pd.DataFrame]],
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Partials of two disjoint sets of rows combined; neither input is modified.
+    """
+    if acc is None:
+        return part
+    return {agg: _merge(acc[agg], frame, agg) for agg, frame in part.items()}
+
+
+def finalize_partials(
+    acc: Dict[str, Dict[str, pd.DataFrame]],
+    groups: List[str],
+    outputs: List[Tuple[str, str, str]],
+    count_rows: bool = False,
+) -> pd.DataFrame:
+    """
+    Result frame of merged partials, shaped like the in-memory aggregation:
+    one column per (metric, agg, column) output, or "count" of group sizes.
+    """
+    if count_rows:
+        result = _finalize(acc["count"], "count").sort_index()
+        zero_cols = ["count"]
+    else:
+        finals = {agg: _finalize(partial, agg) for agg, partial in acc.items()}
+        result = pd.DataFrame({col: finals[agg][metric] for metric, agg, col in outputs}).sort_index()
+        zero_cols = [col for _, agg, col in outputs if agg in ("sum", "count")]
+    if groups:
+        return result.reset_index()
+    return _whole_table(result, zero_cols)
+
+
+def execute_aggregation_chunked(
+    plan: AnalysisPlan,
+    path: str,
+    metrics: List[str],
+    groups: List[str],
+    sample_dtypes: Dict[str, str],
+    chunk_rows: int = CHUNK_ROWS,
+    row_groups: Optional[List[int]] = None,
+    offsets: Optional[List[int]] = None,
+    files: Optional[List[int]] = None,
+) -> pd.DataFrame:
+    """
+    Streaming aggregation over a CSV/Parquet file.
+
+    Each chunk is reduced to mergeable partial aggregates (sum/count/min/max,
+    or Welford-style moments for mean/std), so peak memory is bounded by
+    `chunk_rows` plus the number of groups rather than the row count.
+    Output matches the in-memory aggregation in executor_node.
+    plan.filters are applied to each chunk before it is grouped; only the
+    Parquet `row_groups` / CSV chunk `offsets` / partition `files` the
+    filters can match are read.
+    """
+    agg = getattr(plan, "agg", "sum")
+    if agg not in STREAMABLE_AGGS:
+        raise ValueError(f"Aggregation '{agg}' is not supported in chunked mode.")
+
+    filters = getattr(plan, "filters", None) or {}
+    needed = list(dict.fromkeys(groups + metrics + list(filters)))
+    if not needed:
+        # count(*) with no columns referenced: read the narrowest thing possible
+        needed = [next(iter(sample_dtypes))]
+
+    by_agg = {agg: metrics}
+    acc: Optional[Dict[str, Dict[str, pd.DataFrame]]] = None
+    chunks = iter_raw_chunks(
+        path,
+        columns=needed,
+        chunk_rows=chunk_rows,
+        row_groups=row_groups,
+        offsets=offsets,
+        files=files,
+    )
+    for chunk in chunks:
+        chunk = _prepare_chunk(chunk, sample_dtypes, metrics, filters)
+        acc = merge_partials(acc, aggregation_partials(chunk, groups, by_agg, count_rows=agg == "count"))
+
+    if acc is None:
+        cols = groups + (["count"] if agg == "count" else metrics)
+        return pd.DataFrame(columns=cols)
+
+    return finalize_partials(acc, groups, [(m, agg, m) for m in metrics], count_rows=agg == "count")
+
+
+def execute_aggregations_chunked(
+    pairs: List[MetricAgg],
+    path: str,
+    groups: List[str],
+    sample_dtypes: Dict[str, str],
+    chunk_rows: int = CHUNK_ROWS,
+    filters: Optional[Dict[str, Any]] = None,
+    row_groups: Optional[List[int]] = None,
+    offsets: Optional[List[int]] = None,
+    files: Optional[List[int]] = None,
+) -> pd.DataFrame:
+    """
+    Several (metric, agg) pairs in one streaming pass: every chunk is grouped
+    once and reduced to the partials of each aggregation.
+    "count" counts non-null metric values, as in the in-memory path.
+    """
+    by_agg = metrics_by_agg(pairs)
+    metrics = list(dict.fromkeys(p.metric for p in pairs))
+    filters = filters or {}
+    needed = list(dict.fromkeys(groups + metrics + list(filters)))
+
+    acc: Optional[Dict[str, Dict[str, pd.DataFrame]]] = None
+    chunks = iter_raw_chunks(
+        path,
+        columns=needed,
+        chunk_rows=chunk_rows,
+        row_groups=row_groups,
+        offsets=offsets,
+        files=files,
+    )
+    for chunk in chunks:
+        chunk = _prepare_chunk(chunk, sample_dtypes, metrics, filters)
+        acc = merge_partials(acc, aggregation_partials(chunk, groups, by_agg))
+
+    if acc is None:
+        return pd.DataFrame(columns=groups + [p.column for p in pairs])
+
+    return finalize_partials(acc, groups, [(p.metric, p.agg, p.column) for p in pairs])
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+from typing import Any, List, Optional, Tuple
+
+import pandas as pd
+
+from agent.dataset.column_cache import numeric_column
+from agent.dataset.loader import is_parquet
+from agent.dataset.parsing import CSV_NA_VALUES
+from agent.dataset.partitions import is_multi_file
+from agent.execution.filters import _candidates, _coerce_value, is_text, parse_filters
+from agent.schema.models import AnalysisPlan, MetricAgg
+
+try:
+    import duckdb
+except ImportError:  # optional: pip install -r requirements-duckdb.txt
+    duckdb = None
+
+
+# "pandas" (default) or "duckdb"; duckdb falls back to pandas per plan
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "pandas").strip().lower()
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "")
+# where DuckDB spills large aggregations; empty = its own default
+DUCKDB_TEMP_DIRECTORY = os.getenv("DUCKDB_TEMP_DIRECTORY", "")
+
+SQL_AGGS = {"sum", "mean", "min", "max", "std", "count"}
+
+_NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT",
+                  "USMALLINT", "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "DECIMAL")
+
+_local = threading.local()
+_connect_lock = threading.Lock()
+_connection = None
+
+
+class Unsupported(Exception):
+    """
+    The plan (or a column in it) has no exact SQL equivalent; run it in pandas.
+    """
+
+
+def enabled() -> bool:
+    return EXECUTION_BACKEND == "duckdb" and duckdb is not None
+
+
+def missing() -> bool:
+    """
+    EXECUTION_BACKEND=duckdb without duckdb installed: every plan runs in pandas.
+    """
+    return EXECUTION_BACKEND == "duckdb" and duckdb is None
+
+
+def _cursor():
+    # one shared database, one cursor per thread (DuckDB cursors aren't thread-safe)
+    global _connection
+    cursor = getattr(_local, "cursor", None)
+    if cursor is None:
+        with _connect_lock:
+            if _connection is None:
+                _connection = duckdb.connect(":memory:")
+                if DUCKDB_MEMORY_LIMIT:
+                    _connection.execute(f"SET memory_limit = {_literal(DUCKDB_MEMORY_LIMIT)}")
+                if DUCKDB_TEMP_DIRECTORY:
+                    _connection.execute(f"SET temp_directory = {_literal(DUCKDB_TEMP_DIRECTORY)}")
+            cursor = _connection.cursor()
+        _local.cursor = cursor
+    return cursor
+
+
+def _literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _source(path: str, text_columns: List[str]) -> str:
+    if is_parquet(path):
+        return f"read_parquet({_literal(path)})"
+    # columns the frame holds as text are read as text (no date/number sniffing),
+    # so their values are the exact strings pandas saw
+    nulls = ", ".join(_literal(v) for v in CSV_NA_VALUES)
+    options = f"header = true, nullstr = [{nulls}]"
+    if text_columns:
+        types = ", ".join(f"{_literal(c)}: 'VARCHAR'" for c in text_columns)
+        options += f", types = {{{types}}}"
+    return f"read_csv({_literal(path)}, {options})"
+
+
+def _numeric_text(expr: str, sql_type: str) -> str:
+    """
+    SQL twin of clean_numeric_token + to_numeric:
+    "$1,200" -> 1200, "(300)" -> -300, "12.5%" -> 12.5, anything else -> NULL.
+    """
+    s = f"replace(trim({expr}), ',', '')"
+    s = f"regexp_replace({s}, '^[$₹€£]\\s*', '')"
+    s = f"regexp_replace({s}, '^\\(\\s*[$₹€£]?\\s*(.*?)\\s*\\)$', '-\\1')"
+    s = f"regexp_replace({s}, '\\s*%$', '')"
+    # plain numbers parse as they are; only the rest pay for the regexes
+    return f"COALESCE(TRY_CAST({expr} AS {sql_type}), TRY_CAST({s} AS {sql_type}))"
+
+
+class _Compiler:
+    """
+    Column expressions that reproduce the frame's view of the file.
+
+    `df` is the frame the plan was made against (the full frame, or the
+    planning sample in chunked mode); its dtypes say how each raw column
+    was typed by the loader, and the SQL applies the same conversion.
+    """
+
+    def __init__(self, df: pd.DataFrame, path: str):
+        self.df = df
+        self.source = _source(path, [c for c in df.columns if is_text(df[c])])
+        rows = _cursor().execute(f"DESCRIBE SELECT * FROM {self.source}").fetchall()
+        self.types = {row[0]: str(row[1]).upper() for row in rows}
+        # what astype(str) made of a missing value: read_parquet gives None, read_csv NaN
+        self.missing_text = "None" if is_parquet(path) else "nan"
+        self.params: List[Any] = []
+
+    def _raw(self, col: str) -> Tuple[str, str]:
+        if col not in self.types:
+            raise Unsupported(col)
+        return _ident(col), self.types[col]
+
+    def metric(self, col: str) -> str:
+        # metrics always go through parse_numeric, whatever the column's dtype
+        expr, source_type = self._raw(col)
+        sql_type = "BIGINT" if numeric_column(self.df, col).dtype.kind == "i" else "DOUBLE"
+        if source_type.startswith(_NUMERIC_TYPES):
+            return f"CAST({expr} AS {sql_type})"
+        return _numeric_text(f"CAST({expr} AS VARCHAR)", sql_type)
+
+    def column(self, col: str) -> str:
+        expr, source_type = self._raw(col)
+        dtype = self.df[col].dtype
+        if is_text(self.df[col]):
+            if source_type != "VARCHAR":
+                raise Unsupported(col)
+            if self.df[col].isna().any():
+                return expr
+            # coerced text columns are astype(str), so missing values became text
+            return f"COALESCE({expr}, {_literal(self.missing_text)})"
+        if dtype.kind in "iuf":
+            sql_type = "BIGINT" if dtype.kind in "iu" else "DOUBLE"
+            if source_type.startswith(_NUMERIC_TYPES):
+                return f"CAST({expr} AS {sql_type})"
+            return _numeric_text(f"CAST({expr} AS VARCHAR)", sql_type)
+        if dtype.kind == "M" and source_type.startswith(("DATE", "TIMESTAMP")):
+            return f"CAST({expr} AS TIMESTAMP)"
+        if dtype.kind == "M" and getattr(dtype, "tz", None) is None:
+            return f"TRY_CAST({expr} AS TIMESTAMP)"
+        raise Unsupported(col)
+
+    def param(self, value: Any) -> str:
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        self.params.append(value)
+        return "?"
+
+    def predicate(self, col: str, op: str, value: Any) -> str:
+        if col not in self.df.columns:
+            raise Unsupported(col)
+        series = self.df[col]
+        expr = self.column(col)
+        text = is_text(series)
+
+        if op in ("eq", "in"):
+            values = value if op == "in" else [value]
+            wanted = [c for v in values for c in _candidates(series, v)]
+            if text:
+                # a str column only ever equals str values
+                wanted = [c for c in wanted if isinstance(c, str)]
+            if any(isinstance(c, float) and math.isnan(c) for c in wanted):
+                raise Unsupported(col)
+            if not wanted:
+                return "FALSE"
+            return f"{expr} IN ({', '.join(self.param(c) for c in wanted)})"
+
+        value = _coerce_value(series, value)
+        if text and not isinstance(value, str):
+            # pandas raises on str-vs-number ordering; let it
+            raise Unsupported(col)
+        if isinstance(value, float) and math.isnan(value):
+            return "FALSE"
+        symbol = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}[op]
+        return f"{expr} {symbol} {self.param(value)}"
+
+
+def _outputs(compiler: _Compiler, plan: AnalysisPlan, groups: List[str]) -> Optional[Tuple[List[str], List[str], Optional[str]]]:
+    """
+    (metric columns, aggregate select expressions, sort column) for the plan,
+    or None when pandas should produce the result (or the error).
+    """
+    if plan.aggregations:
+        pairs = [p for p in plan.aggregations if p.metric in compiler.df.columns]
+        if not pairs:
+            return None
+    else:
+        agg = getattr(plan, "agg", "sum")
+        metrics = [c for c in (plan.metrics or []) if c in compiler.df.columns]
+        if agg != "count" and not metrics:
+            return None
+        if agg == "count":
+            return [], ["COUNT(*) AS \"count\""], None
+        pairs = [MetricAgg(metric=m, agg=agg) for m in metrics]
+
+    metrics = list(dict.fromkeys(p.metric for p in pairs))
+    if any(p.agg not in SQL_AGGS for p in pairs) or set(metrics) & set(groups):
+        return None
+
+    aliases = {m: f"__m{i}" for i, m in enumerate(metrics)}
+    outputs = []
+    for p in pairs:
+        m = _ident(aliases[p.metric])
+        kind = numeric_column(compiler.df, p.metric).dtype.kind
+        # float sums use fsum (Kahan), like pandas' compensated kernels
+        total = f"SUM({m})" if kind == "i" else f"fsum({m})"
+        if p.agg == "sum":
+            # pandas: the sum of nothing is 0, and int sums stay int64
+            expr = f"CAST(COALESCE({total}, 0) AS {'BIGINT' if kind == 'i' else 'DOUBLE'})"
+        elif p.agg == "mean":
+            expr = f"{total} / COUNT({m})"
+        elif p.agg == "std":
+            expr = f"STDDEV_SAMP({m})"
+        elif p.agg == "count":
+            expr = f"COUNT({m})"
+        else:
+            expr = f"{p.agg.upper()}({m})"
+        name = p.column if plan.aggregations else p.metric
+        outputs.append(f"{expr} AS {_ident(name)}")
+
+    sort_by = pairs[0].column if plan.aggregations else pairs[0].metric
+    return metrics, outputs, sort_by
+
+
+def compile_aggregation(plan: AnalysisPlan, path: str, df: pd.DataFrame) -> Optional[Tuple[str, List[Any]]]:
+    """
+    SQL (and parameters) computing exactly what executor_node's aggregation
+    branch computes for `plan`, or None when the plan can't be compiled.
+    """
+    compiler = _Compiler(df, path)
+    groups = [c for c in (plan.group_by or []) if c in df.columns]
+    try:
+        shape = _outputs(compiler, plan, groups)
+        if shape is None:
+            return None
+        metrics, outputs, sort_by = shape
+
+        columns = [f"{compiler.column(g)} AS {_ident(g)}" for g in groups]
+        columns += [f"{compiler.metric(m)} AS {_ident(f'__m{i}')}" for i, m in enumerate(metrics)]
+        where = [compiler.predicate(col, op, value) for col, op, value in parse_filters(plan.filters)]
+    except Unsupported:
+        return None
+
+    projection = f"SELECT {', '.join(columns) or '1 AS __one'} FROM {compiler.source}"
+    if where:
+        projection += f" WHERE {' AND '.join(where)}"
+
+    if not groups:
+        return f"WITH src AS ({projection}) SELECT {', '.join(outputs)} FROM src", compiler.params
+
+    keys = ", ".join(_ident(g) for g in groups)
+    # rows with a missing key are dropped by groupby; the row number in key
+    # order is the label pandas gives each group
+    grouped = (
+        f"SELECT {keys}, {', '.join(outputs)}, row_number() OVER (ORDER BY {keys}) - 1 AS __pos"
+        f" FROM src WHERE {' AND '.join(f'{_ident(g)} IS NOT NULL' for g in groups)}"
+        f" GROUP BY {keys}"
+    )
+    order = "__pos"
+    top_k = getattr(plan, "top_k", None)
+    if top_k and sort_by:
+        direction = "DESC" if getattr(plan, "sort_desc", True) else "ASC"
+        order = f"{_ident(sort_by)} {direction} NULLS LAST, __pos LIMIT {int(top_k)}"
+    return f"WITH src AS ({projection}) SELECT * FROM ({grouped}) ORDER BY {order}", compiler.params
+
+
+def execute_aggregation_sql(plan: AnalysisPlan, path: str, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Run an aggregation plan on DuckDB directly over the CSV/Parquet file.
+
+    The result has the columns, index and (where DuckDB allows) dtypes of
+    the pandas result. Returns None when the backend is off, the plan has
+    no exact SQL form, or DuckDB fails; the caller then uses pandas.
+    Directory/glob datasets are declined: their reconciled schema and
+    partition columns have no exact read_csv/read_parquet form.
+    """
+    if not enabled() or not path or is_multi_file(path):
+        return None
+    try:
+        compiled = compile_aggregation(plan, path, df)
+        if compiled is None:
+            return None
+        sql, params = compiled
+        result = _cursor().execute(sql, params).fetchdf()
+    except duckdb.Error:
+        return None
+
+    groups = [c for c in (plan.group_by or []) if c in df.columns]
+    if groups:
+        result.index = pd.Index(result.pop("__pos").astype("int64"))
+        result.index.name = None
+        for g in groups:
+            dtype = df[g].dtype
+            # timestamps, narrowed ints and categoricals (see dataset.memory)
+            # come back from DuckDB as its own types
+            if result[g].dtype != dtype and (dtype.kind in "Mi" or isinstance(dtype, pd.CategoricalDtype)):
+                result[g] = result[g].astype(dtype)
+    return result
@@ -17,7 +17,7 @@ def execute_plan(plan: AnalysisPlan, df: pd.DataFrame) -> pd.DataFrame:
         if aggregation_func not in ["sum", "mean", "count"]:
             raise ValueError(f"Unsupported aggregation function: {aggregation_func}")
 
-        result_df = result_df.groupby(plan.group_by, as_index=False)[plan.metrics].agg(aggregation_func)
+        result_df = result_df.groupby(plan.group_by, as_index=False, observed=True)[plan.metrics].agg(aggregation_func)
 
     else:
         raise ValueError(f"Unsupported task_type: {plan.task_type}")
@@ -1,11 +1,39 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List
 
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from agent.schema.models import AnalysisPlan
+from agent.dataset.cache import dataset_cache
+from agent.dataset.column_cache import datetime_column, numeric_column
+from agent.dataset.loader import (
+    is_parquet,
+    load_dataset_columns,
+    load_dataset_frame,
+    parquet_column_dtypes,
+    partitioned_dataset,
+)
+from agent.dataset.memory import logical_dtypes
+from agent.dataset.parsing import parse_dates
+from agent.dataset.partitions import is_multi_file
+from agent.dataset.zone_maps import ZoneMap, get_zone_map
+from agent.execution.chunked import (
+    STREAMABLE_AGGS,
+    chunk_filter_dtypes,
+    execute_aggregation_chunked,
+    execute_aggregations_chunked,
+    metrics_by_agg,
+)
+from agent.execution.duckdb_backend import execute_aggregation_sql
+from agent.execution.filters import select_rows, take_rows
+from agent.execution.groupby import grouped_aggregate, grouped_aggregate_many
+from agent.execution.incremental import append_lineage, incremental_aggregates
+from agent.execution.logical import Filter, LogicalPlan, TopK, build_logical_plan, choose_engine, optimize
+from agent.execution.pruning import select_partition_files, select_row_groups, select_zone_chunks
+from agent.execution.result_cache import result_cache
+from agent.execution.topk import top_k
+from agent.schema.models import AnalysisPlan, MetricAgg
 
 
 def _ensure_index(df: pd.DataFrame) -> pd.DataFrame:
@@ -15,17 +43,163 @@ def _ensure_index(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def _coerce_numeric(series: pd.Series) -> pd.Series:
-    if series.dtype.kind in "biufc":
-        return series
-
-    s = series.astype(str).str.strip()
-    s = s.replace({"": None, "nan": None, "None": None, "null": None, "NULL": None})
-    s = s.str.replace(",", "", regex=False)
-    s = s.str.replace(r"^\$", "", regex=True)
-    s = s.str.replace(r"%$", "", regex=True)
-    s = s.str.replace(r"^\((.*)\)$", r"-\1", regex=True)
-    return pd.to_numeric(s, errors="coerce")
+def _project(
+    df: pd.DataFrame,
+    columns: List[str],
+    numeric: Iterable[str] = (),
+    datetime: Iterable[str] = (),
+    version: str | None = None,
+) -> pd.DataFrame:
+    """
+    Frame of only the referenced columns (same index as `df`), with `numeric`
+    and `datetime` columns swapped for their cached parsed versions (dates
+    parsed once per dataset `version` when given, see datetime_column).
+    Nothing outside the projection is copied.
+    """
+    numeric, datetime = set(numeric), set(datetime)
+    data = {}
+    for col in dict.fromkeys(columns):
+        if col in numeric:
+            data[col] = numeric_column(df, col)
+        elif col in datetime:
+            data[col] = datetime_column(df, col, version)
+        else:
+            data[col] = df[col]
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+
+def _aggregate(work: pd.DataFrame, groups: List[str], metrics: List[str], agg: str) -> pd.DataFrame:
+    if groups:
+        if agg == "count":
+            return work.groupby(groups, observed=True).size().reset_index(name="count")
+        return work.groupby(groups, observed=True)[metrics].agg(agg).reset_index()
+    if agg == "count":
+        return pd.DataFrame({"count": [len(work)]})
+    return work[metrics].agg(agg).to_frame().T
+
+
+def _aggregate_many(df: pd.DataFrame, groups: List[str], pairs: List[MetricAgg]) -> pd.DataFrame:
+    """
+    Every (metric, agg) pair in one grouped pass, one output column per pair.
+    """
+    metrics = list(dict.fromkeys(p.metric for p in pairs))
+    triples = [(p.metric, p.agg, p.column) for p in pairs]
+
+    if groups and set(groups).isdisjoint(metrics):
+        result = grouped_aggregate_many(
+            df, groups, {m: numeric_column(df, m) for m in metrics}, triples
+        )
+        if result is not None:
+            return result
+
+    work = _project(df, groups + metrics, numeric=metrics)
+    if groups:
+        named = {col: (metric, agg) for metric, agg, col in triples}
+        return work.groupby(groups, observed=True).agg(**named).reset_index()
+    return pd.DataFrame({col: [work[metric].agg(agg)] for metric, agg, col in triples})
+
+
+def _aggregate_incrementally(
+    path: str | None,
+    source: pd.DataFrame,
+    df: pd.DataFrame,
+    plan: AnalysisPlan,
+    groups: List[str],
+    pairs: List[MetricAgg],
+    outputs: List[tuple],
+    trace: List[str],
+    count_rows: bool = False,
+) -> pd.DataFrame | None:
+    """
+    The aggregation of `df` (the filtered rows of `source`) from partials
+    carried across appends to the CSV `source` was loaded from, or None
+    when `source` isn't an appended version (see execution.incremental).
+    """
+    metrics = list(dict.fromkeys(p.metric for p in pairs))
+    if not set(groups).isdisjoint(metrics) or any(p.agg not in STREAMABLE_AGGS for p in pairs):
+        return None
+    mark = append_lineage(path, source)
+    if mark is None:
+        return None
+    variant = dataset_cache.key_for(source).partition(":")[2]
+    work = _project(df, groups + metrics, numeric=metrics)
+    result, note = incremental_aggregates.aggregate(
+        path, variant, plan, mark, work, groups, metrics_by_agg(pairs), outputs, count_rows=count_rows
+    )
+    trace.append(note)
+    return result
+
+
+def _pruned_parts(
+    path: str,
+    filters: Dict[str, Any],
+    dtypes: Dict[str, str] | None,
+    trace: List[str],
+    zones: ZoneMap | None = None,
+) -> Dict[str, List[int]]:
+    """
+    Reader arguments (row_groups= / offsets= / files=) that read only the
+    parts of `path` whose min/max statistics don't rule out `filters`:
+    Parquet row groups, CSV chunks by their `zones` byte offsets, or the
+    files of a directory/glob by their partition values. {} reads it all.
+    Scanned/skipped counts go to the trace.
+    """
+    if not filters:
+        return {}
+    if is_multi_file(path):
+        scan = select_partition_files(partitioned_dataset(path), filters)
+        parts = {"files": scan.kept}
+    elif dtypes is None:
+        return {}
+    elif is_parquet(path):
+        scan = select_row_groups(path, filters, dtypes)
+        parts = {"row_groups": scan.kept}
+    elif zones is not None and zones.offsets:
+        scan = select_zone_chunks(zones, filters, dtypes)
+        parts = {"offsets": [zones.offsets[i] for i in scan.kept]}
+    else:
+        return {}
+    trace.append(scan.describe())
+    return parts if scan.skipped else {}
+
+
+def _chunk_parts(
+    path: str,
+    filters: Dict[str, Any],
+    sample: pd.DataFrame,
+    metrics: List[str],
+    trace: List[str],
+) -> Dict[str, List[int]]:
+    """
+    _pruned_parts for the chunked engine, whose filter columns are typed by
+    `sample` (CSV zone maps are built on the first filtered query).
+    """
+    if not filters:
+        return {}
+    dtypes = chunk_filter_dtypes(sample.dtypes.astype(str).to_dict(), metrics, filters)
+    return _pruned_parts(path, filters, dtypes, trace, get_zone_map(path, sample))
+
+
+def _load_scan(path: str, sample: pd.DataFrame, logical: LogicalPlan, trace: List[str]) -> pd.DataFrame:
+    """
+    The columns the optimized plan scans, read from the file `sample` was
+    planned on (every column when the plan needs them all), skipping the
+    Parquet row groups or partition files its filter can't match.
+    """
+    columns = logical.scan.columns_read
+    if columns is None:
+        return load_dataset_frame(path)
+    wanted = set(columns)
+    # file order; count(*) with no column referenced still needs the rows
+    columns = [c for c in sample.columns if c in wanted] or list(sample.columns[:1])
+
+    flt = logical.find(Filter)
+    parts = {}
+    if flt is not None and is_multi_file(path):
+        parts = _pruned_parts(path, flt.filters, None, trace)
+    elif flt is not None and is_parquet(path):
+        parts = _pruned_parts(path, flt.filters, parquet_column_dtypes(path, columns), trace)
+    return load_dataset_columns(path, columns, **parts)
 
 
 def executor_node(state: dict) -> dict:
@@ -42,16 +216,81 @@ def executor_node(state: dict) -> dict:
         state["confidence"] = float(state.get("confidence", 0.0))
         return state
 
+    try:
+        key = result_cache.key(df, plan)
+        cached = result_cache.get(key) if key else None
+    except Exception as e:
+        return _failed(state, e)
+    if cached is not None:
+        # the planner's confidence for this question wins over the cached one
+        confidence = cached.pop("confidence", 0.0)
+        state.update(cached)
+        state["confidence"] = float(state.get("confidence", confidence))
+        return state
+
+    state = _execute_plan(state, df, plan)
+    if key and not state.get("error"):
+        result_cache.put(key, state)
+    return state
+
+
+def _failed(state: dict, e: Exception) -> dict:
+    # hard fail-safe: never throw to Streamlit
+    state["error"] = f"Execution failed: {e}"
+    state["confidence"] = 0.0
+    return state
+
+
+def _execute_plan(state: dict, df: pd.DataFrame, plan: AnalysisPlan) -> dict:
     task_type = getattr(plan, "task_type", None)
+    # content hash of the dataset `df` was read from (its full frame, a
+    # projection or the planning sample); parsed dates are kept per version
+    frame_key = dataset_cache.key_for(df)
+    version = frame_key.split(":", 1)[0] if frame_key else None
 
     try:
+        # bad filters (unknown operators, scalar "in") raise while planning
+        logical = optimize(build_logical_plan(plan, df))
+        choice = choose_engine(logical, plan, state, df)
+        trace = logical.explain() + [choice.describe()]
+        state["execution_trace"] = trace
+
+        engines = list(choice.ranked)
+        if engines[0] == "duckdb":
+            result = execute_aggregation_sql(plan, state.get("dataset_path"), df)
+            if result is not None:
+                pairs = [p for p in plan.aggregations if p.metric in df.columns]
+                label = ", ".join(dict.fromkeys(p.agg for p in pairs)) if pairs else plan.agg
+                state["result_df"] = result
+                state["explanation"] = f"Executed aggregation ({label})."
+                state["confidence"] = float(state.get("confidence", 0.86))
+                return state
+            # no exact SQL form for this plan: next cheapest engine
+            engines.pop(0)
+            trace.append(f"duckdb declined the plan; using {engines[0]}")
+
+        # chunked: `df` is only a planning sample of a very large file
+        chunked = engines[0] == "chunked"
+        sampled = state.get("execution_mode") in ("projected", "chunked")
+        if engines[0] == "in_memory" and sampled and state.get("dataset_path"):
+            df = _load_scan(state["dataset_path"], df, logical, trace)
+        # unfiltered, as loaded: appended rows are found by their labels
+        source = df
+
+        # the chunked engine filters each chunk as it streams
+        flt = logical.find(Filter)
+        if flt is not None and not chunked:
+            df = take_rows(df, select_rows(df, flt.filters), logical.scan.columns_read)
+
         if task_type == "data_quality":
             dup = int(df.duplicated().sum())
+            # as loaded, not as optimize_memory narrowed them for storage
+            dtypes = logical_dtypes(source)
             schema = {
                 "duplicate_rows": dup,
                 "row_count": int(len(df)),
                 "missing_pct": (df.isna().mean() * 100).round(2).to_dict(),
-                "dtypes": df.dtypes.astype(str).to_dict(),
+                "dtypes": {col: dtypes[col] for col in df.columns},
             }
             state["schema"] = schema
             state["explanation"] = "Executed data_quality."
@@ -75,37 +314,80 @@ def executor_node(state: dict) -> dict:
             return state
 
         if task_type == "aggregation":
-            metrics = [c for c in (plan.metrics or []) if c in df.columns]
             groups = [c for c in (plan.group_by or []) if c in df.columns]
-            agg = getattr(plan, "agg", "sum")
 
-            if agg != "count" and not metrics:
-                state["error"] = "No valid numeric metric columns found for aggregation."
-                return state
-
-            work = df.copy()
-            for m in metrics:
-                work[m] = _coerce_numeric(work[m])
+            if plan.aggregations:
+                pairs = [p for p in plan.aggregations if p.metric in df.columns]
+                if not pairs:
+                    state["error"] = "No valid numeric metric columns found for aggregation."
+                    return state
 
-            if groups:
-                if agg == "count":
-                    result = work.groupby(groups).size().reset_index(name="count")
+                if chunked:
+                    metrics = list(dict.fromkeys(p.metric for p in pairs))
+                    result = execute_aggregations_chunked(
+                        pairs,
+                        state["dataset_path"],
+                        groups=groups,
+                        sample_dtypes=df.dtypes.astype(str).to_dict(),
+                        filters=plan.filters,
+                        **_chunk_parts(state["dataset_path"], plan.filters, df, metrics, trace),
+                    )
                 else:
-                    result = work.groupby(groups)[metrics].agg(agg).reset_index()
+                    outputs = [(p.metric, p.agg, p.column) for p in pairs]
+                    result = _aggregate_incrementally(
+                        state.get("dataset_path"), source, df, plan, groups, pairs, outputs, trace
+                    )
+                    if result is None:
+                        result = _aggregate_many(df, groups, pairs)
+
+                label = ", ".join(dict.fromkeys(p.agg for p in pairs))
             else:
-                if agg == "count":
-                    result = pd.DataFrame({"count": [len(work)]})
-                else:
-                    result = work[metrics].agg(agg).to_frame().T
+                metrics = [c for c in (plan.metrics or []) if c in df.columns]
+                agg = getattr(plan, "agg", "sum")
 
-            top_k = getattr(plan, "top_k", None)
-            sort_desc = bool(getattr(plan, "sort_desc", True))
+                if agg != "count" and not metrics:
+                    state["error"] = "No valid numeric metric columns found for aggregation."
+                    return state
 
-            if top_k and agg != "count" and metrics:
-                result = result.sort_values(by=metrics[0], ascending=not sort_desc).head(int(top_k))
+                if chunked:
+                    result = execute_aggregation_chunked(
+                        plan,
+                        state["dataset_path"],
+                        metrics=metrics,
+                        groups=groups,
+                        sample_dtypes=df.dtypes.astype(str).to_dict(),
+                        **_chunk_parts(state["dataset_path"], plan.filters, df, metrics, trace),
+                    )
+                else:
+                    result = _aggregate_incrementally(
+                        state.get("dataset_path"),
+                        source,
+                        df,
+                        plan,
+                        groups,
+                        [MetricAgg(metric=m, agg=agg) for m in metrics],
+                        [(m, agg, m) for m in metrics],
+                        trace,
+                        count_rows=agg == "count",
+                    )
+                    if result is None and groups and set(groups).isdisjoint(metrics):
+                        # factorized keys are cached, so follow-up aggs skip re-hashing
+                        result = grouped_aggregate(
+                            df, groups, {m: numeric_column(df, m) for m in metrics}, agg
+                        )
+
+                    if result is None:
+                        work = _project(df, groups + metrics, numeric=metrics)
+                        result = _aggregate(work, groups, metrics, agg)
+
+                label = agg
+
+            top = logical.find(TopK)
+            if top is not None:
+                result = top_k(result, top.by, top.k, top.desc)
 
             state["result_df"] = result
-            state["explanation"] = f"Executed aggregation ({agg})."
+            state["explanation"] = f"Executed aggregation ({label})."
             state["confidence"] = float(state.get("confidence", 0.86))
             return state
 
@@ -114,47 +396,57 @@ def executor_node(state: dict) -> dict:
             x = getattr(plan, "x", None)
             y = getattr(plan, "y", None)
 
-            work = df.copy()
-
             # histogram: only needs y
             if chart_type == "hist":
-                if not y or y not in work.columns:
+                if not y or y not in df.columns:
                     state["error"] = "Histogram needs a numeric column. Ask: 'hist <numeric_col>'."
                     return state
-                work[y] = _coerce_numeric(work[y])
                 fig = plt.figure()
-                plt.hist(work[y].dropna())
+                plt.hist(numeric_column(df, y).dropna())
                 plt.title(f"Histogram of {y}")
                 state["fig"] = fig
                 state["explanation"] = "Executed visualization (hist)."
                 state["confidence"] = float(state.get("confidence", 0.9))
                 return state
 
-            # create __index__ if requested
-            if x == "__index__":
-                work = _ensure_index(work)
-
-            if x and x not in work.columns:
+            if x and x != "__index__" and x not in df.columns:
                 state["error"] = f"Invalid plot column x='{x}' not found in dataset."
                 return state
-            if not y or y not in work.columns:
+            if not y or y not in df.columns:
                 state["error"] = f"Invalid plot column y='{y}' not found in dataset."
                 return state
 
-            work[y] = _coerce_numeric(work[y])
+            group_by = [c for c in (plan.group_by or []) if c in df.columns]
+            x_col = [x] if x and x in df.columns else []
 
             # If line chart and x is datetime-ish, try to parse
-            if chart_type == "line" and x and x in work.columns:
-                try:
-                    work[x] = pd.to_datetime(work[x], errors="ignore")
-                except Exception:
-                    pass
+            parse_x = chart_type == "line" and bool(x)
+            cached_x = parse_x and x in df.columns and x != y
+            work = _project(
+                df,
+                group_by + x_col + [y],
+                numeric=[y],
+                datetime=[x] if cached_x else [],
+                version=version,
+            )
+
+            # create __index__ if requested
+            if x == "__index__":
+                work = _ensure_index(work)
+
+            # x derived here (__index__) or shared with y: parse in place
+            if parse_x and not cached_x and x in work.columns:
+                work[x] = parse_dates(work[x], errors="ignore")
 
             # aggregate if group_by provided
-            group_by = [c for c in (plan.group_by or []) if c in work.columns]
             if group_by and y:
                 agg = getattr(plan, "agg", "sum")
-                plot_df = work.groupby(group_by)[y].agg(agg).reset_index()
+                plot_df = None
+                # only when the key and y columns are the untouched dataset columns
+                if y not in group_by and not (parse_x and (x in group_by or x == y)):
+                    plot_df = grouped_aggregate(df, group_by, {y: numeric_column(df, y)}, agg)
+                if plot_df is None:
+                    plot_df = work.groupby(group_by, observed=True)[y].agg(agg).reset_index()
                 x_plot = group_by[0]
             else:
                 plot_df = work
@@ -187,7 +479,4 @@ def executor_node(state: dict) -> dict:
         return state
 
     except Exception as e:
-        # hard fail-safe: never throw to Streamlit
-        state["error"] = f"Execution failed: {e}"
-        state["confidence"] = 0.0
-        return state
+        return _failed(state, e)
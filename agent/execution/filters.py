@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.cache import FrameMemo
+from agent.dataset.parsing import clean_numeric_token
+from agent.execution.groupby import GroupKeys, group_keys_for
+
+
+# a range filter scans its column until the column has been range-filtered
+# this many times on one frame: a one-off range over a high-cardinality
+# column costs less as a scan than a factorize + argsort index
+RANGE_INDEX_MIN_USES = int(os.getenv("RANGE_INDEX_MIN_USES", "2"))
+
+# accepted filter spec keys -> canonical op
+_OPS = {
+    "eq": "eq", "==": "eq",
+    "in": "in",
+    "gt": "gt", ">": "gt",
+    "gte": "gte", ">=": "gte",
+    "lt": "lt", "<": "lt",
+    "lte": "lte", "<=": "lte",
+}
+
+
+def parse_filters(filters: Dict[str, Any]) -> List[Tuple[str, str, Any]]:
+    """
+    AnalysisPlan.filters -> (column, op, value) predicates, all ANDed.
+
+      {"region": "Asia"}                  equality
+      {"region": ["Asia", "Europe"]}      membership
+      {"revenue": {"gte": 100, "lt": 500}} range (gt/gte/lt/lte or >, >=, <, <=)
+    """
+    predicates = []
+    for col, spec in (filters or {}).items():
+        if isinstance(spec, dict):
+            for key, value in spec.items():
+                op = _OPS.get(str(key).lower())
+                if op is None:
+                    raise ValueError(f"Unsupported filter operator '{key}' for column '{col}'.")
+                predicates.append((col, op, list(value) if op == "in" else value))
+        elif isinstance(spec, (list, tuple, set)):
+            predicates.append((col, "in", list(spec)))
+        else:
+            predicates.append((col, "eq", spec))
+    return predicates
+
+
+def _coerce_value(series: pd.Series, value: Any) -> Any:
+    # compare like with like: "1,200" against numbers, "2024-01-01" against dates
+    kind = series.dtype.kind
+    if kind in "iuf" and isinstance(value, str):
+        token = clean_numeric_token(value)
+        return float(token) if token is not None else np.nan
+    if kind == "M" and not isinstance(value, pd.Timestamp):
+        return pd.Timestamp(value)
+    return value
+
+
+def is_text(series: pd.Series) -> bool:
+    """
+    Whether `series` is a coerced text column: str objects, or categoricals
+    of them (see dataset.memory).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.dtype.categories.dtype == object
+    return series.dtype == object
+
+
+def _candidates(series: pd.Series, value: Any) -> List[Any]:
+    value = _coerce_value(series, value)
+    # coerced text columns hold str; let {"year": 2024} match "2024"
+    if is_text(series) and not isinstance(value, str):
+        return [value, str(value)]
+    return [value]
+
+
+class ValueIndex:
+    """
+    Row-id lists per distinct value of one column, built once per frame.
+
+    Reuses the column's cached GroupKeys: rows are ordered by sorted key code,
+    so the rows of one value, and of any value range, are one contiguous
+    slice of `order`. Rows with a missing value are in no list.
+    """
+
+    def __init__(self, df: pd.DataFrame, col: str):
+        self.keys: GroupKeys = group_keys_for(df, [col])
+        self.values = pd.Index(self.keys.keys[col])
+        self.order = self.keys.order
+        self.bounds = np.concatenate(([0], np.cumsum(self.keys.counts)))
+
+    def spans(self, series: pd.Series, op: str, value: Any) -> List[Tuple[int, int]]:
+        """
+        Key-code ranges [lo, hi) matching the predicate.
+        """
+        if op in ("eq", "in"):
+            values = value if op == "in" else [value]
+            wanted = [c for v in values for c in _candidates(series, v)]
+            codes = np.unique(self.values.get_indexer(wanted))
+            return [(k, k + 1) for k in codes[codes >= 0]]
+
+        value = _coerce_value(series, value)
+        n = len(self.values)
+        if op == "gt":
+            lo, hi = self.values.searchsorted(value, side="right"), n
+        elif op == "gte":
+            lo, hi = self.values.searchsorted(value, side="left"), n
+        elif op == "lt":
+            lo, hi = 0, self.values.searchsorted(value, side="left")
+        else:
+            lo, hi = 0, self.values.searchsorted(value, side="right")
+        return [(lo, hi)] if lo < hi else []
+
+    def count(self, spans: List[Tuple[int, int]]) -> int:
+        return int(sum(self.bounds[hi] - self.bounds[lo] for lo, hi in spans))
+
+    def rows(self, spans: List[Tuple[int, int]]) -> np.ndarray:
+        if len(spans) == 1 and spans[0][1] - spans[0][0] == 1:
+            # stable argsort: one value's rows are already ascending
+            lo, hi = spans[0]
+            return self.order[self.bounds[lo]:self.bounds[hi]]
+        parts = [self.order[self.bounds[lo]:self.bounds[hi]] for lo, hi in spans]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+
+class CategoryIndex(ValueIndex):
+    """
+    ValueIndex of a categorical column, straight from its codes: no
+    factorize, and each predicate is decided once per category (as _scan
+    decides it), then read as the rows of the matching codes.
+    """
+
+    def __init__(self, df: pd.DataFrame, col: str):
+        series = df[col]
+        self.values = series.cat.categories
+        ncat = len(self.values)
+        codes = series.cat.codes.to_numpy()
+        # missing values (-1) sort after every category and fall outside `bounds`
+        self.order = np.argsort(np.where(codes >= 0, codes, ncat), kind="stable")
+        counts = np.bincount(codes + 1, minlength=ncat + 1)[1:]
+        self.bounds = np.concatenate(([0], np.cumsum(counts)))
+
+    def spans(self, series: pd.Series, op: str, value: Any) -> List[Tuple[int, int]]:
+        hits = _scan(pd.Series(self.values), op, value)
+        return [(int(k), int(k) + 1) for k in np.flatnonzero(hits)]
+
+
+_value_indexes = FrameMemo()
+_range_uses = FrameMemo()
+
+
+def value_index_for(df: pd.DataFrame, col: str) -> ValueIndex:
+    indexes: Dict[str, ValueIndex] = _value_indexes.get_or_build(df, lambda _: {})
+    index = indexes.get(col)
+    if index is None:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            index = CategoryIndex(df, col)
+        else:
+            index = ValueIndex(df, col)
+        indexes[col] = index
+    return index
+
+
+def _use_index(df: pd.DataFrame, col: str, op: str) -> bool:
+    """
+    Whether to answer a predicate on `df[col]` from its ValueIndex. Range
+    predicates on a non-categorical column only build one once the column
+    is range-filtered repeatedly (RANGE_INDEX_MIN_USES).
+    """
+    if op in ("eq", "in") or isinstance(df[col].dtype, pd.CategoricalDtype):
+        return True
+    indexes = _value_indexes.get(df)
+    if indexes is not None and col in indexes:
+        return True
+    uses: Dict[str, int] = _range_uses.get_or_build(df, lambda _: {})
+    uses[col] = uses.get(col, 0) + 1
+    return uses[col] >= RANGE_INDEX_MIN_USES
+
+
+def _scan(series: pd.Series, op: str, value: Any) -> np.ndarray:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # decide each category once and look rows up by code, so text
+        # predicates behave as on str objects (an unordered categorical
+        # can't be range-compared itself); missing codes (-1) never match
+        hits = _scan(pd.Series(series.cat.categories), op, value)
+        return np.append(hits, False)[series.cat.codes.to_numpy()]
+    if op in ("eq", "in"):
+        values = value if op == "in" else [value]
+        return series.isin([c for v in values for c in _candidates(series, v)]).to_numpy()
+    value = _coerce_value(series, value)
+    if op == "gt":
+        mask = series > value
+    elif op == "gte":
+        mask = series >= value
+    elif op == "lt":
+        mask = series < value
+    else:
+        mask = series <= value
+    return mask.fillna(False).to_numpy(dtype=bool)
+
+
+def filter_mask(df: pd.DataFrame, filters: Dict[str, Any]) -> np.ndarray:
+    """
+    Full-scan boolean mask of `filters`, for chunks and frames seen only once.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in parse_filters(filters):
+        if col not in df.columns:
+            raise ValueError(f"Invalid filter column '{col}' not found in dataset.")
+        mask &= _scan(df[col], op, value)
+    return mask
+
+
+def _intersect(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # both sorted and unique; probe the longer with the shorter, O(a log b)
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0 or len(b) == 0:
+        return a[:0]
+    pos = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[pos] == a]
+
+
+def select_rows(df: pd.DataFrame, filters: Dict[str, Any]) -> np.ndarray:
+    """
+    Sorted positions of the rows matching every filter.
+
+    Each predicate is sized from the column's ValueIndex (built once per
+    frame) and they are applied most selective first: a predicate's row-id
+    list is read from the index while it is no larger than the candidates
+    so far, otherwise it is checked on the candidate rows alone. No column
+    is materialized before the final selection is known. Categoricals are
+    indexed by their codes (CategoryIndex). One-off range predicates on
+    other columns, and predicates the index can't answer (unsortable mixed
+    values), are scanned.
+    """
+    n = len(df)
+    steps = []
+    for col, op, value in parse_filters(filters):
+        if col not in df.columns:
+            raise ValueError(f"Invalid filter column '{col}' not found in dataset.")
+        series = df[col]
+        index: Optional[ValueIndex] = None
+        spans: List[Tuple[int, int]] = []
+        if _use_index(df, col, op):
+            try:
+                index = value_index_for(df, col)
+                spans = index.spans(series, op, value)
+            except (TypeError, ValueError):
+                index = None
+        size = index.count(spans) if index is not None else n
+        steps.append((size, series, op, value, index, spans))
+
+    rows: Optional[np.ndarray] = None
+    for size, series, op, value, index, spans in sorted(steps, key=lambda step: step[0]):
+        if rows is not None and (index is None or len(rows) < size):
+            rows = rows[_scan(series.take(rows), op, value)]
+        elif index is not None:
+            selected = index.rows(spans)
+            rows = selected if rows is None else _intersect(rows, selected)
+        else:
+            rows = np.flatnonzero(_scan(series, op, value))
+        if not len(rows):
+            break
+
+    return np.arange(n) if rows is None else rows
+
+
+def take_rows(df: pd.DataFrame, rows: np.ndarray, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Only `columns` (default: all) of the selected rows, original index kept.
+    """
+    columns = list(df.columns) if columns is None else columns
+    index = df.index.take(rows)
+    return pd.DataFrame(
+        {col: df[col].take(rows) for col in columns}, index=index, columns=columns, copy=False
+    )
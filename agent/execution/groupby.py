@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.cache import FrameMemo
+
+
+# aggregations the kernels below reproduce exactly like DataFrame.groupby
+KERNEL_AGGS = {"sum", "mean", "min", "max", "std", "count"}
+
+# metric dtypes whose result dtypes the kernels match
+_KERNEL_DTYPES = (np.dtype("int64"), np.dtype("float64"))
+
+
+class GroupKeys:
+    """
+    Factorized group keys of one frame for one group_by column list.
+
+    codes:  group number per row (-1 for rows with a missing key, which
+            groupby drops), numbered in sorted key order like groupby(sort=True)
+    keys:   one row per group with the key values
+    counts: rows per group
+    order / starts (lazy): rows sorted by group and where each group begins,
+            for reduceat kernels
+    """
+
+    def __init__(self, df: pd.DataFrame, groups: List[str]):
+        per_column = [pd.factorize(df[g], sort=True, use_na_sentinel=True) for g in groups]
+
+        if len(groups) == 1:
+            # factorize codes are already dense and in sorted key order
+            codes, uniques = per_column[0]
+            self.codes = codes.astype(np.intp, copy=False)
+            key_codes = [np.arange(len(uniques))]
+        else:
+            keep = np.ones(len(df), dtype=bool)
+            for c, _ in per_column:
+                keep &= c >= 0
+
+            dims = tuple(len(uniques) for _, uniques in per_column)
+            if np.prod(dims, dtype=float) >= 2 ** 63:
+                raise OverflowError("too many key combinations")
+            # mixed-radix code: sorted order of combined codes is lexicographic key order
+            flat = np.ravel_multi_index([np.where(keep, c, 0) for c, _ in per_column], dims)
+
+            if np.prod(dims) <= 4 * len(df):
+                present = np.bincount(flat[keep], minlength=int(np.prod(dims))) > 0
+                used = np.flatnonzero(present)
+                renumber = np.cumsum(present) - 1
+                self.codes = np.where(keep, renumber[flat], -1)
+            else:
+                used, inverse = np.unique(flat[keep], return_inverse=True)
+                self.codes = np.full(len(df), -1, dtype=np.intp)
+                self.codes[keep] = inverse
+            key_codes = list(np.unravel_index(used, dims))
+
+        self.ngroups = len(key_codes[0])
+        self.keys = pd.DataFrame(
+            {g: uniques.take(kc) for g, (_, uniques), kc in zip(groups, per_column, key_codes, strict=True)}
+        )
+        self.counts = np.bincount(self.codes[self.codes >= 0], minlength=self.ngroups)
+
+        self._order: Optional[np.ndarray] = None
+        self._categorical: Optional[pd.Categorical] = None
+
+    @property
+    def order(self) -> np.ndarray:
+        if self._order is None:
+            # narrow codes let numpy use radix sort for the stable argsort
+            # (missing keys sort last as code ngroups)
+            narrow = np.min_scalar_type(self.ngroups)
+            codes = np.where(self.codes >= 0, self.codes, self.ngroups).astype(narrow)
+            order = np.argsort(codes, kind="stable")
+            self._order = order[: int(self.counts.sum())]
+        return self._order
+
+    @property
+    def starts(self) -> np.ndarray:
+        return np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+
+    def categorical(self) -> pd.Categorical:
+        """
+        The codes as a Categorical, so pandas kernels can group on them directly.
+        """
+        if self._categorical is None:
+            self._categorical = pd.Categorical.from_codes(
+                self.codes, categories=pd.RangeIndex(self.ngroups)
+            )
+        return self._categorical
+
+
+_group_keys = FrameMemo()
+
+
+def group_keys_for(df: pd.DataFrame, groups: List[str]) -> GroupKeys:
+    """
+    GroupKeys for `groups`, factorized once per frame and reused by every
+    later aggregation over the same columns.
+    """
+    cache: Dict[Tuple[str, ...], GroupKeys] = _group_keys.get_or_build(df, lambda _: {})
+    key = tuple(groups)
+    keys = cache.get(key)
+    if keys is None:
+        keys = GroupKeys(df, groups)
+        cache[key] = keys
+    return keys
+
+
+def _reduce(keys: GroupKeys, values: np.ndarray, agg: str) -> Optional[np.ndarray]:
+    if agg == "count":
+        # non-null values per group
+        kept = keys.codes >= 0
+        if values.dtype.kind == "f":
+            kept &= ~np.isnan(values)
+        return np.bincount(keys.codes[kept], minlength=keys.ngroups).astype("int64")
+
+    if values.dtype.kind == "i":
+        # integer kernels are exact, so they match groupby bit for bit
+        if agg in ("min", "max"):
+            ufunc = np.minimum if agg == "min" else np.maximum
+            return ufunc.reduceat(values[keys.order], keys.starts)
+        if agg == "sum":
+            return np.add.reduceat(values[keys.order], keys.starts)
+        if agg == "mean":
+            kept = keys.codes >= 0
+            totals = np.bincount(keys.codes[kept], weights=values[kept], minlength=keys.ngroups)
+            # float sums of ints are exact below 2**53
+            if np.abs(values).sum(dtype=float) < 2 ** 53:
+                return totals / keys.counts
+
+    if agg in ("min", "max"):
+        # fmin/fmax skip NaN; an all-NaN group stays NaN
+        ufunc = np.fmin if agg == "min" else np.fmax
+        return ufunc.reduceat(values.astype("float64", copy=False)[keys.order], keys.starts)
+
+    if agg in ("sum", "mean", "std"):
+        # groupby's compensated float kernels (Kahan sum, Welford variance),
+        # fed the cached codes instead of re-hashing the key columns
+        grouped = pd.Series(values).groupby(keys.categorical(), observed=True)
+        return getattr(grouped, agg)().to_numpy()
+    return None
+
+
+def grouped_aggregate(
+    df: pd.DataFrame,
+    groups: List[str],
+    values: Dict[str, pd.Series],
+    agg: str,
+) -> Optional[pd.DataFrame]:
+    """
+    df.groupby(groups)[list(values)].agg(agg).reset_index() (or .size() for
+    "count") computed over cached group codes: bincount/reduceat kernels where
+    they are exact, pandas' compensated kernels on the codes for float
+    sum/mean/std, so results match groupby exactly.
+
+    Categorical keys group like groupby(observed=True), which every caller
+    uses: factorize works on their codes and keeps only observed categories.
+
+    Returns None when the kernels don't apply (other aggs, non-numeric
+    metrics, unsortable keys); callers fall back to pandas.
+    """
+    if agg == "count":
+        keys = _group_keys_or_none(df, groups)
+        if keys is None:
+            return None
+        result = keys.keys.copy()
+        result["count"] = keys.counts.astype("int64")
+        return result
+
+    return grouped_aggregate_many(df, groups, values, [(col, agg, col) for col in values])
+
+
+def grouped_aggregate_many(
+    df: pd.DataFrame,
+    groups: List[str],
+    values: Dict[str, pd.Series],
+    pairs: List[Tuple[str, str, str]],
+) -> Optional[pd.DataFrame]:
+    """
+    Several (metric, agg, output column) triples in one grouped pass:
+    the keys are factorized once and every pair reduces over the same codes.
+    "count" counts non-null values, like groupby(...).agg("count").
+    """
+    if any(agg not in KERNEL_AGGS for _, agg, _ in pairs):
+        return None
+    if any(values[metric].dtype not in _KERNEL_DTYPES for metric, _, _ in pairs):
+        return None
+
+    keys = _group_keys_or_none(df, groups)
+    if keys is None:
+        return None
+
+    result = keys.keys.copy()
+    for metric, agg, col in pairs:
+        series = values[metric]
+        if keys.ngroups == 0:
+            dtype = {"count": "int64", "mean": "float64", "std": "float64"}.get(agg, series.dtype)
+            result[col] = series.iloc[:0].astype(dtype)
+            continue
+        out = _reduce(keys, series.to_numpy(), agg)
+        if out is None:
+            return None
+        result[col] = out
+    return result
+
+
+def _group_keys_or_none(df: pd.DataFrame, groups: List[str]) -> Optional[GroupKeys]:
+    if not groups:
+        return None
+    try:
+        return group_keys_for(df, groups)
+    except (TypeError, ValueError, OverflowError):
+        return None
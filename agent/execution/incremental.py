@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from agent.dataset.cache import dataset_cache
+from agent.dataset.incremental import IngestMark, read_ingest_mark
+from agent.dataset.loader import is_parquet
+from agent.dataset.partitions import is_multi_file
+from agent.execution.chunked import aggregation_partials, finalize_partials, merge_partials
+from agent.execution.result_cache import _canonical_plan
+
+
+# (file, variant, plan) triples whose partial aggregates are kept for the next append
+INCREMENTAL_AGG_MAX_ENTRIES = int(os.getenv("INCREMENTAL_AGG_MAX_ENTRIES", "256"))
+
+Partials = Dict[str, Dict[str, pd.DataFrame]]
+
+
+def append_lineage(path: Optional[str], frame: pd.DataFrame) -> Optional[IngestMark]:
+    """
+    The ingest mark of the CSV version `frame` was loaded from, when that
+    version is a pure append to an earlier one and `frame` (unfiltered) is
+    labelled by row position, so appended rows are those labelled past the
+    earlier row count. Projections read the mark of the frame they project.
+    """
+    if not path or is_multi_file(path) or is_parquet(path):
+        return None
+    key = dataset_cache.key_for(frame)
+    if key is None:
+        return None
+    version, _, variant = key.partition(":")
+    mark = read_ingest_mark(path, variant.split(":", 1)[0])
+    if mark is None or not mark.previous or version != mark.version:
+        return None
+    index = frame.index
+    positional = isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+    return mark if positional and len(index) == mark.rows else None
+
+
+class _State:
+    def __init__(self, version: str, rows: int, partials: Partials):
+        self.version = version
+        self.rows = rows
+        self.partials = partials
+
+
+class IncrementalAggregates:
+    """
+    Mergeable partial aggregates (sum/count/min/max, Welford moments for
+    mean/std) of aggregation plans over append-only CSVs, keyed by
+    (file, variant, plan) rather than by content, so the next version of
+    the file's frame finds them; raw and coerced frames type values
+    differently and never share partials. A version that appends to the
+    stored one only aggregates its new rows and merges them in.
+    """
+
+    def __init__(self, max_entries: int = INCREMENTAL_AGG_MAX_ENTRIES):
+        self.max_entries = int(max_entries)
+        self._states: "OrderedDict[Tuple[str, str, str], _State]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.merges = 0
+        self.rebuilds = 0
+
+    def aggregate(
+        self,
+        path: str,
+        variant: str,
+        plan,
+        mark: IngestMark,
+        work: pd.DataFrame,
+        groups: List[str],
+        by_agg: Dict[str, List[str]],
+        outputs: List[Tuple[str, str, str]],
+        count_rows: bool = False,
+    ) -> Tuple[pd.DataFrame, str]:
+        """
+        Result of the plan over `work` (the typed, filtered rows of version
+        `mark.version` of the `variant` frame, positionally labelled) and a
+        trace line saying how it was reached.
+        """
+        key = (os.path.abspath(path), variant, _canonical_plan(plan))
+        with self._lock:
+            state = self._states.get(key)
+
+        if state is not None and state.version == mark.version:
+            partials, how = state.partials, "reused partials of this version"
+        elif state is not None and state.version == mark.previous and state.rows == mark.previous_rows:
+            appended = work[work.index >= state.rows]
+            partials = merge_partials(
+                state.partials, aggregation_partials(appended, groups, by_agg, count_rows)
+            )
+            how = f"merged {len(appended):,} appended rows into partials of {mark.previous_rows:,}"
+            self.merges += 1
+        else:
+            partials = aggregation_partials(work, groups, by_agg, count_rows)
+            how = f"partials rebuilt over {mark.rows:,} rows"
+            self.rebuilds += 1
+
+        with self._lock:
+            self._states[key] = _State(mark.version, mark.rows, partials)
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+        result = finalize_partials(partials, groups, outputs, count_rows)
+        return result, f"incremental aggregate: {how}"
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._states), "merges": self.merges, "rebuilds": self.rebuilds}
+
+
+incremental_aggregates = IncrementalAggregates()
@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from agent.dataset.loader import CHUNK_ROWS, CHUNKED_EXECUTION_MIN_BYTES, is_parquet
+from agent.dataset.partitions import dataset_files, is_multi_file
+from agent.execution import duckdb_backend
+from agent.execution.chunked import STREAMABLE_AGGS
+from agent.execution.filters import parse_filters
+from agent.schema.models import AnalysisPlan, MetricAgg
+
+
+class LogicalOp:
+    """
+    One step of a LogicalPlan. `columns()` are the input columns it reads.
+    """
+
+    name = "op"
+
+    def columns(self) -> List[str]:
+        return []
+
+    def describe(self) -> str:
+        return self.name
+
+
+class Scan(LogicalOp):
+    name = "scan"
+
+    def __init__(self, columns: Optional[List[str]] = None):
+        # None = every column
+        self.columns_read = columns
+
+    def describe(self) -> str:
+        return f"scan {self.columns_read if self.columns_read is not None else '*'}"
+
+
+class Coerce(LogicalOp):
+    name = "coerce"
+
+    def __init__(self, numeric: List[str], datetime: List[str] = ()):
+        self.numeric = list(numeric)
+        self.datetime = list(datetime)
+
+    def columns(self) -> List[str]:
+        return self.numeric + self.datetime
+
+    def describe(self) -> str:
+        parts = [f"numeric={self.numeric}"] if self.numeric else []
+        parts += [f"datetime={self.datetime}"] if self.datetime else []
+        return f"coerce {' '.join(parts)}"
+
+
+class Filter(LogicalOp):
+    name = "filter"
+
+    def __init__(self, filters: Dict[str, Any]):
+        self.filters = filters
+        self.predicates = parse_filters(filters)
+
+    def columns(self) -> List[str]:
+        return list(dict.fromkeys(col for col, _, _ in self.predicates))
+
+    def describe(self) -> str:
+        return "filter " + " AND ".join(f"{col} {op} {value!r}" for col, op, value in self.predicates)
+
+
+class Aggregate(LogicalOp):
+    name = "aggregate"
+
+    def __init__(self, groups: List[str], pairs: List[MetricAgg], count_rows: bool = False):
+        self.groups = groups
+        self.pairs = pairs
+        # single-agg "count": group sizes, no metric read
+        self.count_rows = count_rows
+
+    def columns(self) -> List[str]:
+        return list(dict.fromkeys(self.groups + [p.metric for p in self.pairs]))
+
+    def describe(self) -> str:
+        what = "size()" if self.count_rows else ", ".join(f"{p.agg}({p.metric})" for p in self.pairs)
+        return f"aggregate {what} by {self.groups or '(all rows)'}"
+
+
+class Sort(LogicalOp):
+    name = "sort"
+
+    def __init__(self, by: str, desc: bool):
+        self.by = by
+        self.desc = desc
+
+    def describe(self) -> str:
+        return f"sort {self.by} {'desc' if self.desc else 'asc'}"
+
+
+class Limit(LogicalOp):
+    name = "limit"
+
+    def __init__(self, k: int):
+        self.k = k
+
+    def describe(self) -> str:
+        return f"limit {self.k}"
+
+
+class TopK(LogicalOp):
+    """
+    Sort + Limit fused: a partial selection of k rows (topk.top_k) instead
+    of a full sort; ties keep row order.
+    """
+
+    name = "top_k"
+
+    def __init__(self, by: str, desc: bool, k: int):
+        self.by = by
+        self.desc = desc
+        self.k = k
+
+    def describe(self) -> str:
+        return f"top_k {self.k} by {self.by} {'desc' if self.desc else 'asc'}"
+
+
+class Render(LogicalOp):
+    name = "render"
+
+    def __init__(self, kind: str, columns: Optional[List[str]] = None):
+        self.kind = kind
+        # None = the render step looks at every column (summary, data_quality)
+        self.columns_used = columns
+
+    def columns(self) -> List[str]:
+        return list(self.columns_used or [])
+
+    def describe(self) -> str:
+        return f"render {self.kind}"
+
+
+class LogicalPlan:
+    """
+    scan -> coerce -> filter -> aggregate -> sort -> limit -> render, built
+    naively from an AnalysisPlan and then rewritten by OPTIMIZER_PASSES.
+    """
+
+    def __init__(self, ops: List[LogicalOp]):
+        self.ops = ops
+        self.applied: List[str] = []
+
+    def find(self, cls) -> Optional[LogicalOp]:
+        return next((op for op in self.ops if isinstance(op, cls)), None)
+
+    @property
+    def scan(self) -> Scan:
+        return self.ops[0]
+
+    def explain(self) -> List[str]:
+        lines = [op.describe() for op in self.ops]
+        if self.applied:
+            lines.append(f"passes: {', '.join(self.applied)}")
+        return lines
+
+
+def build_logical_plan(plan: AnalysisPlan, df: pd.DataFrame) -> LogicalPlan:
+    """
+    The unoptimized plan: every column scanned and coerced before filtering.
+    Column lists only keep columns the frame has, as the executor does.
+    """
+    present = lambda cols: [c for c in dict.fromkeys(cols) if c and c in df.columns]
+    task_type = plan.task_type
+    ops: List[LogicalOp] = [Scan()]
+
+    coerce: Optional[Coerce] = None
+    middle: List[LogicalOp] = []
+    render = Render(task_type)
+
+    if task_type == "aggregation":
+        groups = present(plan.group_by or [])
+        if plan.aggregations:
+            pairs = [p for p in plan.aggregations if p.metric in df.columns]
+            aggregate = Aggregate(groups, pairs)
+            sort_by = pairs[0].column if pairs else None
+        else:
+            metrics = present(plan.metrics or [])
+            agg = getattr(plan, "agg", "sum")
+            aggregate = Aggregate(
+                groups, [MetricAgg(metric=m, agg=agg) for m in metrics], count_rows=agg == "count"
+            )
+            sort_by = metrics[0] if agg != "count" and metrics else None
+        if not aggregate.count_rows:
+            coerce = Coerce([p.metric for p in aggregate.pairs])
+        middle.append(aggregate)
+        if plan.top_k and sort_by:
+            middle += [Sort(sort_by, bool(plan.sort_desc)), Limit(int(plan.top_k))]
+        render = Render("table", aggregate.columns())
+
+    elif task_type == "visualization":
+        y = plan.y if plan.y in df.columns else None
+        x = plan.x if plan.x in df.columns else None
+        parse_x = plan.chart_type == "line" and x is not None and x != y
+        coerce = Coerce([y] if y else [], [x] if parse_x else [])
+        groups = present(plan.group_by or [])
+        if groups and y and plan.chart_type != "hist":
+            middle.append(Aggregate(groups, [MetricAgg(metric=y, agg=plan.agg)]))
+        render = Render(plan.chart_type or "bar", present(groups + [x, y]))
+
+    elif task_type == "summary" and plan.metrics:
+        # describe() of the named metrics only
+        render = Render(task_type, present(plan.metrics))
+
+    if coerce is not None and coerce.columns():
+        ops.append(coerce)
+    if plan.filters:
+        ops.append(Filter(plan.filters))
+    return LogicalPlan(ops + middle + [render])
+
+
+def push_down_predicates(lp: LogicalPlan) -> bool:
+    """
+    Filter right after the scan, so every later step (coercion included)
+    only sees surviving rows. A column the filter compares must be typed
+    first, so its coercion stays ahead of the filter.
+    """
+    flt, coerce = lp.find(Filter), lp.find(Coerce)
+    if flt is None or coerce is None or lp.ops.index(flt) < lp.ops.index(coerce):
+        return False
+
+    compared = set(flt.columns())
+    before = Coerce([c for c in coerce.numeric if c in compared], [c for c in coerce.datetime if c in compared])
+    after = Coerce([c for c in coerce.numeric if c not in compared], [c for c in coerce.datetime if c not in compared])
+
+    lp.ops.remove(flt)
+    at = lp.ops.index(coerce)
+    replacement = [op for op in (before, flt, after) if op is flt or op.columns()]
+    lp.ops[at:at + 1] = replacement
+    return True
+
+
+def prune_projection(lp: LogicalPlan) -> bool:
+    """
+    Scan only the columns some later step reads.
+    """
+    render = lp.find(Render)
+    if render is not None and render.columns_used is None:
+        return False
+    needed = [c for op in lp.ops[1:] for c in op.columns()]
+    lp.scan.columns_read = list(dict.fromkeys(needed))
+    return True
+
+
+def fuse_top_k(lp: LogicalPlan) -> bool:
+    """
+    Sort followed by Limit -> TopK.
+    """
+    for i, op in enumerate(lp.ops[:-1]):
+        nxt = lp.ops[i + 1]
+        if isinstance(op, Sort) and isinstance(nxt, Limit):
+            lp.ops[i:i + 2] = [TopK(op.by, op.desc, nxt.k)]
+            return True
+    return False
+
+
+OPTIMIZER_PASSES: List[Tuple[str, Callable[[LogicalPlan], bool]]] = [
+    ("predicate_pushdown", push_down_predicates),
+    ("projection_pruning", prune_projection),
+    ("top_k_fusion", fuse_top_k),
+]
+
+
+def optimize(lp: LogicalPlan) -> LogicalPlan:
+    for name, rewrite in OPTIMIZER_PASSES:
+        if rewrite(lp):
+            lp.applied.append(name)
+    return lp
+
+
+# --- cost model ---------------------------------------------------------------
+
+# single-core throughput of each engine's scan, MiB of file per second
+# (measured on this code path; DuckDB's scan also scales with cores)
+_SCAN_MIB_PER_S = {
+    ("pandas", "csv"): 60.0,
+    ("pandas", "parquet"): 70.0,
+    ("duckdb", "csv"): 95.0,
+    ("duckdb", "parquet"): 160.0,
+}
+# in-memory pandas work per row and column read
+_ROW_COLUMN_SECONDS = 20e-9
+# fixed cost of compiling and starting a DuckDB query
+_DUCKDB_OVERHEAD_SECONDS = 0.03
+# rough CSV bytes per value, to estimate rows of a file seen only as a sample
+_BYTES_PER_VALUE = 12
+# building the pandas columns of a loaded projection, per MiB kept resident
+# (8 bytes per value read)
+_RESIDENT_SECONDS_PER_MIB = 0.004
+# per streamed chunk: reader call, aligning its types, merging its partials
+_CHUNK_OVERHEAD_SECONDS = 0.005
+
+
+class EngineChoice:
+    """
+    Engines the plan can run on, cheapest first, with estimated seconds.
+    Equal estimates keep the order costs were added in (in_memory, chunked,
+    duckdb): a loaded frame stays cached for the next question.
+    """
+
+    def __init__(self, costs: Dict[str, float], reason: str):
+        self.costs = costs
+        self.ranked = sorted(costs, key=costs.get)
+        self.reason = reason
+
+    @property
+    def engine(self) -> str:
+        return self.ranked[0]
+
+    def describe(self) -> str:
+        estimates = ", ".join(f"{e}~{self.costs[e] * 1000:.0f}ms" for e in self.ranked)
+        return f"engine {self.engine} ({estimates}; {self.reason})"
+
+
+def choose_engine(lp: LogicalPlan, plan: AnalysisPlan, state: dict, df: pd.DataFrame) -> EngineChoice:
+    """
+    Pick "in_memory", "chunked" or "duckdb" from dataset stats.
+
+    In-memory is only a candidate when the frame is resident or the file
+    fits the in-memory budget (or nothing else can run the plan); chunked
+    needs streamable aggregations; duckdb needs EXECUTION_BACKEND=duckdb.
+    """
+    path = state.get("dataset_path")
+    # projected/chunked: `df` is only the schema sample of the file
+    resident = state.get("execution_mode") not in ("projected", "chunked") or not path
+    if not path or plan.task_type != "aggregation":
+        return EngineChoice({"in_memory": 0.0}, "frame only" if not path else plan.task_type)
+
+    multi_file = is_multi_file(path)
+    files = dataset_files(path) if multi_file else [path]
+    try:
+        file_bytes = sum(os.path.getsize(f) for f in files)
+    except OSError:
+        return EngineChoice({"in_memory": 0.0}, "file unavailable")
+
+    fmt = "parquet" if all(is_parquet(f) for f in files) else "csv"
+    total_columns = max(len(df.columns), 1)
+    read = lp.scan.columns_read
+    # Parquet reads only the projected columns; CSV parses whole lines
+    fraction = (len(read) / total_columns if read is not None else 1.0) if fmt == "parquet" else 1.0
+    scanned_mib = file_bytes * fraction / 1024 ** 2
+
+    rows = len(df) if resident else file_bytes / (_BYTES_PER_VALUE * total_columns)
+    compute = rows * max(len(read or []), 1) * _ROW_COLUMN_SECONDS
+
+    aggregate = lp.find(Aggregate)
+    aggs = {"count"} if aggregate is None or aggregate.count_rows else {p.agg for p in aggregate.pairs}
+    streamable = aggs <= STREAMABLE_AGGS
+
+    scan = scanned_mib / _SCAN_MIB_PER_S[("pandas", fmt)]
+    costs: Dict[str, float] = {}
+    if resident:
+        costs["in_memory"] = compute
+    elif file_bytes < CHUNKED_EXECUTION_MIN_BYTES or not streamable:
+        # loads only the scanned columns (executor._load_scan) and keeps them
+        resident_mib = rows * (len(read) if read is not None else total_columns) * 8 / 1024 ** 2
+        costs["in_memory"] = scan + resident_mib * _RESIDENT_SECONDS_PER_MIB + compute
+    if streamable:
+        # holds one chunk at a time but pays a fixed cost per chunk
+        chunks = max(math.ceil(rows / CHUNK_ROWS), 1)
+        costs["chunked"] = scan + chunks * _CHUNK_OVERHEAD_SECONDS + compute
+    if duckdb_backend.enabled() and not multi_file:
+        threads = os.cpu_count() or 1
+        costs["duckdb"] = _DUCKDB_OVERHEAD_SECONDS + scanned_mib / (_SCAN_MIB_PER_S[("duckdb", fmt)] * threads)
+
+    reason = f"{'resident frame' if resident else 'file only'}, {file_bytes / 1024 ** 2:.0f} MiB {fmt}, ~{rows:,.0f} rows"
+    if duckdb_backend.missing():
+        reason += "; EXECUTION_BACKEND=duckdb but duckdb is not installed (pip install -r requirements-duckdb.txt)"
+    return EngineChoice(costs, reason)
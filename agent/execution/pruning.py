@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.partitions import PartitionedDataset
+from agent.dataset.zone_maps import ColumnZones, ZoneMap
+from agent.execution.filters import _candidates, _coerce_value, filter_mask, parse_filters
+
+
+# text a missing value becomes in a coerced (astype(str)) text column
+_NULL_TEXTS = ("None", "nan")
+
+
+class PrunedScan:
+    """
+    Parts of a dataset (Parquet row groups, CSV zone-map chunks, partition
+    files) whose min/max statistics or partition values don't rule out every
+    filter. Always at least one part, so a plan that matches no rows still
+    sees a (filtered-empty) frame of the right shape.
+    """
+
+    def __init__(self, kept: List[int], total: int, unit: str, by: str = "min/max statistics"):
+        self.kept = kept
+        self.total = total
+        self.unit = unit
+        self.by = by
+
+    @property
+    def skipped(self) -> int:
+        return self.total - len(self.kept)
+
+    def describe(self) -> str:
+        return (
+            f"{self.unit}: scanned {len(self.kept)} of {self.total}, "
+            f"skipped {self.skipped} by {self.by}"
+        )
+
+
+def _kept(total: int, may_match) -> List[int]:
+    kept = [i for i in range(total) if may_match(i)]
+    return kept if kept or not total else [0]
+
+
+def _stat_kind(arrow_type, dtype: Optional[str]) -> Optional[str]:
+    """
+    How a column's statistics compare with its coerced values: "number",
+    "text" or "time"; None when coercion changes what they mean.
+    """
+    import pyarrow as pa
+
+    if dtype is None:
+        return None
+    try:
+        dtype = pd.api.types.pandas_dtype(dtype)
+    except TypeError:
+        return None
+    if isinstance(dtype, pd.CategoricalDtype):
+        return None
+    if (pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)) and dtype.kind in "iuf":
+        return "number"
+    if (pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)) and dtype.kind == "O":
+        return "text"
+    if pa.types.is_timestamp(arrow_type) and dtype.kind == "M":
+        return "time"
+    return None
+
+
+def _zone_kind(column: Optional[ColumnZones], dtype: Optional[str]) -> Optional[str]:
+    if column is None or dtype is None:
+        return None
+    try:
+        kind = pd.api.types.pandas_dtype(dtype).kind
+    except TypeError:
+        return None
+    if column.kind == "number" and kind in "iuf":
+        return "number"
+    if column.kind == "text" and kind == "O" and dtype == "object":
+        return "text"
+    return None
+
+
+def _usable(kind: str, value: Any) -> bool:
+    if kind == "text":
+        return isinstance(value, str)
+    if kind == "time":
+        return isinstance(value, pd.Timestamp) and value is not pd.NaT
+    return isinstance(value, (int, float, np.number)) and not pd.isna(value)
+
+
+def _operand(kind: str, dtype: str, op: str, value: Any) -> Optional[Any]:
+    """
+    The filter value as the executor compares it (see filters._scan), or
+    None when statistics can't decide the predicate.
+    """
+    probe = pd.Series([], dtype=dtype)
+    if op in ("eq", "in"):
+        values = value if op == "in" else [value]
+        try:
+            wanted = [c for v in values for c in _candidates(probe, v)]
+        except (TypeError, ValueError):
+            return None
+        if kind == "text":
+            # non-text candidates never equal a coerced text value
+            wanted = [c for c in wanted if isinstance(c, str)]
+        if not wanted or not all(_usable(kind, c) for c in wanted):
+            return None
+        return wanted
+    try:
+        value = _coerce_value(probe, value)
+    except (TypeError, ValueError):
+        return None
+    return value if _usable(kind, value) else None
+
+
+def _holds(x: Any, op: str, operand: Any) -> bool:
+    if op in ("eq", "in"):
+        return x in operand
+    if op == "gt":
+        return x > operand
+    if op == "gte":
+        return x >= operand
+    if op == "lt":
+        return x < operand
+    return x <= operand
+
+
+def _may_match(lo: Any, hi: Any, null_count: Optional[int], kind: str, op: str, operand: Any) -> bool:
+    """
+    False only when no value in [lo, hi] (plus `null_count` missing values,
+    None = unknown) can satisfy the predicate.
+    """
+    if lo is None or hi is None:
+        return True
+    if kind == "number" and (pd.isna(lo) or pd.isna(hi)):
+        return True
+    if kind == "text" and (null_count is None or null_count > 0):
+        # missing values are compared as their text form
+        if any(_holds(text, op, operand) for text in _NULL_TEXTS):
+            return True
+    try:
+        if op in ("eq", "in"):
+            return any(lo <= c <= hi for c in operand)
+        if op in ("gt", "gte"):
+            return _holds(hi, op, operand)
+        return _holds(lo, op, operand)
+    except TypeError:
+        return True
+
+
+def _bounds(stats) -> Tuple[Any, Any, Optional[int]]:
+    # pyarrow column-chunk statistics -> (min, max, null count)
+    if stats is None or not stats.has_min_max:
+        return None, None, None
+    return stats.min, stats.max, stats.null_count if stats.has_null_count else None
+
+
+def select_row_groups(path: str, filters: Dict[str, Any], dtypes: Dict[str, str]) -> PrunedScan:
+    """
+    Row groups of the Parquet file at `path` that may hold rows matching
+    `filters`. `dtypes` are the dtypes the filter columns have when the
+    filters are evaluated; a predicate is only checked against statistics
+    when that comparison means the same thing on the raw column.
+    """
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    meta = pf.metadata
+    leaves = {meta.schema.column(j).path: j for j in range(meta.num_columns)}
+    schema = pf.schema_arrow
+
+    checks: List[Tuple[int, str, str, Any]] = []
+    for col, op, value in parse_filters(filters):
+        if col not in leaves or schema.get_field_index(col) < 0:
+            continue
+        kind = _stat_kind(schema.field(col).type, dtypes.get(col))
+        operand = _operand(kind, dtypes[col], op, value) if kind else None
+        if operand is not None:
+            checks.append((leaves[col], kind, op, operand))
+
+    def may_match(g: int) -> bool:
+        group = meta.row_group(g)
+        return all(
+            _may_match(*_bounds(group.column(j).statistics), kind, op, operand)
+            for j, kind, op, operand in checks
+        )
+
+    return PrunedScan(_kept(meta.num_row_groups, may_match), meta.num_row_groups, "parquet row groups")
+
+
+def select_zone_chunks(zones: ZoneMap, filters: Dict[str, Any], dtypes: Dict[str, str]) -> PrunedScan:
+    """
+    Chunks of a CSV whose zone maps may hold rows matching `filters`,
+    evaluated with the filter columns' `dtypes` (as in select_row_groups).
+    """
+    checks: List[Tuple[ColumnZones, str, str, Any]] = []
+    for col, op, value in parse_filters(filters):
+        column = zones.columns.get(col)
+        kind = _zone_kind(column, dtypes.get(col))
+        operand = _operand(kind, dtypes[col], op, value) if kind else None
+        if operand is not None:
+            checks.append((column, kind, op, operand))
+
+    def may_match(i: int) -> bool:
+        # text zones were taken over the coerced text, missing values included
+        return all(
+            _may_match(c.mins[i], c.maxs[i], 0 if kind == "text" else c.nulls[i], kind, op, operand)
+            for c, kind, op, operand in checks
+        )
+
+    return PrunedScan(_kept(len(zones.rows), may_match), len(zones.rows), "csv zone-map chunks")
+
+
+def select_partition_files(dataset: PartitionedDataset, filters: Dict[str, Any]) -> PrunedScan:
+    """
+    Files of a partitioned dataset whose partition values satisfy the
+    filters on partition columns, evaluated exactly as the executor
+    evaluates them on the rows (each file is one row of constant values).
+    """
+    wanted = {col: spec for col, spec in (filters or {}).items() if col in dataset.partitions.columns}
+    total = len(dataset.files)
+    if not wanted:
+        return PrunedScan(list(range(total)), total, "partition files", by="partition values")
+    mask = filter_mask(dataset.partitions, wanted)
+    return PrunedScan(_kept(total, lambda i: bool(mask[i])), total, "partition files", by="partition values")
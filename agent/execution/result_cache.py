@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from agent.dataset.cache import dataset_cache
+
+
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+
+# evicted entries are spilled here when set (disabled by default)
+RESULT_CACHE_SPILL_DIR = os.getenv("RESULT_CACHE_SPILL_DIR", "")
+RESULT_CACHE_SPILL_MAX_BYTES = int(os.getenv("RESULT_CACHE_SPILL_MAX_BYTES", str(1024 ** 3)))
+
+# executor outputs replayed on a hit
+_RESULT_KEYS = (
+    "schema", "result_df", "fig", "figure_path", "explanation", "confidence", "execution_trace",
+)
+
+
+def _canonical_plan(plan: Any) -> str:
+    if hasattr(plan, "model_dump"):
+        plan = plan.model_dump()
+    return json.dumps(plan, sort_keys=True, default=str)
+
+
+class ResultCache:
+    """
+    Size-aware LRU cache of executor outputs keyed by
+    (dataset content hash + load variant, canonical AnalysisPlan).
+
+    Entries are stored pickled, so every hit hands out fresh result frames
+    and figures, sizes are exact, and evicted entries can be spilled to disk
+    as-is and promoted back on the next lookup.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        spill_dir: str = RESULT_CACHE_SPILL_DIR,
+        spill_max_bytes: int = RESULT_CACHE_SPILL_MAX_BYTES,
+    ):
+        self.max_bytes = int(max_bytes)
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = int(spill_max_bytes)
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+
+    def key(self, df: pd.DataFrame, plan: Any) -> Optional[str]:
+        """
+        None when `df` was not loaded through the dataset cache
+        (its content is then unknown and results are not cached).
+        """
+        frame_key = dataset_cache.key_for(df)
+        if frame_key is None:
+            return None
+        h = hashlib.blake2b(digest_size=16)
+        h.update(frame_key.encode("utf-8"))
+        h.update(b"\x1f")
+        h.update(_canonical_plan(plan).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                blob = self._read_spill(key)
+                if blob is None:
+                    self.misses += 1
+                    return None
+                self.disk_hits += 1
+                if len(blob) <= self.max_bytes:
+                    self._store(key, blob)
+
+        try:
+            return pickle.loads(blob)
+        except Exception:
+            return None
+
+    def put(self, key: str, state: Dict[str, Any]) -> None:
+        entry = {k: state[k] for k in _RESULT_KEYS if k in state}
+        try:
+            blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # e.g. an unpicklable artist in a figure; just don't cache it
+            return
+        with self._lock:
+            self._store(key, blob)
+
+    def _store(self, key: str, blob: bytes) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+
+        if len(blob) > self.max_bytes:
+            self._spill(key, blob)
+            return
+
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, old_blob = self._entries.popitem(last=False)
+            self._bytes -= len(old_blob)
+            self.evictions += 1
+            self._spill(old_key, old_blob)
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.result.pkl")
+
+    def _read_spill(self, key: str) -> Optional[bytes]:
+        if not self.spill_dir:
+            return None
+        try:
+            with open(self._spill_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _spill(self, key: str, blob: bytes) -> None:
+        if not self.spill_dir or len(blob) > self.spill_max_bytes:
+            return
+        tmp_path = None
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix=".pkl.tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, self._spill_path(key))
+            self.spills += 1
+            self._prune_spill()
+        except OSError:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _prune_spill(self) -> None:
+        # drop the oldest spilled results once the directory is over budget
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(".result.pkl"):
+                st = os.stat(os.path.join(self.spill_dir, name))
+                files.append((st.st_mtime_ns, st.st_size, name))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.spill_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "spills": self.spills,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+result_cache = ResultCache()
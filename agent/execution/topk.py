@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def top_k_positions(values: np.ndarray, k: int, desc: bool = True) -> np.ndarray:
+    """
+    Positions of the k largest (desc) or smallest values, best first.
+
+    Ties are ordered by position, so a tie at the cut goes to the earlier
+    row; missing values (NaN) rank after every real value. argpartition
+    finds the cut in O(n) and only the k winners are sorted.
+    """
+    n = len(values)
+    k = max(0, min(int(k), n))
+    valid = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(n, dtype=bool)
+    positions = np.flatnonzero(valid) if not valid.all() else np.arange(n)
+    vals = values[positions]
+    take = min(k, len(vals))
+
+    if take == 0:
+        chosen = np.empty(0, dtype=np.intp)
+    elif take < len(vals):
+        cut = len(vals) - take if desc else take - 1
+        kth = np.partition(vals, cut)[cut]
+        better = np.flatnonzero(vals > kth if desc else vals < kth)
+        tied = np.flatnonzero(vals == kth)[: take - len(better)]
+        chosen = np.sort(np.concatenate([better, tied]))
+    else:
+        chosen = np.arange(len(vals))
+
+    # rank codes instead of negating values, so int64 extremes can't overflow;
+    # stable sort keeps ties in position order
+    codes = np.unique(vals[chosen], return_inverse=True)[1].reshape(-1)
+    order = np.argsort(-codes if desc else codes, kind="stable")
+    best = positions[chosen[order]]
+
+    if len(best) < k:
+        best = np.concatenate([best, np.flatnonzero(~valid)[: k - len(best)]])
+    return best
+
+
+def top_k(result: pd.DataFrame, by: str, k: int, desc: bool = True) -> pd.DataFrame:
+    """
+    The k best rows of `result` by `by`, like sort_values(by).head(k)
+    but without sorting every row, and with ties in row order.
+    """
+    values = result[by].to_numpy()
+    if values.dtype.kind not in "iufb":
+        # text or mixed columns: a stable full sort has the same tie order
+        return result.sort_values(by=by, ascending=not desc, kind="stable").head(k)
+    return result.iloc[top_k_positions(values, k, desc)]
@@ -1,6 +1,9 @@
 import pandas as pd
 from typing import Dict, Any
 
+from agent.dataset.memory import logical_dtypes
+from agent.dataset.parsing import parse_dates, parse_numeric
+
 
 def preprocess_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
     """
@@ -29,8 +32,11 @@ def preprocess_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
 
     for col in df.columns:
         if "date" in col:
+            parsed = parse_dates(df[col])
+            if parsed.dtype.kind != "M":
+                continue
             before_na = df[col].isna().sum()
-            df[col] = pd.to_datetime(df[col], errors="coerce")
+            df[col] = parsed
             after_na = df[col].isna().sum()
             if after_na > before_na:
                 audit_log.append(f"Parsed '{col}' as datetime (invalid values set to NaT).")
@@ -39,16 +45,7 @@ def preprocess_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
 
     for col in df.columns:
         if df[col].dtype == "object":
-            cleaned = (
-                df[col]
-                .astype(str)
-                .str.replace(",", "", regex=False)
-                .str.replace("$", "", regex=False)
-                .str.replace("₹", "", regex=False)
-                .str.replace("%", "", regex=False)
-                .replace({"nan": None, "None": None, "": None})
-            )
-            converted = pd.to_numeric(cleaned, errors="ignore")
+            converted = parse_numeric(df[col], errors="ignore")
             if converted.dtype != df[col].dtype:
                 df[col] = converted
                 audit_log.append(f"Converted '{col}' to numeric where possible.")
@@ -58,7 +55,7 @@ def preprocess_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
         "columns": int(len(df.columns)),
         "duplicates": int(df.duplicated().sum()),
         "null_percent": ((df.isna().sum() / max(len(df), 1)) * 100).round(2).to_dict(),
-        "dtypes": df.dtypes.astype(str).to_dict(),
+        "dtypes": logical_dtypes(df),
         "shape_change": {
             "before": list(original_shape),
             "after": list(df.shape),
@@ -1,7 +1,11 @@
 import pandas as pd
 
+from agent.dataset.profile import DatasetProfile, get_profile
+
+
+def infer_dataset_capabilities(df: pd.DataFrame, profile: DatasetProfile | None = None):
+    profile = profile or get_profile(df)
 
-def infer_dataset_capabilities(df: pd.DataFrame):
     numeric_columns = df.select_dtypes(include="number").columns.tolist()
     categorical_columns = df.select_dtypes(
         include=["object", "category"]
@@ -11,7 +15,5 @@ def infer_dataset_capabilities(df: pd.DataFrame):
         "numeric_columns": numeric_columns,
         "categorical_columns": categorical_columns,
         "row_count": len(df),
-        "unique_counts": {
-            col: df[col].nunique() for col in df.columns
-        },
+        "unique_counts": profile.unique_counts(),
     }
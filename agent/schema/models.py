@@ -7,6 +7,16 @@ from pydantic import BaseModel, Field
 TaskType = Literal["aggregation", "summary", "data_quality", "visualization"]
 
 
+class MetricAgg(BaseModel):
+    metric: str
+    agg: str = "sum"               # sum/mean/min/max/count/std
+
+    @property
+    def column(self) -> str:
+        # output column name in the result frame
+        return f"{self.metric}_{self.agg}"
+
+
 class AnalysisPlan(BaseModel):
     task_type: TaskType
 
@@ -20,6 +30,10 @@ class AnalysisPlan(BaseModel):
     top_k: Optional[int] = None
     sort_desc: bool = True
 
+    # several (metric, agg) pairs computed in one grouped pass;
+    # when set, the executor uses these instead of metrics/agg
+    aggregations: List[MetricAgg] = Field(default_factory=list)
+
     # viz params
     chart_type: Optional[str] = None   # bar/line/hist/scatter
     x: Optional[str] = None
@@ -4,19 +4,18 @@ from typing import Any, Dict, Optional
 
 import pandas as pd
 
+from agent.core.plan_cache import plan_cache
 from agent.core.planner import planner_node
+from agent.dataset.loader import choose_execution_mode, load_raw_frame, load_schema_sample
+from agent.dataset.profile import get_profile, get_streamed_profile
 from agent.execution.executor import executor_node
+from agent.execution.result_cache import result_cache
 
 
-def _schema_preview(df: pd.DataFrame) -> Dict[str, Any]:
-    return {
-        "columns": df.columns.tolist(),
-        "dtypes": df.dtypes.astype(str).to_dict(),
-        "row_count": len(df),
-        "missing_pct": (df.isna().mean() * 100).round(2).to_dict(),
-        "unique_counts": df.nunique(dropna=True).to_dict(),
-        "sample_rows": df.head(5).to_dict(orient="records"),
-    }
+def _schema_preview(df: pd.DataFrame, dataset_path: str, execution_mode: str) -> Dict[str, Any]:
+    if execution_mode == "chunked":
+        return get_streamed_profile(dataset_path, df).to_schema()
+    return get_profile(df, dataset_path, variant="raw").to_schema()
 
 
 def run_analysis(
@@ -24,6 +23,7 @@ def run_analysis(
     dataset_path: str,
     preview_only: bool = False,
     previous_plan: Optional[dict] = None,
+    developer_mode: bool = False,
 ) -> Dict[str, Any]:
     """
     Main orchestration:
@@ -32,16 +32,22 @@ def run_analysis(
       3) execute plan
       4) return UI-friendly payload
     """
-    df = pd.read_csv(dataset_path)
+    execution_mode = choose_execution_mode(dataset_path)
+    if execution_mode == "chunked":
+        df = load_schema_sample(dataset_path)
+    else:
+        df = load_raw_frame(dataset_path)
 
     if preview_only:
-        return {"schema": _schema_preview(df), "confidence": 1.0}
+        return {"schema": _schema_preview(df, dataset_path, execution_mode), "confidence": 1.0}
 
  
     state: Dict[str, Any] = {
         "question": question,
         "df": df,
         "previous_plan": previous_plan,
+        "dataset_path": dataset_path,
+        "execution_mode": execution_mode,
     }
 
     state = planner_node(state)
@@ -67,7 +73,9 @@ def run_analysis(
     if getattr(plan, "group_by", None):
         if plan.group_by:
             explanation += f" Grouped by: {plan.group_by[0]}."
-    if getattr(plan, "agg", None):
+    if getattr(plan, "aggregations", None):
+        explanation += f" Aggregations: {', '.join(dict.fromkeys(p.agg for p in plan.aggregations))}."
+    elif getattr(plan, "agg", None):
         if plan.agg:
             explanation += f" Aggregation: {plan.agg}."
 
@@ -86,5 +94,10 @@ def run_analysis(
         out["fig"] = state["fig"]  # Streamlit can render this
     if "figure_path" in state:
         out["figure_path"] = state["figure_path"]  # CLI can use this
+    if developer_mode:
+        if "execution_trace" in state:
+            out["execution_trace"] = state["execution_trace"]
+        out["plan_cache"] = plan_cache.stats()
+        out["result_cache"] = result_cache.stats()
 
     return out
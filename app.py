@@ -5,6 +5,7 @@ import tempfile
 import streamlit as st
 
 from graph import app  
+from agent.dataset.cache import cache_stats
 
 
 st.set_page_config(page_title="Data Analysis Agent", layout="wide")
@@ -91,6 +92,10 @@ with st.expander("Dataset schema preview", expanded=False):
     else:
         st.info("Schema preview not available.")
 
+if dev_mode:
+    with st.sidebar.expander("Dataset cache", expanded=False):
+        st.json(cache_stats())
+
 
 for msg in st.session_state.chat:
     with st.chat_message(msg["role"]):
@@ -111,6 +116,16 @@ for msg in st.session_state.chat:
                 with st.expander("Plan", expanded=False):
                     st.json(res["plan"])
 
+            if dev_mode and "execution_trace" in res:
+                with st.expander("Execution plan", expanded=False):
+                    st.code("\n".join(res["execution_trace"]))
+            if dev_mode and "plan_cache" in res:
+                with st.expander("Plan cache", expanded=False):
+                    st.json(res["plan_cache"])
+            if dev_mode and "result_cache" in res:
+                with st.expander("Result cache", expanded=False):
+                    st.json(res["result_cache"])
+
             # schema output (from data_quality etc.)
             if show_schema and "schema" in res:
                 with st.expander("Schema output", expanded=False):
@@ -145,6 +160,7 @@ if prompt:
                 "question": prompt,
                 "preview_only": False,
                 "previous_plan": st.session_state.previous_plan,
+                "developer_mode": dev_mode,
             }
         )
         result = out.get("result", {}) or {}
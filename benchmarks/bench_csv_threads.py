@@ -0,0 +1,92 @@
+"""
+Whole-file CSV parse time: pd.read_csv against read_csv_arrow (Arrow's
+multi-threaded reader) at 1, 4, 16 and 32 parser threads.
+
+    python -m benchmarks.bench_csv_threads                 # generated files
+    python -m benchmarks.bench_csv_threads data/big.csv    # your own
+
+Measured scaling: none. Every run so far was on a 1-CPU host, where thread
+counts above 1 only measure oversubscription. The latest run there
+(--rows 2000000, best of 3, ms):
+
+    file              MiB  pandas   x1   x4  x16  x32
+    narrow.csv         48     653  418  563  506  550
+    money_text.csv     18     610  552  555  540  450
+
+Arrow single-threaded beats pandas by 10-35%. The x4-x32 columns are
+scheduling noise, not a speedup. Run this on a multi-core machine to
+measure scaling; the script prints the core count next to the results.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from functools import partial
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from agent.dataset.arrow_csv import read_csv_arrow
+
+
+THREADS = [1, 4, 16, 32]
+
+
+def generated_files(directory: str, rows: int) -> List[str]:
+    rng = np.random.default_rng(0)
+    narrow = pd.DataFrame({
+        "id": np.arange(rows),
+        "price": rng.normal(100, 25, rows).round(4),
+        "qty": rng.integers(0, 1000, rows),
+        "region": rng.choice(["North", "South", "East", "West"], rows),
+    })
+    money = pd.DataFrame({
+        "store": rng.choice([f"s{i}" for i in range(500)], rows // 2),
+        "revenue": [f"${v:,.2f}" for v in rng.uniform(0, 1e6, rows // 2)],
+    })
+    paths = []
+    for name, frame in [("narrow", narrow), ("money_text", money)]:
+        path = os.path.join(directory, f"{name}.csv")
+        frame.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def best_of(repeat: int, read: Callable[[], object]) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if read() is None:
+            raise SystemExit("read_csv_arrow declined the file (pandas would be used)")
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"cores: {os.cpu_count()}; best of {args.repeat} (ms)")
+    print(f"{'file':<24}{'MiB':>6}{'pandas':>8}" + "".join(f"{'x' + str(t):>7}" for t in THREADS))
+    with tempfile.TemporaryDirectory() as directory:
+        for path in args.paths or generated_files(directory, args.rows):
+            mib = os.path.getsize(path) / 1024 ** 2
+            row = f"{os.path.basename(path)[:23]:<24}{mib:>6.0f}"
+            # partial binds this iteration's path and thread count
+            row += f"{best_of(args.repeat, partial(pd.read_csv, path)):>8.0f}"
+            for threads in THREADS:
+                row += f"{best_of(args.repeat, partial(read_csv_arrow, path, threads=threads)):>7.0f}"
+            print(row)
+    if (os.cpu_count() or 1) < max(THREADS):
+        print(f"note: thread counts above {os.cpu_count()} exceed the cores here and show oversubscription, not scaling")
+
+
+if __name__ == "__main__":
+    main()
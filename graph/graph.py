@@ -1,13 +1,24 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 import pandas as pd
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
 
+from agent.core.plan_cache import plan_cache
 from agent.core.planner import planner_node
+from agent.dataset.cache import dataset_cache
+from agent.dataset.loader import (
+    SAMPLE_ROWS,
+    choose_execution_mode,
+    load_dataset_frame,
+    load_planning_sample,
+    load_schema_sample,
+)
+from agent.dataset.profile import get_profile, get_streamed_profile
 from agent.execution.executor import executor_node
+from agent.execution.result_cache import result_cache
 
 
 class State(TypedDict, total=False):
@@ -16,9 +27,12 @@ class State(TypedDict, total=False):
     question: Optional[str]
     preview_only: bool
     previous_plan: Optional[dict]
+    developer_mode: bool
 
     # working
     df: Optional[pd.DataFrame]
+    # in_memory | projected (df is the schema sample) | chunked
+    execution_mode: str
     plan: Any
     confidence: float
 
@@ -28,6 +42,8 @@ class State(TypedDict, total=False):
     fig: Any
     figure_path: str
     explanation: str
+    # optimized logical plan + engine choice, shown in developer mode
+    execution_trace: List[str]
 
     # error
     error: str
@@ -36,49 +52,6 @@ class State(TypedDict, total=False):
     result: Dict[str, Any]
 
 
-def _clean_numeric_like(series: pd.Series) -> pd.Series:
-    """
-    Convert numeric-looking strings like "18,000" "$1,200" "(300)" to floats.
-    Leaves non-numeric columns untouched.
-    """
-    if series.dtype.kind in "biufc":
-        return series
-
-    s = series.astype(str).str.strip()
-
-    # treat obvious null tokens
-    s = s.replace({"": None, "nan": None, "None": None, "null": None, "NULL": None})
-
-    # remove commas/currency/percent
-    s = s.str.replace(",", "", regex=False)
-    s = s.str.replace(r"^\$", "", regex=True)
-    s = s.str.replace(r"%$", "", regex=True)
-
-    # parentheses negative: (123) -> -123
-    s = s.str.replace(r"^\((.*)\)$", r"-\1", regex=True)
-
-    return pd.to_numeric(s, errors="ignore")
-
-
-def _auto_type_coerce(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Best-effort type cleanup so plots/aggregation don't explode on "18,000".
-    Only converts object columns that look mostly numeric.
-    """
-    out = df.copy()
-    for col in out.columns:
-        if out[col].dtype == "object":
-            cleaned = _clean_numeric_like(out[col])
-
-            # convert if majority became numeric
-            numeric_ratio = pd.to_numeric(cleaned, errors="coerce").notna().mean()
-            if numeric_ratio >= 0.7:
-                out[col] = pd.to_numeric(cleaned, errors="coerce")
-            else:
-                out[col] = out[col].astype(str)
-    return out
-
-
 class DataLoaderNode:
     def __call__(self, state: State) -> State:
         path = state.get("dataset_path")
@@ -86,9 +59,27 @@ class DataLoaderNode:
             return {"error": "dataset_path missing"}
 
         try:
-            df = pd.read_csv(path)
-            df = _auto_type_coerce(df)
-            return {"df": df}
+            mode = choose_execution_mode(path)
+            if mode == "chunked":
+                # too large for RAM: plan on a sample, executor streams the file
+                df = load_schema_sample(path)
+            elif state.get("preview_only"):
+                # the preview profiles every column
+                df = load_dataset_frame(path)
+            else:
+                # cache hit => already-coerced frame, no re-parse; otherwise plan
+                # on a sample typed as the whole file and let the executor read
+                # only the plan's columns. A head coerced on its own can type a
+                # column differently from the file, so without the file's
+                # types the full frame is loaded.
+                df = dataset_cache.peek(path, variant="coerced")
+                if df is None:
+                    df = load_planning_sample(path)
+                    if df is None:
+                        df = load_dataset_frame(path)
+                    elif len(df) >= SAMPLE_ROWS:
+                        mode = "projected"
+            return {"df": df, "execution_mode": mode}
         except Exception as e:
             return {"error": f"Failed to load CSV: {e}"}
 
@@ -99,14 +90,12 @@ class SchemaPreviewNode:
         if df is None:
             return {"error": "No df found for schema preview."}
 
-        schema = {
-            "columns": df.columns.tolist(),
-            "dtypes": df.dtypes.astype(str).to_dict(),
-            "row_count": int(len(df)),
-            "missing_pct": (df.isna().mean() * 100).round(2).to_dict(),
-            "unique_counts": df.nunique(dropna=True).to_dict(),
-            "sample_rows": df.head(5).to_dict(orient="records"),
-        }
+        if state.get("execution_mode") == "chunked":
+            # whole-file stats in one streaming pass; df is only the planning sample
+            profile = get_streamed_profile(state["dataset_path"], df)
+        else:
+            profile = get_profile(df, state.get("dataset_path"), variant="coerced")
+        schema = profile.to_schema()
 
         result = {
             "schema": schema,
@@ -169,6 +158,11 @@ class ResponseBuilderNode:
             result["fig"] = state["fig"]
         if "figure_path" in state:
             result["figure_path"] = state["figure_path"]
+        if state.get("developer_mode"):
+            if "execution_trace" in state:
+                result["execution_trace"] = state["execution_trace"]
+            result["plan_cache"] = plan_cache.stats()
+            result["result_cache"] = result_cache.stats()
 
         return {"result": result}
 
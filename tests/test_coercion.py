@@ -0,0 +1,26 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from agent.dataset import coercion
+from agent.dataset.coercion import auto_type_coerce
+
+
+def test_sampled_numeric_column_is_confirmed_on_every_value(monkeypatch):
+    # numbers at the head, text for the last 35%: the full column fails the threshold
+    df = pd.DataFrame({"a": [str(i) for i in range(650)] + [f"t{i}" for i in range(350)]})
+    monkeypatch.setattr(coercion, "infer_column_types", lambda frame: {"a": "numeric"})
+
+    out = auto_type_coerce(df)
+
+    assert out["a"].dtype == object
+    assert out["a"].iloc[-1] == "t349"
+
+
+def test_mostly_numeric_column_is_converted():
+    df = pd.DataFrame({"a": ["$1,200", "3", "(4)", "n/a"] * 100})
+
+    out = auto_type_coerce(df)
+
+    assert out["a"].dtype.kind == "f"
+    assert out["a"].iloc[:3].tolist() == [1200.0, 3.0, -4.0]
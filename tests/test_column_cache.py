@@ -0,0 +1,29 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from agent.dataset.column_cache import datetime_column
+from agent.dataset.parsing import parse_dates
+
+
+def test_dates_seen_in_a_subset_first_match_a_fresh_parse():
+    full = pd.DataFrame({"d": ["2024-01-05", "2024-02-06", "March 3, 2024", "2024-04-07", None]})
+    subset = full.iloc[:2]
+
+    # the subset locks "%Y-%m-%d", which "March 3, 2024" doesn't fit
+    assert str(datetime_column(subset, "d", version="subset-first").dtype) == "datetime64[ns]"
+    parsed = datetime_column(full, "d", version="subset-first")
+
+    expected = parse_dates(full["d"], errors="ignore")
+    assert str(parsed.dtype) == "datetime64[ns]"
+    assert str(expected.dtype) == "datetime64[ns]"
+    pd.testing.assert_series_equal(parsed, expected)
+
+
+def test_dates_that_never_parse_are_returned_unchanged():
+    full = pd.DataFrame({"d": ["2024-01-05", "2024-02-06", "not a date"]})
+
+    datetime_column(full.iloc[:2], "d", version="unparseable")
+    parsed = datetime_column(full, "d", version="unparseable")
+
+    pd.testing.assert_series_equal(parsed, full["d"])
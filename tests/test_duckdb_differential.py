@@ -0,0 +1,101 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("duckdb")
+
+from agent.dataset.loader import load_dataset_frame, load_raw_frame
+from agent.execution import duckdb_backend
+from agent.execution.executor import executor_node
+from agent.schema.models import AnalysisPlan, MetricAgg
+
+
+ROWS = 48
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    lines = ["region,store_id,channel,note,units,revenue"]
+    for i in range(ROWS):
+        region = ["North", "South", "East", "West"][i % 4]
+        channel = ["web", "store", ""][i % 3]
+        note = "" if i % 5 == 0 else f"n{i}"
+        revenue = f"{(i * 37) % 100 + 0.25 * (i % 4):.2f}"
+        if i % 7 == 0:
+            revenue = f'"${revenue}"'
+        lines.append(f"{region},{i % 3 + 1},{channel},{note},{(i * 7) % 11},{revenue}")
+    path = tmp_path_factory.mktemp("duckdb") / "sales.csv"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _frame(path, variant):
+    return load_dataset_frame(path) if variant == "coerced" else load_raw_frame(path)
+
+
+def _comparable(frame):
+    frame = frame.copy()
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype(object)
+    return frame
+
+
+def _plan(**kwargs):
+    return AnalysisPlan(task_type="aggregation", **kwargs)
+
+
+PLANS = {}
+for _agg in sorted(duckdb_backend.SQL_AGGS):
+    PLANS[f"{_agg}"] = _plan(metrics=["revenue"], agg=_agg)
+    PLANS[f"{_agg}-by-region"] = _plan(metrics=["revenue", "units"], group_by=["region"], agg=_agg)
+    PLANS[f"{_agg}-by-store"] = _plan(metrics=["units"], group_by=["store_id"], agg=_agg)
+PLANS.update({
+    "many": _plan(aggregations=[
+        MetricAgg(metric="revenue", agg="sum"),
+        MetricAgg(metric="units", agg="mean"),
+        MetricAgg(metric="revenue", agg="std"),
+        MetricAgg(metric="units", agg="count"),
+    ]),
+    "many-by-store": _plan(group_by=["store_id"], aggregations=[
+        MetricAgg(metric="revenue", agg="max"),
+        MetricAgg(metric="revenue", agg="min"),
+        MetricAgg(metric="units", agg="sum"),
+    ]),
+    "filter-in-and-range": _plan(
+        metrics=["revenue"], group_by=["region"], filters={"region": ["North", "East"], "units": {"gte": 3}}
+    ),
+    "filter-narrow-int": _plan(metrics=["revenue"], group_by=["region"], agg="mean", filters={"store_id": 2}),
+    "filter-text-with-missing": _plan(metrics=["units"], group_by=["store_id"], filters={"channel": "web"}),
+    "top-k": _plan(metrics=["revenue"], group_by=["region"], top_k=2),
+    "top-k-ascending": _plan(metrics=["units"], group_by=["store_id"], agg="max", top_k=2, sort_desc=False),
+    "by-text-with-missing": _plan(metrics=["revenue"], group_by=["channel"], agg="mean"),
+    "by-unique-text-with-missing": _plan(metrics=["units"], group_by=["note"], top_k=5),
+    "by-two-keys": _plan(metrics=["revenue"], group_by=["region", "store_id"], agg="max"),
+})
+
+
+@pytest.mark.parametrize("variant", ["coerced", "raw"])
+@pytest.mark.parametrize("name", sorted(PLANS))
+def test_duckdb_matches_pandas(dataset, variant, name, monkeypatch):
+    plan = PLANS[name]
+    df = _frame(dataset, variant)
+
+    monkeypatch.setattr(duckdb_backend, "EXECUTION_BACKEND", "pandas")
+    state = executor_node({"df": df, "plan": plan.model_copy(deep=True), "dataset_path": dataset})
+    assert not state.get("error"), state.get("error")
+    expected = state["result_df"]
+
+    monkeypatch.setattr(duckdb_backend, "EXECUTION_BACKEND", "duckdb")
+    result = duckdb_backend.execute_aggregation_sql(plan, dataset, df)
+    assert result is not None, "duckdb declined the plan"
+
+    pd.testing.assert_frame_equal(
+        _comparable(result), _comparable(expected), check_dtype=False, check_index_type=False
+    )
+
+
+def test_coerced_frame_has_narrow_and_categorical_keys(dataset):
+    df = load_dataset_frame(dataset)
+
+    assert isinstance(df["region"].dtype, pd.CategoricalDtype)
+    assert df["store_id"].dtype.kind == "i" and df["store_id"].dtype.itemsize < 8
@@ -0,0 +1,116 @@
+from functools import partial
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from agent.dataset.cache import dataset_cache
+from agent.dataset.loader import load_dataset_frame, load_planning_sample, load_schema_sample
+from agent.execution import chunked, executor, logical
+from agent.execution.executor import executor_node
+from agent.execution.result_cache import result_cache
+from agent.schema.models import AnalysisPlan
+
+
+ROWS = 3000
+# planning samples see only the head, where several columns look different
+SAMPLE = 500
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    # columns whose head says something else than the whole file
+    df = pd.DataFrame({
+        "region": [["North", "South", "East", "West"][i % 4] for i in range(ROWS)],
+        "units": [(i * 7) % 11 for i in range(ROWS)],
+        "late_text": [str(i % 2) if i < 1000 else f"t{i % 3}" for i in range(ROWS)],
+        "sparse": ["" if i < 1200 else "xy"[i % 2] for i in range(ROWS)],
+        "late_numbers": [f"n{i}" if i < SAMPLE else str(i % 97) for i in range(ROWS)],
+        "price": [str(i) if i < 2000 else f"{i}.5" for i in range(ROWS)],
+    })
+    path = tmp_path_factory.mktemp("modes") / "drift.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _plan(**kwargs):
+    return AnalysisPlan(task_type="aggregation", **kwargs)
+
+
+PLANS = {
+    "sum-by-late-text": _plan(metrics=["units"], group_by=["late_text"]),
+    "count-by-sparse": _plan(metrics=["units"], group_by=["sparse"], agg="count"),
+    "mean-price-by-region": _plan(metrics=["price"], group_by=["region"], agg="mean"),
+    "sum-late-numbers-by-region": _plan(metrics=["late_numbers"], group_by=["region"]),
+    "filter-late-text": _plan(metrics=["units"], group_by=["region"], filters={"late_text": "t1"}),
+    "filter-sparse": _plan(metrics=["price"], agg="max", filters={"sparse": ["x"]}),
+    "filter-price-range": _plan(
+        metrics=["units"], group_by=["late_text"], agg="mean", filters={"price": {"gte": 2500}}
+    ),
+    "filter-late-numbers-range": _plan(
+        metrics=["units"], group_by=["region"], agg="count", filters={"late_numbers": {"lt": 50}}
+    ),
+    "top-k-by-late-text": _plan(metrics=["price"], group_by=["late_text"], top_k=2),
+}
+
+# mode the data loader hands the executor -> engine the plan must run on
+MODES = {
+    "chunked": ("chunked", "chunked"),
+    "projected": ("projected", "in_memory"),
+    "projected-streamed": ("projected", "chunked"),
+}
+
+
+def _comparable(frame):
+    frame = frame.copy()
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype(object)
+    return frame.reset_index(drop=True)
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+@pytest.mark.parametrize("name", sorted(PLANS))
+def test_sampled_modes_match_in_memory(dataset, mode, name, monkeypatch):
+    plan = PLANS[name]
+    execution_mode, engine = MODES[mode]
+    # every run executes; a cached result would hide the engine under test
+    monkeypatch.setattr(result_cache, "key", lambda df, plan: None)
+
+    full = load_dataset_frame(dataset)
+    state = executor_node({"df": full, "plan": plan.model_copy(deep=True), "dataset_path": dataset})
+    assert not state.get("error"), state.get("error")
+    expected = state["result_df"]
+
+    # as a later process sees the file: its Arrow store, nothing resident
+    dataset_cache.clear()
+    if execution_mode == "chunked":
+        sample = load_schema_sample(dataset, nrows=SAMPLE)
+        monkeypatch.setattr(logical, "CHUNKED_EXECUTION_MIN_BYTES", 1)
+    else:
+        sample = load_planning_sample(dataset, nrows=SAMPLE)
+        assert sample is not None
+    if engine == "chunked":
+        monkeypatch.setattr(logical, "_RESIDENT_SECONDS_PER_MIB", 10.0)
+        # several chunks, the first typed unlike the file by its own values
+        monkeypatch.setattr(
+            executor, "execute_aggregation_chunked", partial(chunked.execute_aggregation_chunked, chunk_rows=700)
+        )
+        monkeypatch.setattr(
+            executor, "execute_aggregations_chunked", partial(chunked.execute_aggregations_chunked, chunk_rows=700)
+        )
+    else:
+        monkeypatch.setattr(logical, "CHUNK_ROWS", 1)
+
+    state = executor_node({
+        "df": sample,
+        "plan": plan.model_copy(deep=True),
+        "dataset_path": dataset,
+        "execution_mode": execution_mode,
+    })
+    assert not state.get("error"), state.get("error")
+    assert any(line.startswith(f"engine {engine} ") for line in state["execution_trace"])
+
+    pd.testing.assert_frame_equal(
+        _comparable(state["result_df"]), _comparable(expected), check_dtype=False, check_index_type=False
+    )
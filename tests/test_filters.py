@@ -0,0 +1,51 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+from agent.execution import filters
+from agent.execution.filters import CategoryIndex, filter_mask, select_rows
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 5000
+    region = pd.Series(rng.choice(["North", "South", "East", "West", "nan"], n), dtype=object)
+    return pd.DataFrame({
+        "region": region.astype("category"),
+        "code": pd.Series(rng.choice(["7", "8", "9"], n)).astype("category"),
+        "price": rng.normal(100, 20, n),
+        "units": rng.integers(0, 50, n).astype(np.int8),
+    })
+
+
+@pytest.mark.parametrize("spec", [
+    {"region": "East"},
+    {"region": ["North", "nan", "Mars"]},
+    {"region": {"gte": "N"}},
+    {"code": 8},
+    {"region": "West", "price": {"gt": 110}},
+    {"units": {"lt": 10}, "region": ["South", "East"]},
+    {"price": {"gte": 90, "lte": 95}},
+])
+def test_select_rows_matches_a_full_scan(frame, spec):
+    expected = np.flatnonzero(filter_mask(frame, spec))
+
+    np.testing.assert_array_equal(select_rows(frame, spec), expected)
+    # again, now that indexes may exist
+    np.testing.assert_array_equal(select_rows(frame, spec), expected)
+
+
+def test_categoricals_are_indexed_by_their_codes(frame):
+    select_rows(frame, {"region": "East"})
+
+    assert isinstance(filters._value_indexes.get(frame)["region"], CategoryIndex)
+
+
+def test_one_off_range_filter_builds_no_index(frame):
+    select_rows(frame, {"price": {"gt": 120}})
+    assert "price" not in (filters._value_indexes.get(frame) or {})
+
+    select_rows(frame, {"price": {"gt": 130}})
+    assert "price" in filters._value_indexes.get(frame)
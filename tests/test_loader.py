@@ -0,0 +1,46 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from agent.dataset.coercion import auto_type_coerce
+from agent.dataset.loader import align_chunk_types, iter_raw_chunks, read_raw, streamed_coerced_dtypes
+
+
+@pytest.fixture
+def drifting_csv(tmp_path):
+    # columns whose head says something else than the whole file
+    rows = 3000
+    df = pd.DataFrame({
+        "id": range(rows),
+        "late_text": [str(i % 2) if i < 1000 else f"t{i % 3}" for i in range(rows)],
+        "sparse": ["" if i < 1200 else "xy"[i % 2] for i in range(rows)],
+        "late_numbers": [f"n{i}" if i < 500 else str(i) for i in range(rows)],
+        "floats_later": [str(i) if i < 2000 else f"{i}.5" for i in range(rows)],
+        "flags": [i % 2 == 0 for i in range(rows)],
+    })
+    path = tmp_path / "drift.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_streamed_dtypes_match_a_full_load(drifting_csv):
+    expected = auto_type_coerce(read_raw(drifting_csv)).dtypes.astype(str).to_dict()
+
+    assert streamed_coerced_dtypes(drifting_csv, chunk_rows=500) == expected
+
+
+def test_chunks_typed_by_whole_file_types_match_a_full_load(drifting_csv):
+    full = auto_type_coerce(read_raw(drifting_csv))
+    dtypes = streamed_coerced_dtypes(drifting_csv, chunk_rows=500)
+
+    chunks = [align_chunk_types(c, dtypes) for c in iter_raw_chunks(drifting_csv, chunk_rows=500)]
+
+    pd.testing.assert_frame_equal(pd.concat(chunks), full)
+
+
+def test_values_a_column_type_cannot_hold_are_reported(drifting_csv):
+    chunk = next(iter_raw_chunks(drifting_csv, columns=["late_text"], chunk_rows=500))
+    chunk["late_text"] = "text"
+
+    with pytest.raises(ValueError, match="late_text"):
+        align_chunk_types(chunk, {"late_text": "int64"})
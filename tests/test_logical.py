@@ -0,0 +1,33 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from agent.execution import logical
+from agent.execution.logical import build_logical_plan, choose_engine, optimize
+from agent.schema.models import AnalysisPlan
+
+
+@pytest.fixture
+def projected(tmp_path):
+    path = tmp_path / "sales.csv"
+    pd.DataFrame({"region": ["North", "South"] * 500, "units": range(1000)}).to_csv(path, index=False)
+    sample = pd.read_csv(path, nrows=10)
+    plan = AnalysisPlan(task_type="aggregation", metrics=["units"], group_by=["region"], agg="sum")
+    state = {"dataset_path": str(path), "execution_mode": "projected"}
+    return optimize(build_logical_plan(plan, sample)), plan, state, sample
+
+
+def test_projected_engines_are_costed_apart(projected):
+    choice = choose_engine(*projected)
+
+    assert set(choice.costs) == {"in_memory", "chunked"}
+    assert choice.costs["in_memory"] != choice.costs["chunked"]
+
+
+def test_chunk_overhead_ranks_the_chunked_engine(projected, monkeypatch):
+    monkeypatch.setattr(logical, "CHUNK_ROWS", 1)
+    assert choose_engine(*projected).engine == "in_memory"
+
+    monkeypatch.setattr(logical, "CHUNK_ROWS", 10 ** 6)
+    monkeypatch.setattr(logical, "_CHUNK_OVERHEAD_SECONDS", 0.0)
+    assert choose_engine(*projected).engine == "chunked"
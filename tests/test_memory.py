@@ -0,0 +1,68 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from agent.dataset.columnar import columnar_metadata, read_columnar, write_columnar
+from agent.dataset.loader import load_dataset_frame
+from agent.dataset.memory import footprint_metadata, logical_dtypes, optimize_memory, restore_footprint
+from agent.execution.executor import executor_node
+from agent.schema.models import AnalysisPlan
+
+
+ROWS = 40
+
+
+def _coerced():
+    return pd.DataFrame({
+        "region": ["North", "South"] * (ROWS // 2),
+        "units": list(range(ROWS)),
+        "whole": [float(i) for i in range(ROWS)],
+        "price": [i + 0.5 for i in range(ROWS)],
+    })
+
+
+def test_optimized_frame_reports_coerced_dtypes():
+    df = _coerced()
+    optimized = optimize_memory(df)
+
+    assert str(optimized["units"].dtype) == "int8"
+    assert isinstance(optimized["region"].dtype, pd.CategoricalDtype)
+    assert logical_dtypes(optimized) == df.dtypes.astype(str).to_dict()
+
+
+def test_store_keeps_logical_dtypes(tmp_path):
+    df = _coerced()
+    optimized = optimize_memory(df)
+    store = str(tmp_path / "frame.arrow")
+    assert write_columnar(optimized, store, footprint_metadata(optimized))
+
+    # as a later process reads it back
+    restored = read_columnar(store)
+    restore_footprint(restored, columnar_metadata(store))
+
+    assert str(restored["whole"].dtype) == "int8"
+    assert logical_dtypes(restored) == df.dtypes.astype(str).to_dict()
+
+
+def test_unrecorded_narrow_dtypes_map_back():
+    frame = pd.DataFrame({
+        "units": pd.Series([1, 2, 3], dtype="int16"),
+        "region": pd.Series(["a", "b", "a"], dtype="category"),
+    })
+
+    assert logical_dtypes(frame) == {"units": "int64", "region": "object"}
+
+
+def test_data_quality_reports_logical_dtypes(tmp_path):
+    path = tmp_path / "sales.csv"
+    _coerced().to_csv(path, index=False)
+    df = load_dataset_frame(str(path))
+
+    plan = AnalysisPlan(task_type="data_quality")
+    state = executor_node({"df": df, "plan": plan, "dataset_path": str(path)})
+
+    assert not state.get("error"), state.get("error")
+    assert state["schema"]["dtypes"] == {
+        "region": "object", "units": "int64", "whole": "float64", "price": "float64",
+    }
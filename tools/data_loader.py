@@ -2,6 +2,10 @@ import pandas as pd
 from pathlib import Path
 from typing import Tuple, Dict, Any
 
+from agent.dataset.loader import read_raw
+from agent.dataset.partitions import dataset_files, is_multi_file
+from agent.dataset.profile import get_profile
+
 
 class DatasetLoadError(Exception):
     """Raised when dataset loading or profiling fails."""
@@ -9,6 +13,8 @@ class DatasetLoadError(Exception):
 def load_dataset(file_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     """
     Load a dataset from CSV or Parquet and return (df, schema).
+    A directory or glob pattern loads all of its CSV/Parquet files, with
+    Hive-style `key=value` folders as extra columns.
 
     Guarantees:
     - Fails fast on invalid inputs
@@ -20,23 +26,29 @@ def load_dataset(file_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
 
     path = Path(file_path)
 
-    if not path.exists():
+    if is_multi_file(file_path):
+        if not dataset_files(file_path):
+            raise DatasetLoadError(f"No CSV or Parquet files found at: {file_path}")
+        try:
+            df = read_raw(file_path)
+        except Exception as e:
+            raise DatasetLoadError(f"Failed to load dataset: {str(e)}") from e
+    elif not path.exists():
         raise DatasetLoadError(f"Dataset not found at: {file_path}")
-
-    if not path.is_file():
+    elif not path.is_file():
         raise DatasetLoadError(f"Provided path is not a file: {file_path}")
-
-    try:
-        if path.suffix.lower() == ".csv":
-            df = pd.read_csv(path)
-        elif path.suffix.lower() in {".parquet", ".pq"}:
-            df = pd.read_parquet(path)
-        else:
-            raise DatasetLoadError(
-                "Unsupported file format. Only CSV and Parquet are supported."
-            )
-    except Exception as e:
-        raise DatasetLoadError(f"Failed to load dataset: {str(e)}") from e
+    else:
+        try:
+            if path.suffix.lower() == ".csv":
+                df = read_raw(str(path))
+            elif path.suffix.lower() in {".parquet", ".pq"}:
+                df = pd.read_parquet(path)
+            else:
+                raise DatasetLoadError(
+                    "Unsupported file format. Only CSV and Parquet are supported."
+                )
+        except Exception as e:
+            raise DatasetLoadError(f"Failed to load dataset: {str(e)}") from e
 
     if df.empty:
         raise DatasetLoadError("Loaded dataset is empty")
@@ -45,13 +57,9 @@ def load_dataset(file_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         raise DatasetLoadError("Dataset contains duplicate column names")
 
     try:
+        profile = get_profile(df, str(path), variant="raw")
         missing_pct = {
-            col: float(df[col].isna().mean())
-            for col in df.columns
-        }
-
-        unique_counts = {
-            col: int(df[col].nunique(dropna=True))
+            col: float(profile.missing_ratio(col))
             for col in df.columns
         }
     except Exception as e:
@@ -59,11 +67,11 @@ def load_dataset(file_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
 
     schema: Dict[str, Any] = {
         "columns": list(df.columns),
-        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-        "row_count": int(len(df)),
+        "dtypes": {col: c.dtype for col, c in profile.columns.items()},
+        "row_count": profile.row_count,
         "missing_pct": missing_pct,
-        "unique_counts": unique_counts,
-        "sample_rows": df.head(5).to_dict(orient="records"),
+        "unique_counts": profile.unique_counts(),
+        "sample_rows": profile.sample_rows,
     }
 
     return df, schema